@@ -49,7 +49,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise, async-capable so async views are not pushed onto a thread
+    'main.middleware.AsyncWhiteNoiseMiddleware',
+    # Per-view latency, query and template metrics for /metrics (static files are not counted)
+    'main.middleware.MetricsMiddleware',
+    # Groups each request's GitHub calls for the logs, /metrics and X-GitHub-Calls
+    'main.middleware.GitHubTraceMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -62,7 +67,8 @@ ROOT_URLCONF = 'fmucontrolpanel.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that also reports render time to main.metrics
+        'BACKEND': 'main.metrics.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -133,3 +139,147 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # GitHub Integration
 GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN', '')
 GITHUB_WEBHOOK_SECRET = os.environ.get('GITHUB_WEBHOOK_SECRET', '')
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+
+# GitHub HTTP connection pool (shared by all GitHubClient instances in a process)
+GITHUB_POOL_SIZE = int(os.environ.get('GITHUB_POOL_SIZE', '20'))
+GITHUB_MAX_RETRIES = int(os.environ.get('GITHUB_MAX_RETRIES', '3'))
+GITHUB_RETRY_BACKOFF = float(os.environ.get('GITHUB_RETRY_BACKOFF', '0.5'))
+GITHUB_TIMEOUT = float(os.environ.get('GITHUB_TIMEOUT', '10'))
+
+# Concurrent GitHub fetches: pool size per fan-out and the overall page deadline (seconds)
+GITHUB_FANOUT_WORKERS = int(os.environ.get('GITHUB_FANOUT_WORKERS', '16'))
+REVIEW_QUEUE_DEADLINE = float(os.environ.get('REVIEW_QUEUE_DEADLINE', '5'))
+
+# GraphQL batch fetching (used when GITHUB_TOKEN is set; REST otherwise)
+GITHUB_USE_GRAPHQL = os.environ.get('GITHUB_USE_GRAPHQL', 'True') == 'True'
+GITHUB_GRAPHQL_URL = os.environ.get('GITHUB_GRAPHQL_URL', GITHUB_API_URL.rstrip('/') + '/graphql')
+GITHUB_GRAPHQL_BATCH_SIZE = int(os.environ.get('GITHUB_GRAPHQL_BATCH_SIZE', '25'))
+GITHUB_GRAPHQL_MAX_NODES = int(os.environ.get('GITHUB_GRAPHQL_MAX_NODES', '10000'))
+
+# Serve backfilled repositories from the local GitHub mirror instead of live API calls
+GITHUB_USE_MIRROR = os.environ.get('GITHUB_USE_MIRROR', 'True') == 'True'
+
+# Webhook deliveries are queued and answered with 202; process_webhooks runs the handlers
+WEBHOOK_ASYNC = os.environ.get('WEBHOOK_ASYNC', 'True') == 'True'
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_MAX_ATTEMPTS', '5'))
+WEBHOOK_RETRY_BACKOFF = int(os.environ.get('WEBHOOK_RETRY_BACKOFF', '30'))  # seconds, doubled per attempt
+WEBHOOK_LOCK_TIMEOUT = int(os.environ.get('WEBHOOK_LOCK_TIMEOUT', '300'))
+WEBHOOK_DONE_RETENTION_HOURS = int(os.environ.get('WEBHOOK_DONE_RETENTION_HOURS', '24'))
+# X-GitHub-Delivery GUIDs are remembered this long to drop redeliveries
+WEBHOOK_DEDUP_TTL_HOURS = int(os.environ.get('WEBHOOK_DEDUP_TTL_HOURS', '72'))
+
+# StatusEngine recomputes triggered by webhooks are coalesced per project: run once the
+# project has been quiet for the window, and never later than max-wait after the first event.
+# A window of 0 recomputes inline on every event.
+STATUS_RECOMPUTE_WINDOW = int(os.environ.get('STATUS_RECOMPUTE_WINDOW', '30'))
+STATUS_RECOMPUTE_MAX_WAIT = int(os.environ.get('STATUS_RECOMPUTE_MAX_WAIT', '120'))
+
+# Shared counters (main.counters) are flushed to the database at most this often (seconds)
+COUNTER_FLUSH_INTERVAL = float(os.environ.get('COUNTER_FLUSH_INTERVAL', '5'))
+
+# Conditional-request (ETag / Last-Modified) cache for GitHub responses.
+# 'memory' keeps an LRU per process; 'django' uses GITHUB_RESPONSE_CACHE_ALIAS
+# so all workers share validators; '' disables it.
+GITHUB_RESPONSE_CACHE = os.environ.get('GITHUB_RESPONSE_CACHE', 'memory')
+GITHUB_RESPONSE_CACHE_SIZE = int(os.environ.get('GITHUB_RESPONSE_CACHE_SIZE', '1024'))
+GITHUB_RESPONSE_CACHE_ALIAS = os.environ.get('GITHUB_RESPONSE_CACHE_ALIAS', 'default')
+
+# Caches. The local-memory default is per process; production (settings_prod) uses the
+# database so state such as the GitHub rate-limit budget is shared by every worker.
+# MAX_ENTRIES is raised from Django's 300 so cached GitHub data is not culled early.
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '5000'))
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+    },
+}
+
+# GitHub rate-limit budgeting (main.github_ratelimit). Background work leaves RESERVE
+# (fraction of the limit) for page loads and is paced once less than THROTTLE_AT remains,
+# sleeping at most MAX_DELAY seconds per call.
+GITHUB_RATELIMIT_CACHE_ALIAS = os.environ.get('GITHUB_RATELIMIT_CACHE_ALIAS', 'default')
+GITHUB_RATELIMIT_RESERVE = float(os.environ.get('GITHUB_RATELIMIT_RESERVE', '0.2'))
+GITHUB_RATELIMIT_THROTTLE_AT = float(os.environ.get('GITHUB_RATELIMIT_THROTTLE_AT', '0.5'))
+GITHUB_RATELIMIT_MAX_DELAY = float(os.environ.get('GITHUB_RATELIMIT_MAX_DELAY', '30'))
+
+# Application logs go to stderr. At INFO main.github_trace logs a summary of each request's
+# and webhook delivery's GitHub calls; at DEBUG every call
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'main': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}
+
+# Report each request's GitHub calls in an X-GitHub-Calls response header ("3; 812ms")
+GITHUB_TRACE_HEADER = os.environ.get('GITHUB_TRACE_HEADER', 'False') == 'True'
+
+# Log every SQL statement to this file for `manage.py index_report --log` (requires DEBUG=True)
+SQL_QUERY_LOG = os.environ.get('SQL_QUERY_LOG', '')
+if SQL_QUERY_LOG:
+    LOGGING['handlers']['sql_file'] = {
+        'class': 'logging.FileHandler',
+        'filename': SQL_QUERY_LOG,
+    }
+    LOGGING['loggers']['django.db.backends'] = {
+        'handlers': ['sql_file'],
+        'level': 'DEBUG',
+        'propagate': False,
+    }
+
+# prune_logs writes expired log entries here as gzip NDJSON (project-<id>/<YYYY-MM>.ndjson.gz)
+LOG_ARCHIVE_DIR = os.environ.get('LOG_ARCHIVE_DIR', str(BASE_DIR / 'log_archive'))
+
+# Live updates over Server-Sent Events (/events/, served by the ASGI application).
+# Changes are recorded as LiveEvent rows; each web worker polls them while browsers are
+# connected and drops connections more than LIVE_CLIENT_QUEUE messages behind.
+LIVE_UPDATES = os.environ.get('LIVE_UPDATES', 'True') == 'True'
+LIVE_POLL_INTERVAL = float(os.environ.get('LIVE_POLL_INTERVAL', '1'))
+LIVE_KEEPALIVE = int(os.environ.get('LIVE_KEEPALIVE', '15'))
+LIVE_CLIENT_QUEUE = int(os.environ.get('LIVE_CLIENT_QUEUE', '100'))
+LIVE_EVENT_RETENTION_MINUTES = int(os.environ.get('LIVE_EVENT_RETENTION_MINUTES', '10'))
+
+# Project detail page: live GitHub calls run concurrently on a per-process thread pool
+# and share one deadline (seconds); slower sections are served from the response cache
+PROJECT_DETAIL_DEADLINE = float(os.environ.get('PROJECT_DETAIL_DEADLINE', '5'))
+GITHUB_ASYNC_WORKERS = int(os.environ.get('GITHUB_ASYNC_WORKERS', '32'))
+
+# GitHub data shown by pages (main.repo_cache), per repository and kind. Entries are fresh
+# for these TTLs (seconds; 0 disables a kind) unless a webhook for the repository
+# invalidates them first; stale entries are served for up to STALE_TTL seconds while one
+# background refresh (holding a lock for at most REFRESH_LOCK seconds) replaces them.
+# Use a cache alias shared by all processes in production.
+GITHUB_DATA_CACHE_ALIAS = os.environ.get('GITHUB_DATA_CACHE_ALIAS', 'default')
+GITHUB_DATA_CACHE_TTLS = {
+    'pull_requests': int(os.environ.get('GITHUB_DATA_CACHE_TTL_PULL_REQUESTS', '120')),
+    'commits': int(os.environ.get('GITHUB_DATA_CACHE_TTL_COMMITS', '300')),
+    'issues': int(os.environ.get('GITHUB_DATA_CACHE_TTL_ISSUES', '300')),
+    'repo': int(os.environ.get('GITHUB_DATA_CACHE_TTL_REPO', '3600')),
+}
+GITHUB_DATA_CACHE_STALE_TTL = int(os.environ.get('GITHUB_DATA_CACHE_STALE_TTL', '86400'))
+GITHUB_DATA_REFRESH_LOCK = int(os.environ.get('GITHUB_DATA_REFRESH_LOCK', '60'))
+
+# Prometheus metrics (main.metrics): per-view latency, query and template histograms plus the
+# shared counters, aggregated across workers. /metrics answers requests carrying
+# "Authorization: Bearer <METRICS_TOKEN>" and is disabled (404) while the token is empty.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# JSON API (/api/projects/, /api/tasks/, /api/logs/; main.api): rows per page by default and at
+# most. Open like the pages unless API_TOKEN is set, then "Authorization: Bearer <API_TOKEN>"
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', '100'))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', '1000'))
+API_TOKEN = os.environ.get('API_TOKEN', '')
@@ -24,6 +24,17 @@ DATABASES = {
     }
 }
 
+# Shared cache table (python manage.py createcachetable) so every gunicorn worker and
+# the webhook worker see the same GitHub rate-limit budget and cached GitHub data, and
+# webhook invalidations reach every worker
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+    },
+}
+
 # Static files (CSS, JavaScript, Images)
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATIC_URL = '/static/'
@@ -21,10 +21,16 @@ from main import views
 urlpatterns = [
     path('', views.home, name='home'),
     path('project/<int:project_id>/', views.project_detail, name='project_detail'),
+    path('project/<int:project_id>/github/', views.project_github_activity, name='project_github_activity'),
     path('project/<int:project_id>/update-status/', views.update_project_status, name='update_project_status'),
     path('task/<int:task_id>/toggle/', views.toggle_task_status, name='toggle_task_status'),
     path('today/', views.today_view, name='today'),
+    path('events/', views.live_events, name='live_events'),
     path('review-merge/', views.review_merge_queue, name='review_merge'),
     path('webhooks/github/', views.github_webhook, name='github_webhook'),
+    path('metrics', views.metrics, name='metrics'),
+    path('api/projects/', views.api_projects, name='api_projects'),
+    path('api/tasks/', views.api_tasks, name='api_tasks'),
+    path('api/logs/', views.api_logs, name='api_logs'),
     path('admin/', admin.site.urls),
 ]
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Project, Task, Link, LogEntry
+from django.utils import timezone
+from .models import Project, ProjectStats, Task, Link, LogEntry, LogRollup, RepoSync, GitHubPullRequest, GitHubCommit, GitHubIssue, WebhookDelivery
 
 
 @admin.register(Project)
@@ -25,6 +26,58 @@ class LinkAdmin(admin.ModelAdmin):
 
 @admin.register(LogEntry)
 class LogEntryAdmin(admin.ModelAdmin):
-    list_display = ['project', 'message', 'timestamp']
-    list_filter = ['project', 'timestamp']
+    list_display = ['project', 'event_type', 'message', 'timestamp']
+    list_filter = ['event_type', 'project', 'timestamp']
     search_fields = ['message']
+
+
+@admin.register(LogRollup)
+class LogRollupAdmin(admin.ModelAdmin):
+    list_display = ['project', 'date', 'event_type', 'count']
+    list_filter = ['event_type', 'project']
+    date_hierarchy = 'date'
+
+
+@admin.register(ProjectStats)
+class ProjectStatsAdmin(admin.ModelAdmin):
+    list_display = ['project', 'open_tasks', 'urgent_tasks', 'overdue_tasks', 'overdue_as_of', 'last_activity_at']
+    # Maintained by main.project_stats; repair with `manage.py rebuild_stats`
+    readonly_fields = list_display + ['updated_at']
+
+
+@admin.register(RepoSync)
+class RepoSyncAdmin(admin.ModelAdmin):
+    list_display = ['repo_name', 'backfilled_at', 'synced_at']
+    search_fields = ['repo_name']
+
+
+@admin.register(GitHubPullRequest)
+class GitHubPullRequestAdmin(admin.ModelAdmin):
+    list_display = ['repo_name', 'number', 'title', 'state', 'draft', 'updated_at']
+    list_filter = ['state', 'draft']
+    search_fields = ['repo_name', 'title']
+
+
+@admin.register(GitHubCommit)
+class GitHubCommitAdmin(admin.ModelAdmin):
+    list_display = ['repo_name', 'sha', 'message', 'author', 'date']
+    search_fields = ['repo_name', 'sha', 'message']
+
+
+@admin.register(GitHubIssue)
+class GitHubIssueAdmin(admin.ModelAdmin):
+    list_display = ['repo_name', 'number', 'title', 'state', 'updated_at']
+    list_filter = ['state']
+    search_fields = ['repo_name', 'title']
+
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = ['id', 'event', 'delivery_id', 'status', 'attempts', 'received_at', 'processed_at']
+    list_filter = ['status', 'event']
+    search_fields = ['delivery_id']
+    actions = ['requeue']
+    
+    @admin.action(description='Requeue selected deliveries')
+    def requeue(self, request, queryset):
+        queryset.update(status='PENDING', attempts=0, available_at=timezone.now(), locked_at=None)
@@ -0,0 +1,209 @@
+"""
+Read-only JSON API for integrations: projects, tasks and log entries.
+
+Pages are keyset paginated. Each response ends with a cursor holding the
+sort key of its last row. The next page asks for rows after that key,
+with WHERE key > cursor ORDER BY key LIMIT n on an indexed key: projects
+and tasks by id, log entries newest first by (timestamp, id). So a page
+costs the same however deep the cursor is, and nothing is counted;
+OFFSET and COUNT(*) would read every row before the page.
+
+That holds for unfiltered pages and for pages of a single project, which
+seek the (project, id) and (project, -timestamp, -id) indexes. Other
+filters (status, priority, event_type, several projects) are applied to
+the rows the index walk reaches, so a page reads past the rows they
+exclude, and several projects are merged with a sort.
+
+Query parameters:
+- fields: comma-separated columns to return (default: all of them).
+- limit: rows per page (API_PAGE_SIZE; at most API_MAX_PAGE_SIZE).
+- cursor: the previous page's "next".
+- Per-resource filters: status, risk, priority, event_type, project.
+  Each takes comma-separated values.
+
+The body is streamed row by row as {"results": [...], "next": cursor or null}.
+"""
+import base64
+import binascii
+import json
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+
+from .models import LogEntry, Project, Task
+
+# Rows fetched from the database at a time while a page streams
+CHUNK_SIZE = 200
+
+
+class InvalidQuery(ValueError):
+    """A query parameter the API cannot serve (answered with 400)"""
+
+
+class Resource(NamedTuple):
+    model: type
+    # Columns a client may select, in output order
+    fields: Tuple[str, ...]
+    # Query parameter -> (column, allowed values or None for integer ids)
+    filters: Dict[str, Tuple[str, Optional[List[str]]]]
+    # Sort key, an index prefix; the last column must be unique
+    ordering: Tuple[str, ...]
+
+
+def _choices(model: type, field: str) -> List[str]:
+    return [value for value, _ in model._meta.get_field(field).choices]
+
+
+RESOURCES = {
+    'projects': Resource(
+        Project,
+        ('id', 'name', 'description', 'repo_name', 'status', 'risk', 'summary', 'next_task',
+         'created_at', 'updated_at'),
+        {'status': ('status', _choices(Project, 'status')), 'risk': ('risk', _choices(Project, 'risk'))},
+        ('id',),
+    ),
+    'tasks': Resource(
+        Task,
+        ('id', 'project_id', 'title', 'description', 'status', 'priority', 'due_date', 'github_issue_number',
+         'created_at', 'updated_at'),
+        {
+            'project': ('project_id', None),
+            'status': ('status', _choices(Task, 'status')),
+            'priority': ('priority', _choices(Task, 'priority')),
+        },
+        ('id',),
+    ),
+    'logs': Resource(
+        LogEntry,
+        ('id', 'project_id', 'message', 'event_type', 'timestamp'),
+        {'project': ('project_id', None), 'event_type': ('event_type', _choices(LogEntry, 'event_type'))},
+        ('-timestamp', '-id'),
+    ),
+}
+
+
+def _columns(ordering: Tuple[str, ...]) -> List[str]:
+    return [key.lstrip('-') for key in ordering]
+
+
+def encode_cursor(row: Dict, ordering: Tuple[str, ...]) -> str:
+    """Opaque cursor for the rows after this one"""
+    values = [row[column].isoformat() if hasattr(row[column], 'isoformat') else row[column]
+              for column in _columns(ordering)]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, resource: Resource) -> List:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise InvalidQuery('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(resource.ordering):
+        raise InvalidQuery('Invalid cursor')
+
+    decoded = []
+    for column, value in zip(_columns(resource.ordering), values):
+        if resource.model._meta.get_field(column).get_internal_type() == 'DateTimeField':
+            try:
+                value = parse_datetime(value) if isinstance(value, str) else None
+            except ValueError:
+                # Well formatted but not a real date, e.g. month 13
+                raise InvalidQuery('Invalid cursor')
+        elif not isinstance(value, int) or isinstance(value, bool):
+            value = None
+        if value is None:
+            raise InvalidQuery('Invalid cursor')
+        decoded.append(value)
+    return decoded
+
+
+def _after(ordering: Tuple[str, ...], values: List) -> Q:
+    """Rows strictly after the cursor in sort order, as a range an index can seek to"""
+    column = ordering[0].lstrip('-')
+    descending = ordering[0].startswith('-')
+    if len(ordering) == 1:
+        return Q(**{f'{column}__{"lt" if descending else "gt"}': values[0]})
+    # (a, b) > (x, y) is a >= x AND (a > x OR (b > y)); the first term bounds the index scan
+    rest = _after(ordering[1:], values[1:])
+    return (Q(**{f'{column}__{"lte" if descending else "gte"}': values[0]})
+            & (Q(**{f'{column}__{"lt" if descending else "gt"}': values[0]}) | rest))
+
+
+def _values(raw: str, column: str, allowed: Optional[List[str]]) -> List:
+    values = [value.strip() for value in raw.split(',') if value.strip()]
+    if allowed is None:
+        if not all(value.isdigit() for value in values):
+            raise InvalidQuery(f'{column} takes integer ids')
+        return [int(value) for value in values]
+    unknown = sorted(set(values) - set(allowed))
+    if unknown:
+        raise InvalidQuery(f'Unknown {column}: {", ".join(unknown)} (one of {", ".join(allowed)})')
+    return values
+
+
+def page(name: str, params) -> Tuple[QuerySet, List[str], int, Resource]:
+    """
+    The query for one page of a resource
+
+    Args:
+        name: Key of RESOURCES
+        params: Request query parameters
+
+    Returns:
+        (queryset, fields, limit, resource) - the queryset yields up to
+        limit + 1 rows as dicts (one more than the page, to tell whether
+        another page follows), with the sort key columns even when the
+        client did not select them
+
+    Raises:
+        InvalidQuery: An unknown field, filter value, limit or cursor
+    """
+    resource = RESOURCES[name]
+    fields = list(resource.fields)
+    if params.get('fields'):
+        fields = [field.strip() for field in params['fields'].split(',') if field.strip()]
+        unknown = sorted(set(fields) - set(resource.fields))
+        if unknown:
+            raise InvalidQuery(f'Unknown fields: {", ".join(unknown)} (one of {", ".join(resource.fields)})')
+
+    try:
+        limit = int(params.get('limit') or getattr(settings, 'API_PAGE_SIZE', 100))
+    except ValueError:
+        raise InvalidQuery('limit must be an integer')
+    if limit < 1:
+        raise InvalidQuery('limit must be positive')
+    limit = min(limit, getattr(settings, 'API_MAX_PAGE_SIZE', 1000))
+
+    queryset = resource.model._default_manager.all()
+    for param, (column, allowed) in resource.filters.items():
+        if params.get(param):
+            queryset = queryset.filter(**{f'{column}__in': _values(params[param], param, allowed)})
+    if params.get('cursor'):
+        queryset = queryset.filter(_after(resource.ordering, decode_cursor(params['cursor'], resource)))
+
+    columns = list(dict.fromkeys(fields + _columns(resource.ordering)))
+    queryset = queryset.order_by(*resource.ordering).values(*columns)[:limit + 1]
+    return queryset, fields, limit, resource
+
+
+async def stream(queryset: QuerySet, fields: List[str], limit: int, resource: Resource) -> AsyncIterator[bytes]:
+    """The JSON body of a page, row by row"""
+    yield b'{"results": ['
+    count = 0
+    last = None
+    async for row in queryset.aiterator(chunk_size=CHUNK_SIZE):
+        if count == limit:
+            # The extra row: another page follows
+            break
+        separator = ', ' if count else ''
+        yield (separator + json.dumps({field: row[field] for field in fields}, cls=DjangoJSONEncoder)).encode()
+        count += 1
+        last = row
+    else:
+        last = None
+    next_cursor = encode_cursor(last, resource.ordering) if last is not None else None
+    yield f'], "next": {json.dumps(next_cursor)}}}'.encode()
+
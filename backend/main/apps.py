@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class MainConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'main'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import metrics, signals  # noqa: F401  (connects the live update handlers)
+        
+        if getattr(settings, 'METRICS_ENABLED', True):
+            connection_created.connect(metrics.install_query_wrapper, dispatch_uid='main.metrics')
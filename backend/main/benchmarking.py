@@ -0,0 +1,44 @@
+"""
+Helpers shared by the bench_* management commands.
+"""
+from contextlib import contextmanager
+from typing import Dict, List
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of timings"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    """Mean, p50 and p99 of a list of timings"""
+    return {
+        'mean': sum(timings) / len(timings) if timings else 0.0,
+        'p50': percentile(timings, 50),
+        'p99': percentile(timings, 99),
+    }
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Run the block against a throwaway test database.
+    
+    Benchmarks seed and wipe data freely, so they never touch the
+    configured database.
+    """
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
@@ -0,0 +1,115 @@
+"""
+Process-safe event counters.
+
+Increments are buffered in memory and flushed to the Counter table at
+most every COUNTER_FLUSH_INTERVAL seconds with atomic F() updates, so
+hot paths pay a dict update rather than a query, and values add up
+across every gunicorn worker and background process.
+
+A flush writes one row per counter, so it never runs in the request
+that makes it due: that request starts it in a background thread and
+returns. Increments are then safe from sync and async code alike.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+_pending = defaultdict(int)
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+# The running background flush, if any
+_flusher = None
+
+
+def _add(amounts: Dict[str, int]):
+    """Buffer increments and start a flush in the background when one is due"""
+    global _flusher
+    with _lock:
+        for name, amount in amounts.items():
+            _pending[name] += amount
+        if time.monotonic() - _last_flush < getattr(settings, 'COUNTER_FLUSH_INTERVAL', 5):
+            return
+        if _flusher is not None and _flusher.is_alive():
+            return
+        _flusher = threading.Thread(target=_flush_in_background, name='counter-flush', daemon=True)
+    _flusher.start()
+
+
+def _flush_in_background():
+    try:
+        flush()
+    except Exception:
+        logger.exception('Counter flush failed')
+    finally:
+        # The thread's own connection; nothing else will close it
+        connection.close()
+
+
+def incr(name: str, amount: int = 1):
+    """Add amount to the named counter"""
+    _add({name: amount})
+
+
+def incr_many(amounts: Dict[str, int]):
+    """Add several amounts at once (one lock round trip)"""
+    _add(amounts)
+
+
+def flush():
+    """Write buffered increments to the database"""
+    global _last_flush
+    from .models import Counter
+
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+
+    for name, amount in pending.items():
+        try:
+            if not Counter.objects.filter(name=name).update(value=F('value') + amount):
+                try:
+                    with transaction.atomic():
+                        Counter.objects.create(name=name, value=amount)
+                except IntegrityError:
+                    Counter.objects.filter(name=name).update(value=F('value') + amount)
+        except DatabaseError:
+            # Keep the increment for the next flush rather than losing it
+            with _lock:
+                _pending[name] += amount
+
+
+def snapshot() -> Dict[str, int]:
+    """All counters, including this process's unflushed increments"""
+    from .models import Counter
+
+    values = dict(Counter.objects.values_list('name', 'value'))
+    with _lock:
+        for name, amount in _pending.items():
+            values[name] = values.get(name, 0) + amount
+    return values
+
+
+def value(name: str) -> int:
+    return snapshot().get(name, 0)
+
+
+def _flush_at_exit():
+    try:
+        if _flusher is not None:
+            _flusher.join(timeout=5)
+        flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
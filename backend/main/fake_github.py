@@ -0,0 +1,282 @@
+"""
+Local stand-in for the GitHub REST API used by benchmarks.
+
+Serves canned JSON for the endpoints GitHubClient calls so performance
+work can be measured without network access or rate limits.
+"""
+import hashlib
+import json
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlencode
+
+
+REPO_PATH = re.compile(r'^/repos/(?P<repo>[^/]+/[^/]+)(?:/(?P<kind>pulls|commits|issues))?$')
+GRAPHQL_REPO = re.compile(r'(?P<alias>r\d+): repository\(owner: "(?P<owner>[^"]+)", name: "(?P<name>[^"]+)"\)')
+
+
+def _pull_request(repo_name, number):
+    return {
+        'number': number,
+        'title': f'Change #{number} for {repo_name}',
+        'state': 'open',
+        'user': {'login': 'octocat'},
+        'created_at': '2025-01-01T00:00:00Z',
+        'updated_at': f'2025-01-{(number % 28) + 1:02d}T12:00:00Z',
+        'html_url': f'https://github.com/{repo_name}/pull/{number}',
+        'draft': number % 7 == 0,
+    }
+
+
+def _commit(repo_name, index):
+    sha = hashlib.sha1(f'{repo_name}:{index}'.encode()).hexdigest()
+    return {
+        'sha': sha,
+        'commit': {
+            'message': f'Commit {index}\n\nDetails',
+            'author': {'name': 'Octo Cat', 'date': '2025-01-01T00:00:00Z'},
+        },
+        'html_url': f'https://github.com/{repo_name}/commit/{sha}',
+    }
+
+
+def _issue(repo_name, number):
+    return {
+        'number': number,
+        'title': f'Issue #{number}',
+        'state': 'open',
+        'user': {'login': 'octocat'},
+        'created_at': '2025-01-01T00:00:00Z',
+        'updated_at': '2025-01-02T00:00:00Z',
+        'html_url': f'https://github.com/{repo_name}/issues/{number}',
+        'labels': [{'name': 'bug'}] if number % 3 else [{'name': 'critical'}],
+    }
+
+
+def _graphql_repository(repo_name, query, count):
+    """GraphQL repository node mirroring the REST stand-in data"""
+    repo = {}
+    if 'pullRequests(' in query:
+        repo['pullRequests'] = {'nodes': [{
+            'number': pr['number'], 'title': pr['title'], 'state': 'OPEN', 'isDraft': pr['draft'],
+            'createdAt': pr['created_at'], 'updatedAt': pr['updated_at'], 'url': pr['html_url'],
+            'author': {'login': pr['user']['login']},
+        } for pr in (_pull_request(repo_name, n) for n in range(1, count + 1))]}
+    if 'history(' in query:
+        repo['defaultBranchRef'] = {'target': {'history': {'nodes': [{
+            'oid': c['sha'], 'messageHeadline': c['commit']['message'].split('\n')[0], 'url': c['html_url'],
+            'author': c['commit']['author'],
+        } for c in (_commit(repo_name, n) for n in range(1, count + 1))]}}}
+    if 'issues(' in query:
+        repo['issues'] = {'nodes': [{
+            'number': i['number'], 'title': i['title'], 'state': 'OPEN',
+            'createdAt': i['created_at'], 'updatedAt': i['updated_at'], 'url': i['html_url'],
+            'author': {'login': i['user']['login']}, 'labels': {'nodes': i['labels']},
+        } for i in (_issue(repo_name, n) for n in range(1, count + 1))]}
+    return repo
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately; avoid Nagle stalls on keep-alive
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Called once per TCP connection: model the cost of a fresh handshake
+        self.server.stats['connections'] += 1
+        if self.server.handshake_delay:
+            time.sleep(self.server.handshake_delay)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.stats['requests'] += 1
+        path, _, query = self.path.partition('?')
+        match = REPO_PATH.match(path)
+        if not match:
+            self._send(404, {'message': 'Not Found'})
+            return
+
+        repo_name = match.group('repo')
+        delay = self.server.delays.get(repo_name, self.server.default_delay)
+        if delay:
+            time.sleep(delay)
+
+        count = self.server.items_per_page
+        numbers = range(1, count + 1)
+        headers = {}
+        kind = match.group('kind')
+        if kind and self.server.total_items is not None:
+            # Paginated like GitHub: per_page / page parameters and a Link header
+            params = {name: values[0] for name, values in parse_qs(query).items()}
+            per_page = min(int(params.get('per_page', 30)), 100)
+            page = int(params.get('page', 1))
+            first = (page - 1) * per_page + 1
+            numbers = range(first, min(first + per_page, self.server.total_items + 1))
+            if first + per_page <= self.server.total_items:
+                next_query = urlencode(dict(params, page=page + 1))
+                headers['Link'] = f'<http://{self.headers.get("Host")}{path}?{next_query}>; rel="next"'
+
+        if kind == 'pulls':
+            body = [_pull_request(repo_name, n) for n in numbers]
+        elif kind == 'commits':
+            body = [_commit(repo_name, n) for n in numbers]
+        elif kind == 'issues':
+            body = [_issue(repo_name, n) for n in numbers]
+        else:
+            body = {
+                'name': repo_name.split('/')[1],
+                'full_name': repo_name,
+                'description': 'Stand-in repository',
+                'html_url': f'https://github.com/{repo_name}',
+                'stargazers_count': 0,
+                'forks_count': 0,
+                'open_issues_count': count,
+                'default_branch': 'main',
+            }
+        self._send(200, body, headers)
+
+    def do_POST(self):
+        self.server.stats['requests'] += 1
+        length = int(self.headers.get('Content-Length') or 0)
+        query = json.loads(self.rfile.read(length) or b'{}').get('query', '')
+        if self.path.split('?', 1)[0] != '/graphql':
+            self._send(404, {'message': 'Not Found'})
+            return
+
+        self.server.stats['graphql'] = self.server.stats.get('graphql', 0) + 1
+        data = {}
+        delay = 0.0
+        for match in GRAPHQL_REPO.finditer(query):
+            repo_name = f"{match.group('owner')}/{match.group('name')}"
+            delay = max(delay, self.server.delays.get(repo_name, self.server.default_delay))
+            data[match.group('alias')] = _graphql_repository(repo_name, query, self.server.items_per_page)
+        if delay:
+            time.sleep(delay)
+        self._send(200, {'data': data})
+
+    def _rate_limit_headers(self, resource):
+        """Charge one call to the budget; None when it is exhausted"""
+        server = self.server
+        with server.budget_lock:
+            remaining = server.budget.get(resource, server.rate_limit)
+            if remaining <= 0:
+                return None
+            server.budget[resource] = remaining - 1
+        return {
+            'X-RateLimit-Limit': str(server.rate_limit),
+            'X-RateLimit-Remaining': str(remaining - 1),
+            'X-RateLimit-Reset': str(server.rate_limit_reset),
+            'X-RateLimit-Resource': resource,
+        }
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        etag = '"%s"' % hashlib.sha1(payload).hexdigest()
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            # Like GitHub, a 304 answer does not count against the rate limit
+            self.server.stats['not_modified'] += 1
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        extra = dict(headers or {})
+        if self.server.rate_limit is not None:
+            limits = self._rate_limit_headers('graphql' if self.command == 'POST' else 'core')
+            if limits is not None:
+                extra.update(limits)
+            else:
+                self.server.stats['rate_limited'] = self.server.stats.get('rate_limited', 0) + 1
+                status = 403
+                payload = json.dumps({'message': 'API rate limit exceeded'}).encode()
+                extra = {
+                    'X-RateLimit-Limit': str(self.server.rate_limit),
+                    'X-RateLimit-Remaining': '0',
+                    'X-RateLimit-Reset': str(self.server.rate_limit_reset),
+                }
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in extra.items():
+            self.send_header(name, value)
+        if status == 200:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that hit their timeout hang up mid-response; that is expected here
+        pass
+
+
+class FakeGitHub:
+    """
+    Threaded HTTP/1.1 server impersonating api.github.com.
+
+    Usage:
+        with FakeGitHub(delays={'fmu/slow': 2.0}) as fake:
+            client = GitHubClient(base_url=fake.url)
+
+    Args:
+        delays: Per-repository response delay in seconds
+        default_delay: Delay for repositories not listed in ``delays``
+        handshake_delay: Delay applied once per new TCP connection
+        items_per_page: Number of items returned by list endpoints
+        total_items: When set, list endpoints hold this many items and are
+            paginated with per_page / page and a Link header
+        rate_limit: Calls allowed per resource (core / graphql) before the
+            server answers 403 like GitHub; None disables rate limiting
+    """
+
+    def __init__(self, delays: Optional[Dict[str, float]] = None, default_delay: float = 0.0,
+                 handshake_delay: float = 0.0, items_per_page: int = 10,
+                 rate_limit: Optional[int] = None, total_items: Optional[int] = None):
+        self.server = _Server(('127.0.0.1', 0), _Handler)
+        self.server.delays = delays or {}
+        self.server.default_delay = default_delay
+        self.server.handshake_delay = handshake_delay
+        self.server.items_per_page = items_per_page
+        self.server.total_items = total_items
+        self.server.rate_limit = rate_limit
+        self.server.rate_limit_reset = int(time.time()) + 3600
+        self.server.budget = {}
+        self.server.budget_lock = threading.Lock()
+        self.server.stats = {'connections': 0, 'requests': 0, 'not_modified': 0}
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def stats(self):
+        return self.server.stats
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
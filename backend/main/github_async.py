@@ -0,0 +1,122 @@
+"""
+Asyncio front end to the GitHub clients, for async views.
+
+Calls run the blocking GitHubClient code on a dedicated thread pool
+(GITHUB_ASYNC_WORKERS threads per process), so they share its pooled
+session, conditional-request cache and rate-limit budgeting while the
+event loop stays free: an ASGI worker waiting on a slow GitHub keeps
+serving other requests. gather() runs several calls under one deadline;
+submit() starts background work such as cache refreshes.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import github_trace
+from .github_client import GitHubClient
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Process-wide pool for GitHub calls (rebuilt after a fork, like the session)"""
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _executor_lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'GITHUB_ASYNC_WORKERS', 32),
+                    thread_name_prefix='github-async',
+                )
+                _executor_pid = pid
+    return _executor
+
+
+def _call(func: Callable, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # Counters and a database-backed cache may have opened a connection in this thread
+        close_old_connections()
+
+
+async def run(func: Callable, *args, **kwargs):
+    """Run a blocking GitHub call on the pool, in the caller's context (its calls are traced to the caller)"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(context.run, _call, func, *args, **kwargs))
+
+
+def submit(func: Callable, *args, **kwargs):
+    """
+    Run a blocking GitHub call on the pool in the background, without waiting for it
+
+    It outlives the request that started it, so its GitHub calls are
+    traced in a scope of their own, named after that request.
+    """
+    trace = github_trace.current()
+    label = f'{func.__name__} ({trace.label})' if trace else func.__name__
+    return get_executor().submit(_call, github_trace.traced, label, func, *args, **kwargs)
+
+
+async def gather(calls: Dict[str, Awaitable], deadline: Optional[float] = None) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Await named calls concurrently under one deadline
+
+    Args:
+        calls: Awaitables by name
+        deadline: Seconds to wait for all of them; None waits for every call
+
+    Returns:
+        (results, missed) - results maps each name that finished in time to
+        its value; missed lists names that raised or were still running.
+        Calls still running at the deadline finish in the background
+        (bounded by the client timeout) and their results are dropped.
+    """
+    if not calls:
+        return {}, []
+    tasks = {name: asyncio.ensure_future(call) for name, call in calls.items()}
+    done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in pending:
+        task.cancel()
+
+    results = {}
+    missed = []
+    for name, task in tasks.items():
+        if task in done and task.exception() is None:
+            results[name] = task.result()
+        else:
+            missed.append(name)
+    return results, missed
+
+
+class AsyncGitHubClient:
+    """Awaitable counterparts of the GitHubClient fetch methods"""
+
+    def __init__(self, token: Optional[str] = None, base_url: Optional[str] = None,
+                 timeout: Optional[float] = None, priority: Optional[str] = None):
+        self.client = GitHubClient(token=token, base_url=base_url, timeout=timeout, priority=priority)
+
+    async def fetch_pull_requests(self, repo_name: str, state: str = "open", limit: int = 10,
+                                  strict: bool = False) -> List[Dict]:
+        return await run(self.client.fetch_pull_requests, repo_name, state=state, limit=limit, strict=strict)
+
+    async def fetch_commits(self, repo_name: str, limit: int = 10, strict: bool = False) -> List[Dict]:
+        return await run(self.client.fetch_commits, repo_name, limit=limit, strict=strict)
+
+    async def fetch_issues(self, repo_name: str, state: str = "open", limit: int = 10,
+                           strict: bool = False) -> List[Dict]:
+        return await run(self.client.fetch_issues, repo_name, state=state, limit=limit, strict=strict)
+
+    async def fetch_repo_info(self, repo_name: str) -> Optional[Dict]:
+        return await run(self.client.fetch_repo_info, repo_name)
@@ -0,0 +1,126 @@
+"""
+Conditional-request cache for GitHub API responses.
+
+Stores the trimmed result of a GitHub call together with its ETag and
+Last-Modified validators so the next call can be sent with
+If-None-Match / If-Modified-Since. A 304 answer then returns the stored
+data without downloading or parsing the body, and does not count
+against the GitHub rate limit.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from django.conf import settings
+
+
+class LRUResponseCache:
+    """In-process LRU cache bounded by number of entries"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Dict):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DjangoResponseCache:
+    """
+    Cache backed by a configured Django cache alias.
+
+    Use a shared backend (database, memcached, redis) so every gunicorn
+    worker benefits from the validators fetched by the others.
+    """
+
+    def __init__(self, alias: str = 'default', timeout: Optional[int] = None):
+        from django.core.cache import caches
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.cache.get(key)
+
+    def set(self, key: str, entry: Dict):
+        self.cache.set(key, entry, self.timeout)
+
+    def delete(self, key: str):
+        self.cache.delete(key)
+
+    def clear(self):
+        self.cache.clear()
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Return the configured response cache, or None when disabled.
+
+    settings.GITHUB_RESPONSE_CACHE selects the backend:
+        'memory' - in-process LRU (GITHUB_RESPONSE_CACHE_SIZE entries)
+        'django' - Django cache alias GITHUB_RESPONSE_CACHE_ALIAS
+        ''       - disabled
+    """
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                backend = getattr(settings, 'GITHUB_RESPONSE_CACHE', 'memory')
+                if backend == 'django':
+                    _response_cache = DjangoResponseCache(
+                        alias=getattr(settings, 'GITHUB_RESPONSE_CACHE_ALIAS', 'default'),
+                        timeout=getattr(settings, 'GITHUB_RESPONSE_CACHE_TIMEOUT', None),
+                    )
+                elif backend == 'memory':
+                    _response_cache = LRUResponseCache(
+                        max_entries=getattr(settings, 'GITHUB_RESPONSE_CACHE_SIZE', 1024),
+                    )
+                else:
+                    return None
+    return _response_cache
+
+
+def reset_response_cache():
+    """Drop the configured cache instance (used by tests and benchmarks)"""
+    global _response_cache
+    with _response_cache_lock:
+        _response_cache = None
+
+
+def cache_key(endpoint: str, params: Optional[Dict], token: str = '') -> str:
+    """
+    Build a cache key from the endpoint, sorted params and token.
+
+    The token is hashed into the key because GitHub returns different
+    bodies (and ETags) depending on who is asking.
+    """
+    raw = json.dumps([endpoint, sorted((params or {}).items()), token], default=str)
+    return 'github:resp:' + hashlib.sha1(raw.encode()).hexdigest()
@@ -1,9 +1,193 @@
 """
 GitHub API client for fetching repository data
 """
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
-from typing import List, Dict, Optional
+from typing import Any, Callable, Iterable, Iterator, List, Dict, Optional, Union, Tuple
+from . import counters, github_ratelimit, github_trace
+from .github_cache import cache_key, get_response_cache
+
+logger = logging.getLogger(__name__)
+
+
+# Status codes worth retrying: GitHub returns these for transient upstream failures
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+# Largest page GitHub serves; iterators use it to keep the number of calls down
+MAX_PER_PAGE = 100
+
+class GitHubAPIError(Exception):
+    """A page of a strict iteration could not be fetched"""
+
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    """Create a session with a keep-alive connection pool and retry policy"""
+    pool_size = getattr(settings, 'GITHUB_POOL_SIZE', 20)
+    # Retry connection failures and 5xx answers, but not read timeouts:
+    # a slow upstream should cost one timeout, not one per attempt.
+    # POST is only used for read-only GraphQL queries, so it is safe to retry.
+    # Retry-After (rate limits) is handled by github_ratelimit rather than by
+    # sleeping inside the request.
+    retry = Retry(
+        total=getattr(settings, 'GITHUB_MAX_RETRIES', 3),
+        read=0,
+        backoff_factor=getattr(settings, 'GITHUB_RETRY_BACKOFF', 0.5),
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['GET', 'HEAD', 'POST']),
+        raise_on_status=False,
+        respect_retry_after_header=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide pooled session used for all GitHub traffic.
+    
+    The session is created lazily and rebuilt after a fork so gunicorn
+    workers never share sockets inherited from the master process.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_session()
+                _session_pid = pid
+    return _session
+
+
+def _trim_pull_requests(data: List[Dict]) -> List[Dict]:
+    """Extract relevant PR information"""
+    prs = []
+    for pr in data:
+        prs.append({
+            'number': pr.get('number'),
+            'title': pr.get('title'),
+            'state': pr.get('state'),
+            'user': pr.get('user', {}).get('login'),
+            'created_at': pr.get('created_at'),
+            'updated_at': pr.get('updated_at'),
+            'html_url': pr.get('html_url'),
+            'draft': pr.get('draft', False),
+        })
+    return prs
+
+
+def _trim_commits(data: List[Dict]) -> List[Dict]:
+    """Extract relevant commit information"""
+    commits = []
+    for commit in data:
+        commits.append({
+            'sha': commit.get('sha', '')[:7],  # Short SHA
+            'message': commit.get('commit', {}).get('message', '').split('\n')[0],  # First line only
+            'author': commit.get('commit', {}).get('author', {}).get('name'),
+            'date': commit.get('commit', {}).get('author', {}).get('date'),
+            'html_url': commit.get('html_url'),
+        })
+    return commits
+
+
+def _trim_issues(data: List[Dict]) -> List[Dict]:
+    """Extract relevant issue information (filter out PRs)"""
+    issues = []
+    for issue in data:
+        # Skip pull requests (they appear in issues endpoint too)
+        if 'pull_request' in issue:
+            continue
+        
+        issues.append({
+            'number': issue.get('number'),
+            'title': issue.get('title'),
+            'state': issue.get('state'),
+            'user': issue.get('user', {}).get('login'),
+            'created_at': issue.get('created_at'),
+            'updated_at': issue.get('updated_at'),
+            'html_url': issue.get('html_url'),
+            'labels': [label.get('name') for label in issue.get('labels', [])],
+        })
+    return issues
+
+
+def _trim_repo_info(data: Dict) -> Dict:
+    """Extract basic repository information"""
+    return {
+        'name': data.get('name'),
+        'full_name': data.get('full_name'),
+        'description': data.get('description'),
+        'html_url': data.get('html_url'),
+        'stars': data.get('stargazers_count'),
+        'forks': data.get('forks_count'),
+        'open_issues': data.get('open_issues_count'),
+        'default_branch': data.get('default_branch'),
+    }
+
+
+def reset_session():
+    """Close the pooled session (used by tests and benchmarks)"""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _session_pid = None
+
+
+def fan_out(func: Callable, items: Iterable, deadline: Optional[float] = None,
+            max_workers: Optional[int] = None) -> Tuple[Dict[Any, Any], List[Any]]:
+    """
+    Call func(item) for every item on a bounded thread pool.
+    
+    Args:
+        func: Callable taking one item
+        items: Hashable items to process
+        deadline: Seconds to wait for all calls; None waits for every call
+        max_workers: Pool size (default: settings.GITHUB_FANOUT_WORKERS)
+    
+    Returns:
+        (results, missed) - results maps each item that finished in time to
+        its return value; missed lists items that raised or did not finish
+        before the deadline. Calls still running at the deadline are left
+        to finish in the background (bounded by their own timeouts).
+    """
+    items = list(items)
+    if not items:
+        return {}, []
+    
+    if max_workers is None:
+        max_workers = getattr(settings, 'GITHUB_FANOUT_WORKERS', 16)
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(items)),
+                                  thread_name_prefix='github-fanout')
+    # Each call runs in a copy of the caller's context, so its GitHub calls are traced to the caller
+    futures = {executor.submit(contextvars.copy_context().run, func, item): item for item in items}
+    done, _ = wait(futures, timeout=deadline)
+    executor.shutdown(wait=False, cancel_futures=True)
+    
+    results = {}
+    missed = []
+    for future, item in futures.items():
+        if future in done and future.exception() is None:
+            results[item] = future.result()
+        else:
+            missed.append(item)
+    return results, missed
 
 
 class GitHubClient:
@@ -11,136 +195,299 @@ class GitHubClient:
     
     BASE_URL = "https://api.github.com"
     
-    def __init__(self, token: Optional[str] = None):
+    def __init__(self, token: Optional[str] = None, base_url: Optional[str] = None,
+                 timeout: Optional[Union[float, Tuple[float, float]]] = None,
+                 priority: Optional[str] = None):
         self.token = token or settings.GITHUB_TOKEN
+        self.timeout = timeout if timeout is not None else getattr(settings, 'GITHUB_TIMEOUT', 10)
+        # github_ratelimit.INTERACTIVE or BACKGROUND; background calls yield budget to pages
+        self.priority = priority or github_ratelimit.default_priority()
+        self.base_url = (base_url or getattr(settings, 'GITHUB_API_URL', self.BASE_URL)).rstrip('/')
+        self.session = get_session()
+        self.cache = get_response_cache()
         self.headers = {
             "Accept": "application/vnd.github.v3+json",
         }
         if self.token:
             self.headers["Authorization"] = f"token {self.token}"
     
-    def _get(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Dict]:
-        """Make a GET request to GitHub API"""
+    def _get(self, endpoint: str, params: Optional[Dict] = None,
+             timeout: Optional[Union[float, Tuple[float, float]]] = None,
+             transform: Optional[Callable] = None):
+        """Make a GET request to GitHub API and return the (transformed) JSON, or None"""
+        return self._get_page(endpoint, params, timeout, transform)[0]
+    
+    def _get_page(self, endpoint: str, params: Optional[Dict] = None,
+                  timeout: Optional[Union[float, Tuple[float, float]]] = None,
+                  transform: Optional[Callable] = None) -> Tuple[Any, Optional[str]]:
+        """
+        Make a GET request to GitHub API
+        
+        When a response cache is configured the request is sent with the
+        stored ETag / Last-Modified validators, and a 304 answer returns
+        the cached result without reading the body.
+        
+        Calls are budgeted against the shared GitHub rate limit: when the
+        budget cannot cover the call (or GitHub rejects it as rate limited)
+        the last cached result is returned instead.
+        
+        Args:
+            endpoint: API path relative to the base URL, or an absolute URL
+                (e.g. a Link header 'next' URL)
+            params: Query string parameters
+            timeout: Per-call timeout in seconds, or a (connect, read) tuple.
+                Defaults to the client timeout (settings.GITHUB_TIMEOUT).
+            transform: Callable applied to the decoded JSON; its result is
+                what gets cached and returned
+        
+        Returns:
+            (data, next_url) - data is None on errors; next_url is the
+            Link header's next page, or None on the last page
+        """
+        if timeout is None:
+            timeout = self.timeout
+        
+        url = endpoint if endpoint.startswith(('http://', 'https://')) else f"{self.base_url}/{endpoint}"
+        key = cache_key(url, params, self.token) if self.cache is not None else None
+        cached = self.cache.get(key) if key else None
+        headers = self.headers
+        if cached:
+            headers = dict(self.headers)
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            elif cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        
+        wait = github_ratelimit.delay(self.token, 'core', self.priority)
+        if wait is None:
+            counters.incr('github_ratelimit_deferred')
+            return (cached['data'], cached.get('next')) if cached else (None, None)
+        if wait:
+            counters.incr('github_ratelimit_throttled')
+            time.sleep(wait)
+        
+        started = time.perf_counter()
+        response = None
         try:
-            url = f"{self.BASE_URL}/{endpoint}"
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
+            response = self.session.get(url, headers=headers, params=params, timeout=timeout)
+            if github_ratelimit.record(response, self.token, 'core'):
+                logger.warning("GitHub API rate limited: %s", endpoint)
+                counters.incr('github_ratelimit_rejected')
+                return (cached['data'], cached.get('next')) if cached else (None, None)
+            if response.status_code == 304 and cached:
+                return cached['data'], cached.get('next')
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"GitHub API error: {e}")
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning("GitHub API error: %s", e)
+            return None, None
+        finally:
+            github_trace.record('GET', url, started, response, self.base_url)
+        
+        if transform is not None and data:
+            data = transform(data)
+        next_url = response.links.get('next', {}).get('url')
+        
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if key and (etag or last_modified):
+            self.cache.set(key, {'etag': etag, 'last_modified': last_modified, 'data': data, 'next': next_url})
+        
+        return data, next_url
+    
+    def _paginate(self, endpoint: str, params: Dict, transform: Callable,
+                  stop: Optional[Callable[[Dict], bool]] = None,
+                  limit: Optional[int] = None, strict: bool = False) -> Iterator[Dict]:
+        """
+        Yield trimmed items page by page, following the Link header
+        
+        Only one page is held in memory at a time. Iteration ends at the
+        last page, after ``limit`` items, at the first item for which
+        ``stop(item)`` is true (that item is not yielded), or when a page
+        cannot be fetched - which raises GitHubAPIError if ``strict``.
+        """
+        if limit is not None and limit <= 0:
+            return
+        # Small limits fetch a single right-sized page (and share its cache entry)
+        params = dict(params, per_page=min(limit, MAX_PER_PAGE) if limit else MAX_PER_PAGE)
+        
+        count = 0
+        next_url = endpoint
+        while next_url:
+            url = next_url
+            page, next_url = self._get_page(url, params, transform=transform)
+            if page is None and strict:
+                raise GitHubAPIError(f"Could not fetch {url}")
+            # The next URL carries every query parameter itself
+            params = None
+            for item in page or []:
+                if stop is not None and stop(item):
+                    return
+                yield item
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+    
+    def _peek(self, endpoint: str, params: Optional[Dict] = None):
+        """Return the last cached result for a request without calling GitHub"""
+        if self.cache is None:
             return None
+        cached = self.cache.get(cache_key(f"{self.base_url}/{endpoint}", params, self.token))
+        return cached['data'] if cached else None
     
-    def fetch_pull_requests(self, repo_name: str, state: str = "open") -> List[Dict]:
+    def cached_pull_requests(self, repo_name: str, state: str = "open") -> Optional[List[Dict]]:
         """
-        Fetch pull requests for a repository
+        Last known pull requests for a repository from the response cache
+        
+        Returns:
+            List of pull request dictionaries, or None if never fetched
+        """
+        if not repo_name:
+            return None
+        return self._peek(f"repos/{repo_name}/pulls", {"state": state, "per_page": 10})
+    
+    def cached_commits(self, repo_name: str, limit: int = 10) -> Optional[List[Dict]]:
+        """Last known result of fetch_commits(repo_name, limit), or None"""
+        if not repo_name:
+            return None
+        return self._peek(f"repos/{repo_name}/commits", {"per_page": min(limit, MAX_PER_PAGE)})
+    
+    def cached_issues(self, repo_name: str, state: str = "open", limit: int = 10) -> Optional[List[Dict]]:
+        """Last known result of fetch_issues(repo_name, state, limit), or None"""
+        if not repo_name:
+            return None
+        return self._peek(f"repos/{repo_name}/issues", {"state": state, "per_page": min(limit, MAX_PER_PAGE)})
+    
+    def cached_repo_info(self, repo_name: str) -> Optional[Dict]:
+        """Last known result of fetch_repo_info(repo_name), or None"""
+        if not repo_name:
+            return None
+        return self._peek(f"repos/{repo_name}")
+    
+    def iter_pull_requests(self, repo_name: str, state: str = "open", sort: Optional[str] = None,
+                           stop: Optional[Callable[[Dict], bool]] = None,
+                           limit: Optional[int] = None, strict: bool = False) -> Iterator[Dict]:
+        """
+        Stream every pull request of a repository, 100 per call
         
         Args:
             repo_name: Repository in format 'owner/repo'
             state: PR state - 'open', 'closed', or 'all'
+            sort: 'created', 'updated', 'popularity' or 'long-running',
+                newest first; GitHub's default order when omitted
+            stop: Called with each PR; iteration ends at the first one for
+                which it returns True, e.g. ``lambda pr: pr['updated_at'] < cursor``
+                together with ``sort='updated'``
+            limit: Maximum number of PRs to yield
+            strict: Raise GitHubAPIError when a page cannot be fetched
+                instead of ending early (for callers that need every item)
         
-        Returns:
-            List of pull request dictionaries
+        Yields:
+            Pull request dictionaries
         """
         if not repo_name:
-            return []
-        
-        endpoint = f"repos/{repo_name}/pulls"
-        params = {"state": state, "per_page": 10}
-        data = self._get(endpoint, params)
+            return iter(())
         
-        if not data:
-            return []
+        params = {"state": state}
+        if sort:
+            params.update(sort=sort, direction="desc")
+        return self._paginate(f"repos/{repo_name}/pulls", params, _trim_pull_requests, stop, limit, strict)
+    
+    def iter_commits(self, repo_name: str, stop: Optional[Callable[[Dict], bool]] = None,
+                     limit: Optional[int] = None, strict: bool = False) -> Iterator[Dict]:
+        """
+        Stream the default branch history, newest first, 100 per call
         
-        # Extract relevant PR information
-        prs = []
-        for pr in data:
-            prs.append({
-                'number': pr.get('number'),
-                'title': pr.get('title'),
-                'state': pr.get('state'),
-                'user': pr.get('user', {}).get('login'),
-                'created_at': pr.get('created_at'),
-                'updated_at': pr.get('updated_at'),
-                'html_url': pr.get('html_url'),
-                'draft': pr.get('draft', False),
-            })
+        Args:
+            repo_name: Repository in format 'owner/repo'
+            stop: Called with each commit; iteration ends at the first one
+                for which it returns True
+            limit: Maximum number of commits to yield
+            strict: Raise GitHubAPIError when a page cannot be fetched
         
-        return prs
+        Yields:
+            Commit dictionaries
+        """
+        if not repo_name:
+            return iter(())
+        return self._paginate(f"repos/{repo_name}/commits", {}, _trim_commits, stop, limit, strict)
     
-    def fetch_commits(self, repo_name: str, limit: int = 10) -> List[Dict]:
+    def iter_issues(self, repo_name: str, state: str = "open", sort: Optional[str] = None,
+                    stop: Optional[Callable[[Dict], bool]] = None,
+                    limit: Optional[int] = None, strict: bool = False) -> Iterator[Dict]:
         """
-        Fetch recent commits for a repository
+        Stream every issue of a repository (pull requests excluded), 100 per call
         
         Args:
             repo_name: Repository in format 'owner/repo'
-            limit: Number of commits to fetch (default: 10)
+            state: Issue state - 'open', 'closed', or 'all'
+            sort: 'created', 'updated' or 'comments', newest first;
+                GitHub's default order when omitted
+            stop: Called with each issue; iteration ends at the first one
+                for which it returns True
+            limit: Maximum number of issues to yield
+            strict: Raise GitHubAPIError when a page cannot be fetched
         
-        Returns:
-            List of commit dictionaries
+        Yields:
+            Issue dictionaries
         """
         if not repo_name:
-            return []
+            return iter(())
         
-        endpoint = f"repos/{repo_name}/commits"
-        params = {"per_page": limit}
-        data = self._get(endpoint, params)
+        params = {"state": state}
+        if sort:
+            params.update(sort=sort, direction="desc")
+        return self._paginate(f"repos/{repo_name}/issues", params, _trim_issues, stop, limit, strict)
+    
+    def fetch_pull_requests(self, repo_name: str, state: str = "open", limit: int = 10,
+                            strict: bool = False) -> List[Dict]:
+        """
+        Fetch pull requests for a repository
         
-        if not data:
-            return []
+        Args:
+            repo_name: Repository in format 'owner/repo'
+            state: PR state - 'open', 'closed', or 'all'
+            limit: Number of PRs to fetch (default: 10)
+            strict: Raise GitHubAPIError when GitHub cannot answer, rather
+                than return what was read (an empty list on an outage)
+        
+        Returns:
+            List of pull request dictionaries
+        """
+        return list(self.iter_pull_requests(repo_name, state=state, limit=limit, strict=strict))
+    
+    def fetch_commits(self, repo_name: str, limit: int = 10,
+                      strict: bool = False) -> List[Dict]:
+        """
+        Fetch recent commits for a repository
         
-        # Extract relevant commit information
-        commits = []
-        for commit in data:
-            commits.append({
-                'sha': commit.get('sha', '')[:7],  # Short SHA
-                'message': commit.get('commit', {}).get('message', '').split('\n')[0],  # First line only
-                'author': commit.get('commit', {}).get('author', {}).get('name'),
-                'date': commit.get('commit', {}).get('author', {}).get('date'),
-                'html_url': commit.get('html_url'),
-            })
+        Args:
+            repo_name: Repository in format 'owner/repo'
+            limit: Number of commits to fetch (default: 10)
+            strict: Raise GitHubAPIError when GitHub cannot answer, rather
+                than return what was read (an empty list on an outage)
         
-        return commits
+        Returns:
+            List of commit dictionaries
+        """
+        return list(self.iter_commits(repo_name, limit=limit, strict=strict))
     
-    def fetch_issues(self, repo_name: str, state: str = "open") -> List[Dict]:
+    def fetch_issues(self, repo_name: str, state: str = "open", limit: int = 10,
+                     strict: bool = False) -> List[Dict]:
         """
         Fetch issues for a repository
         
         Args:
             repo_name: Repository in format 'owner/repo'
             state: Issue state - 'open', 'closed', or 'all'
+            limit: Number of issues to fetch (default: 10)
+            strict: Raise GitHubAPIError when GitHub cannot answer, rather
+                than return what was read (an empty list on an outage)
         
         Returns:
             List of issue dictionaries
         """
-        if not repo_name:
-            return []
-        
-        endpoint = f"repos/{repo_name}/issues"
-        params = {"state": state, "per_page": 10}
-        data = self._get(endpoint, params)
-        
-        if not data:
-            return []
-        
-        # Extract relevant issue information (filter out PRs)
-        issues = []
-        for issue in data:
-            # Skip pull requests (they appear in issues endpoint too)
-            if 'pull_request' in issue:
-                continue
-            
-            issues.append({
-                'number': issue.get('number'),
-                'title': issue.get('title'),
-                'state': issue.get('state'),
-                'user': issue.get('user', {}).get('login'),
-                'created_at': issue.get('created_at'),
-                'updated_at': issue.get('updated_at'),
-                'html_url': issue.get('html_url'),
-                'labels': [label.get('name') for label in issue.get('labels', [])],
-            })
-        
-        return issues
+        return list(self.iter_issues(repo_name, state=state, limit=limit, strict=strict))
     
     def fetch_repo_info(self, repo_name: str) -> Optional[Dict]:
         """
@@ -156,18 +503,4 @@ class GitHubClient:
             return None
         
         endpoint = f"repos/{repo_name}"
-        data = self._get(endpoint)
-        
-        if not data:
-            return None
-        
-        return {
-            'name': data.get('name'),
-            'full_name': data.get('full_name'),
-            'description': data.get('description'),
-            'html_url': data.get('html_url'),
-            'stars': data.get('stargazers_count'),
-            'forks': data.get('forks_count'),
-            'open_issues': data.get('open_issues_count'),
-            'default_branch': data.get('default_branch'),
-        }
+        return self._get(endpoint, transform=_trim_repo_info) or None
@@ -0,0 +1,381 @@
+"""
+GitHub data access for views and the status engine.
+
+Serves repositories from the local mirror once they have been
+backfilled (settings.GITHUB_USE_MIRROR), and falls back to live API
+calls - GraphQL when a token is configured, REST otherwise - for
+repositories the mirror does not cover yet. Live results are kept in
+main.repo_cache and served from there, stale ones while a background
+refresh replaces them.
+The a-prefixed functions are the async counterparts used by async views.
+"""
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import github_async, github_mirror, repo_cache
+from .github_async import AsyncGitHubClient
+from .github_client import GitHubAPIError, GitHubClient, fan_out
+from .github_graphql import GitHubGraphQLClient
+
+logger = logging.getLogger(__name__)
+
+
+def _mirrored(repo_names) -> Dict[str, object]:
+    """Map each backfilled repository to its freshness timestamp"""
+    if not getattr(settings, 'GITHUB_USE_MIRROR', True):
+        return {}
+    return github_mirror.backfilled(repo_names)
+
+
+def _activity_keys(repo_name: str, commit_limit: int, issue_limit: int) -> List[repo_cache.Key]:
+    """repo_cache keys of repo_activity sections and repository info; each key's kind names its section"""
+    return [
+        repo_cache.Key(repo_name, repo_cache.PULL_REQUESTS, 'open:10'),
+        repo_cache.Key(repo_name, repo_cache.COMMITS, str(commit_limit)),
+        repo_cache.Key(repo_name, repo_cache.ISSUES, f'open:{issue_limit}'),
+        repo_cache.Key(repo_name, repo_cache.REPO),
+    ]
+
+
+def _fetch_sections(repo_name: str, sections, commit_limit: int, issue_limit: int,
+                    timeout: Optional[float] = None) -> Dict:
+    """Fetch some repo_activity sections live; sections GitHub did not return are absent"""
+    github = GitHubClient(timeout=timeout)
+    fetched = {}
+    if 'repo' in sections:
+        repo = github.fetch_repo_info(repo_name)
+        if repo is not None:
+            fetched['repo'] = repo
+    activity = [name for name in sections if name != 'repo']
+    if not activity:
+        return fetched
+
+    graphql = GitHubGraphQLClient(timeout=timeout)
+    if graphql.available:
+        # One GraphQL round-trip instead of three REST calls
+        data = graphql.fetch_repositories(
+            [repo_name],
+            pull_requests=10 if 'pull_requests' in activity else 0,
+            commits=commit_limit if 'commits' in activity else 0,
+            issues=issue_limit if 'issues' in activity else 0,
+        ).get(repo_name, {})
+        fetched.update({name: data[name] for name in activity if name in data})
+    else:
+        # Strict: an outage must not be cached as "no pull requests"
+        calls = {
+            'pull_requests': lambda: github.fetch_pull_requests(repo_name, strict=True),
+            'commits': lambda: github.fetch_commits(repo_name, limit=commit_limit, strict=True),
+            'issues': lambda: github.fetch_issues(repo_name, limit=issue_limit, strict=True),
+        }
+        for name in activity:
+            try:
+                fetched[name] = calls[name]()
+            except GitHubAPIError as e:
+                logger.warning("GitHub %s unavailable for %s: %s", SECTION_LABELS[name], repo_name, e)
+    return fetched
+
+
+def _refresh_sections(repo_name: str, keys: List[repo_cache.Key], commit_limit: int, issue_limit: int):
+    """Background refresh of stale repo_activity sections (runs on the github_async pool)"""
+    started = time.time()
+    try:
+        fetched = _fetch_sections(repo_name, {key.kind for key in keys}, commit_limit, issue_limit)
+        repo_cache.store({key: fetched[key.kind] for key in keys if key.kind in fetched}, started)
+    except Exception as e:
+        logger.warning("GitHub refresh failed for %s: %s", repo_name, e)
+    finally:
+        repo_cache.end_refresh(keys)
+
+
+def _cached_sections(repo_name: str, keys: List[repo_cache.Key], commit_limit: int,
+                     issue_limit: int) -> Dict[repo_cache.Key, Dict]:
+    """
+    Cached entries for repo_activity keys; stale ones are served as they
+    are and refreshed in the background, by one request at a time
+    """
+    hits = repo_cache.lookup(keys)
+    claimed = repo_cache.begin_refresh([key for key, entry in hits.items() if entry['stale']])
+    if claimed:
+        github_async.submit(_refresh_sections, repo_name, claimed, commit_limit, issue_limit)
+    return hits
+
+
+def _freshness(data: Dict, hits: Dict[repo_cache.Key, Dict]):
+    """Record in data how old the cached sections are and whether they are being refreshed"""
+    data['fetched_at'] = repo_cache.oldest(hits.values())
+    data['refreshing'] = any(entry['stale'] for entry in hits.values())
+
+
+def repo_activity(repo_name: str, commit_limit: int = 5,
+                  issue_limit: Optional[int] = 10) -> Tuple[Dict, Optional[object]]:
+    """
+    PRs, recent commits and open issues for one repository
+
+    Cached sections are served at once, stale ones included (see
+    main.repo_cache); data['fetched_at'] is when the oldest of them was
+    fetched and data['refreshing'] whether newer data is on its way.
+
+    Returns:
+        (github_data, synced_at) - synced_at is the mirror freshness
+        timestamp, or None when the data was fetched live
+    """
+    if not repo_name:
+        return {}, None
+
+    mirrored = _mirrored([repo_name])
+    if repo_name in mirrored:
+        data = github_mirror.repo_activity(repo_name, commit_limit=commit_limit, limit=issue_limit)
+        return data, mirrored[repo_name]
+
+    issue_limit = issue_limit or 10
+    keys = _activity_keys(repo_name, commit_limit, issue_limit)[:3]
+    hits = _cached_sections(repo_name, keys, commit_limit, issue_limit)
+    data = {key.kind: entry['data'] for key, entry in hits.items()}
+    _freshness(data, hits)
+    missing = [key for key in keys if key not in hits]
+    if missing:
+        started = time.time()
+        fetched = _fetch_sections(repo_name, {key.kind for key in missing}, commit_limit, issue_limit)
+        repo_cache.store({key: fetched[key.kind] for key in missing if key.kind in fetched}, started)
+        data.update(fetched)
+        # Sections GitHub could not answer for show empty; they are fetched again next time
+        for key in missing:
+            data.setdefault(key.kind, [])
+    return data, None
+
+
+# Page sections as named in repo_activity data, for "served from cache" notes
+SECTION_LABELS = {
+    'pull_requests': 'pull requests',
+    'commits': 'commits',
+    'issues': 'issues',
+    'repo': 'repository info',
+}
+
+
+async def arepo_activity(repo_name: str, commit_limit: int = 5, issue_limit: int = 10,
+                         deadline: Optional[float] = None) -> Tuple[Dict, Optional[object]]:
+    """
+    repo_activity for async views, plus repository info ('repo')
+    
+    Cached sections are served at once as in repo_activity. The others
+    are fetched concurrently under one deadline (default
+    settings.PROJECT_DETAIL_DEADLINE), so a page waits for the slowest
+    call rather than the sum of all of them. Sections that fail or miss
+    the deadline are served from the response cache and named in
+    data['stale'], or left empty and named in data['unavailable'].
+    
+    Returns:
+        (github_data, synced_at) as repo_activity
+    """
+    if not repo_name:
+        return {}, None
+    
+    mirrored = await sync_to_async(_mirrored)([repo_name])
+    if repo_name in mirrored:
+        data = await sync_to_async(github_mirror.repo_activity)(
+            repo_name, commit_limit=commit_limit, limit=issue_limit,
+        )
+        return data, mirrored[repo_name]
+    
+    if deadline is None:
+        deadline = getattr(settings, 'PROJECT_DETAIL_DEADLINE', 5)
+    keys = _activity_keys(repo_name, commit_limit, issue_limit)
+    hits = await github_async.run(_cached_sections, repo_name, keys, commit_limit, issue_limit)
+    data = {key.kind: entry['data'] for key, entry in hits.items()}
+    _freshness(data, hits)
+    missing = [key.kind for key in keys if key not in hits]
+    
+    github = AsyncGitHubClient(timeout=deadline)
+    graphql = GitHubGraphQLClient(timeout=deadline)
+    calls = {}
+    if 'repo' in missing:
+        calls['repo'] = github.fetch_repo_info(repo_name)
+    graphql_sections = [name for name in missing if name != 'repo']
+    if graphql_sections and await github_async.run(lambda: graphql.available):
+        # One GraphQL round-trip instead of three REST calls
+        calls['graphql'] = github_async.run(
+            graphql.fetch_repositories, [repo_name],
+            pull_requests=10 if 'pull_requests' in missing else 0,
+            commits=commit_limit if 'commits' in missing else 0,
+            issues=issue_limit if 'issues' in missing else 0,
+        )
+    else:
+        # Strict: failed sections are missed (served from the response cache), not cached empty
+        if 'pull_requests' in missing:
+            calls['pull_requests'] = github.fetch_pull_requests(repo_name, strict=True)
+        if 'commits' in missing:
+            calls['commits'] = github.fetch_commits(repo_name, limit=commit_limit, strict=True)
+        if 'issues' in missing:
+            calls['issues'] = github.fetch_issues(repo_name, limit=issue_limit, strict=True)
+    started = time.time()
+    results, missed = await github_async.gather(calls, deadline)
+    
+    fetched = results.pop('graphql', {}).get(repo_name, {})
+    fetched = {name: value for name, value in fetched.items() if name in missing}
+    fetched.update(results)
+    if fetched:
+        await github_async.run(repo_cache.store, {
+            key: fetched[key.kind] for key in keys if fetched.get(key.kind) is not None
+        }, started)
+    data.update(fetched)
+    if 'graphql' in missed:
+        # GraphQL answers are not in the response cache; fall back to what REST last saw
+        missed.remove('graphql')
+        missed += graphql_sections
+    
+    stale = []
+    unavailable = []
+    if missed:
+        client = github.client
+        fallbacks = {
+            'pull_requests': lambda: client.cached_pull_requests(repo_name),
+            'commits': lambda: client.cached_commits(repo_name, limit=commit_limit),
+            'issues': lambda: client.cached_issues(repo_name, limit=issue_limit),
+            'repo': lambda: client.cached_repo_info(repo_name),
+        }
+        cached = await github_async.run(lambda: {name: fallbacks[name]() for name in missed})
+        for name in missed:
+            if cached[name] is None:
+                unavailable.append(SECTION_LABELS[name])
+                data.setdefault(name, None if name == 'repo' else [])
+            else:
+                stale.append(SECTION_LABELS[name])
+                data[name] = cached[name]
+    data['stale'] = stale
+    data['unavailable'] = unavailable
+    return data, None
+
+
+def _fetch_open_pull_requests(live_projects, deadline: Optional[float] = None) -> Tuple[Dict, List]:
+    """Open PRs per project, fetched live; (results, missed) as fan_out"""
+    if not live_projects:
+        return {}, []
+    github = GitHubClient(timeout=deadline)
+    graphql = GitHubGraphQLClient(timeout=deadline)
+    if graphql.available:
+        # Batched GraphQL: one query per chunk of repositories, PRs only
+        data = graphql.fetch_repositories(
+            [project.repo_name for project in live_projects],
+            commits=0, issues=0, deadline=deadline,
+        )
+        results = {p: data[p.repo_name]['pull_requests'] for p in live_projects if p.repo_name in data}
+        missed = [p for p in live_projects if p.repo_name not in data]
+        return results, missed
+    # Strict: a repository GitHub could not answer for is missed, not cached as having no PRs
+    return fan_out(
+        lambda project: github.fetch_pull_requests(project.repo_name, state='open', strict=True),
+        live_projects,
+        deadline=deadline,
+    )
+
+
+def _pull_requests_key(project) -> repo_cache.Key:
+    return repo_cache.Key(project.repo_name, repo_cache.PULL_REQUESTS, 'open:10')
+
+
+def _refresh_pull_requests(projects):
+    """Background refresh of stale open PR lists (runs on the github_async pool)"""
+    started = time.time()
+    keys = [_pull_requests_key(project) for project in projects]
+    try:
+        results, _ = _fetch_open_pull_requests(projects)
+        repo_cache.store({_pull_requests_key(project): prs for project, prs in results.items()}, started)
+    except Exception as e:
+        logger.warning("GitHub refresh failed for %d repositories: %s", len(projects), e)
+    finally:
+        repo_cache.end_refresh(keys)
+
+
+def open_pull_requests(projects, deadline: Optional[float] = None) -> Tuple[List[Dict], List, List, Dict]:
+    """
+    Open PRs across many projects, newest update first
+
+    Mirrored repositories are read in one query and cached ones from
+    repo_cache - stale entries too, refreshed in the background by one
+    request at a time; the rest are fetched concurrently and wait at
+    most ``deadline`` seconds.
+
+    Returns:
+        (pull_requests, stale_projects, unavailable_projects, freshness) -
+        each PR dict carries its 'project', plus 'synced_at' when served
+        from the mirror or 'stale' when served from the response cache
+        after a timeout; freshness holds 'fetched_at' (the oldest cached
+        list, or None) and 'refreshing' (projects being refreshed)
+    """
+    projects = [project for project in projects if project.repo_name]
+    mirrored = _mirrored({project.repo_name for project in projects})
+
+    all_prs = []
+    mirrored_prs = github_mirror.pull_requests(mirrored)
+    live_projects = []
+    for project in projects:
+        if project.repo_name in mirrored:
+            for pr in mirrored_prs[project.repo_name]:
+                all_prs.append(dict(pr, project=project, synced_at=mirrored[project.repo_name]))
+        else:
+            live_projects.append(project)
+
+    # Cached PR lists are served as they are; stale ones are refreshed in the background
+    hits = repo_cache.lookup(_pull_requests_key(project) for project in live_projects)
+    cached = {project: hits[_pull_requests_key(project)] for project in live_projects
+              if _pull_requests_key(project) in hits}
+    refreshing = [project for project, entry in cached.items() if entry['stale']]
+    claimed = set(repo_cache.begin_refresh({_pull_requests_key(project) for project in refreshing}))
+    to_refresh = list({project.repo_name: project for project in refreshing
+                       if _pull_requests_key(project) in claimed}.values())
+    if to_refresh:
+        github_async.submit(_refresh_pull_requests, to_refresh)
+    freshness = {'fetched_at': repo_cache.oldest(cached.values()), 'refreshing': refreshing}
+
+    live_projects = [project for project in live_projects if project not in cached]
+    started = time.time()
+    results, missed = _fetch_open_pull_requests(live_projects, deadline)
+    repo_cache.store({_pull_requests_key(project): prs for project, prs in results.items()}, started)
+
+    for project, entry in cached.items():
+        results[project] = entry['data']
+    for project, prs in results.items():
+        for pr in prs:
+            all_prs.append(dict(pr, project=project))
+
+    # Repositories that missed the deadline fall back to their last known data
+    github = GitHubClient(timeout=deadline)
+    stale_projects = []
+    unavailable_projects = []
+    for project in missed:
+        prs = github.cached_pull_requests(project.repo_name, state='open')
+        if prs is None:
+            unavailable_projects.append(project)
+            continue
+        stale_projects.append(project)
+        for pr in prs:
+            all_prs.append(dict(pr, project=project, stale=True))
+
+    # Sort by updated_at (most recent first)
+    all_prs.sort(key=lambda x: x.get('updated_at') or '', reverse=True)
+    return all_prs, stale_projects, unavailable_projects, freshness
+
+
+def status_inputs(repo_name: str) -> Optional[Dict]:
+    """
+    Prefetched StatusEngine inputs: every open PR and issue plus recent
+    commits from the mirror, or PRs and commits from one GraphQL call.
+    None means the engine should use REST calls itself; an 'issues' value
+    of None means it should stream every open issue over REST.
+    """
+    if repo_name in _mirrored([repo_name]):
+        return github_mirror.repo_activity(repo_name, commit_limit=10, limit=None)
+
+    graphql = GitHubGraphQLClient()
+    if graphql.available:
+        # GraphQL returns only the first page of issues; risk needs all of them
+        data = graphql.fetch_repositories([repo_name], issues=0).get(repo_name)
+        if data is not None:
+            data['issues'] = None
+        return data
+    return None
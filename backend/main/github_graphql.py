@@ -0,0 +1,237 @@
+"""
+GitHub GraphQL batch fetcher for multi-repository pages.
+
+Fetches pull requests, recent commits and open issues for many
+repositories in one aliased query instead of separate REST calls per
+repository and data type. Results use the same dict shapes as
+GitHubClient so callers can switch between the two freely.
+"""
+import json
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+from django.conf import settings
+
+from . import counters, github_ratelimit, github_trace
+from .github_client import fan_out, get_session
+
+logger = logging.getLogger(__name__)
+
+
+# GraphQL states for the REST 'state' argument
+PR_STATES = {
+    'open': '[OPEN]',
+    'closed': '[CLOSED, MERGED]',
+    'all': '[OPEN, CLOSED, MERGED]',
+}
+ISSUE_STATES = {
+    'open': '[OPEN]',
+    'closed': '[CLOSED]',
+    'all': '[OPEN, CLOSED]',
+}
+
+# Labels fetched per issue; part of the per-repository node estimate
+LABELS_PER_ISSUE = 20
+
+
+def _login(node: Optional[Dict]) -> Optional[str]:
+    return (node or {}).get('login')
+
+
+def _trim_pull_request(node: Dict) -> Dict:
+    return {
+        'number': node.get('number'),
+        'title': node.get('title'),
+        'state': 'open' if node.get('state') == 'OPEN' else 'closed',
+        'user': _login(node.get('author')),
+        'created_at': node.get('createdAt'),
+        'updated_at': node.get('updatedAt'),
+        'html_url': node.get('url'),
+        'draft': node.get('isDraft', False),
+    }
+
+
+def _trim_commit(node: Dict) -> Dict:
+    author = node.get('author') or {}
+    return {
+        'sha': node.get('oid', '')[:7],  # Short SHA
+        'message': node.get('messageHeadline', ''),
+        'author': author.get('name'),
+        'date': author.get('date'),
+        'html_url': node.get('url'),
+    }
+
+
+def _trim_issue(node: Dict) -> Dict:
+    return {
+        'number': node.get('number'),
+        'title': node.get('title'),
+        'state': (node.get('state') or '').lower(),
+        'user': _login(node.get('author')),
+        'created_at': node.get('createdAt'),
+        'updated_at': node.get('updatedAt'),
+        'html_url': node.get('url'),
+        'labels': [label.get('name') for label in (node.get('labels') or {}).get('nodes', [])],
+    }
+
+
+class GitHubGraphQLClient:
+    """Batch client for the GitHub GraphQL API"""
+
+    def __init__(self, token: Optional[str] = None, url: Optional[str] = None,
+                 timeout: Optional[float] = None, priority: Optional[str] = None):
+        self.token = token or settings.GITHUB_TOKEN
+        self.url = url or getattr(settings, 'GITHUB_GRAPHQL_URL', 'https://api.github.com/graphql')
+        self.timeout = timeout if timeout is not None else getattr(settings, 'GITHUB_TIMEOUT', 10)
+        self.priority = priority or github_ratelimit.default_priority()
+        self.session = get_session()
+        self.headers = {'Authorization': f'bearer {self.token}'} if self.token else {}
+
+    @property
+    def available(self) -> bool:
+        """
+        GraphQL requires authentication; without a token callers use REST.
+        Callers also use REST, which can serve cached responses, while the
+        GraphQL budget is exhausted.
+        """
+        if not self.token or not getattr(settings, 'GITHUB_USE_GRAPHQL', True):
+            return False
+        if github_ratelimit.delay(self.token, 'graphql', self.priority) is None:
+            counters.incr('github_ratelimit_deferred')
+            return False
+        return True
+
+    @staticmethod
+    def estimate_nodes(pull_requests: int, commits: int, issues: int) -> int:
+        """Worst-case nodes one repository contributes to a query"""
+        return pull_requests + commits + issues * (1 + LABELS_PER_ISSUE)
+
+    def _chunks(self, repo_names: List[str], nodes_per_repo: int) -> List[Tuple[str, ...]]:
+        """Split repositories so each query stays under the node and size limits"""
+        max_nodes = getattr(settings, 'GITHUB_GRAPHQL_MAX_NODES', 10000)
+        batch_size = getattr(settings, 'GITHUB_GRAPHQL_BATCH_SIZE', 25)
+        per_query = max(1, min(batch_size, max_nodes // max(nodes_per_repo, 1)))
+        return [tuple(repo_names[i:i + per_query]) for i in range(0, len(repo_names), per_query)]
+
+    @staticmethod
+    def build_query(repo_names: Iterable[str], state: str = 'open', pull_requests: int = 10,
+                    commits: int = 10, issues: int = 10) -> str:
+        """Build one aliased query covering every repository"""
+        sections = []
+        if pull_requests:
+            sections.append(
+                f'pullRequests(states: {PR_STATES[state]}, first: {pull_requests}, '
+                'orderBy: {field: CREATED_AT, direction: DESC}) '
+                '{ nodes { number title state isDraft createdAt updatedAt url author { login } } }'
+            )
+        if commits:
+            sections.append(
+                'defaultBranchRef { target { ... on Commit { '
+                f'history(first: {commits}) '
+                '{ nodes { oid messageHeadline url author { name date } } } } } }'
+            )
+        if issues:
+            sections.append(
+                f'issues(states: {ISSUE_STATES[state]}, first: {issues}, '
+                'orderBy: {field: CREATED_AT, direction: DESC}) '
+                '{ nodes { number title state createdAt updatedAt url author { login } '
+                f'labels(first: {LABELS_PER_ISSUE}) {{ nodes {{ name }} }} }} }}'
+            )
+        body = ' '.join(sections)
+
+        aliases = []
+        for index, repo_name in enumerate(repo_names):
+            owner, name = repo_name.split('/', 1)
+            aliases.append(f'r{index}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ {body} }}')
+        return 'query { ' + ' '.join(aliases) + ' }'
+
+    def _post(self, query: str) -> Optional[Dict]:
+        """POST a query and return its data, or None on transport errors or rate limits"""
+        wait = github_ratelimit.delay(self.token, 'graphql', self.priority)
+        if wait is None:
+            counters.incr('github_ratelimit_deferred')
+            return None
+        if wait:
+            counters.incr('github_ratelimit_throttled')
+            time.sleep(wait)
+
+        started = time.perf_counter()
+        response = None
+        try:
+            response = self.session.post(self.url, json={'query': query}, headers=self.headers,
+                                         timeout=self.timeout)
+            if github_ratelimit.record(response, self.token, 'graphql'):
+                logger.warning("GitHub GraphQL rate limited")
+                counters.incr('github_ratelimit_rejected')
+                return None
+            response.raise_for_status()
+            payload = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning("GitHub GraphQL error: %s", e)
+            return None
+        finally:
+            github_trace.record('POST', self.url, started, response)
+
+        # Partial errors (e.g. one repository not found) still return data for the rest
+        if payload.get('errors'):
+            logger.warning("GitHub GraphQL error: %s", payload['errors'][0].get('message'))
+        return payload.get('data')
+
+    def _fetch_chunk(self, repo_names: Tuple[str, ...], state: str, pull_requests: int,
+                     commits: int, issues: int) -> Dict[str, Dict]:
+        data = self._post(self.build_query(repo_names, state, pull_requests, commits, issues))
+        if not data:
+            return {}
+
+        results = {}
+        for index, repo_name in enumerate(repo_names):
+            repo = data.get(f'r{index}')
+            if repo is None:
+                continue
+            history = (((repo.get('defaultBranchRef') or {}).get('target') or {}).get('history') or {})
+            results[repo_name] = {
+                'pull_requests': [_trim_pull_request(n) for n in (repo.get('pullRequests') or {}).get('nodes', [])],
+                'commits': [_trim_commit(n) for n in history.get('nodes', [])],
+                'issues': [_trim_issue(n) for n in (repo.get('issues') or {}).get('nodes', [])],
+            }
+        return results
+
+    def fetch_repositories(self, repo_names: Iterable[str], state: str = 'open', pull_requests: int = 10,
+                           commits: int = 10, issues: int = 10,
+                           deadline: Optional[float] = None) -> Dict[str, Dict]:
+        """
+        Fetch PRs, recent commits and issues for many repositories
+
+        Args:
+            repo_names: Repositories in format 'owner/repo'
+            state: 'open', 'closed' or 'all' for PRs and issues
+            pull_requests: PRs per repository (0 skips them)
+            commits: Commits per repository (0 skips them)
+            issues: Issues per repository (0 skips them)
+            deadline: Seconds to wait for all chunks; chunks run concurrently
+
+        Returns:
+            Dict mapping repo_name to {'pull_requests', 'commits', 'issues'}
+            lists shaped like GitHubClient results. Repositories that were
+            not found or missed the deadline are absent.
+        """
+        repo_names = sorted({name for name in repo_names if name and '/' in name})
+        if not repo_names:
+            return {}
+
+        nodes_per_repo = self.estimate_nodes(pull_requests, commits, issues)
+        chunks = self._chunks(repo_names, nodes_per_repo)
+        if len(chunks) == 1:
+            return self._fetch_chunk(chunks[0], state, pull_requests, commits, issues)
+
+        results, _ = fan_out(
+            lambda chunk: self._fetch_chunk(chunk, state, pull_requests, commits, issues),
+            chunks,
+            deadline=deadline,
+        )
+        merged = {}
+        for chunk_results in results.values():
+            merged.update(chunk_results)
+        return merged
@@ -0,0 +1,207 @@
+"""
+Local mirror of GitHub pull requests, commits and issues.
+
+Webhook events and the backfill_github command write here; views and
+StatusEngine read from here so rendering a page needs no GitHub calls.
+Reads return the same dict shapes as GitHubClient. Rows are keyed by
+the lowercased repository name (GitHub names are case-insensitive), so
+webhooks, backfills and page reads meet on the same rows whatever case
+each of them spells the name in.
+"""
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import GitHubCommit, GitHubIssue, GitHubPullRequest, RepoSync
+
+
+def _parse(value):
+    return parse_datetime(value) if value else None
+
+
+def _isoformat(value):
+    return value.isoformat().replace('+00:00', 'Z') if value else None
+
+
+def _key(repo_name: str) -> str:
+    return repo_name.lower()
+
+
+def touch(repo_name: str, backfilled: bool = False):
+    """Record a mirror write for the repository's freshness timestamp"""
+    now = timezone.now()
+    defaults = {'synced_at': now}
+    if backfilled:
+        defaults['backfilled_at'] = now
+    RepoSync.objects.update_or_create(repo_name=_key(repo_name), defaults=defaults)
+
+
+def is_mirrored(repo_name: str) -> bool:
+    """A repository is served from the mirror once it has been backfilled"""
+    return RepoSync.objects.filter(repo_name=_key(repo_name), backfilled_at__isnull=False).exists()
+
+
+def backfilled(repo_names: Iterable[str]) -> Dict[str, object]:
+    """Map each backfilled repository, as the caller spells it, to its freshness timestamp"""
+    names = {_key(name): name for name in repo_names}
+    rows = RepoSync.objects.filter(repo_name__in=list(names), backfilled_at__isnull=False)
+    return {names[key]: synced for key, synced in rows.values_list('repo_name', 'synced_at')}
+
+
+def synced_at(repo_name: str):
+    """When the mirror for this repository was last written, or None"""
+    return RepoSync.objects.filter(repo_name=_key(repo_name)).values_list('synced_at', flat=True).first()
+
+
+# Writes. Each takes a dict shaped like the GitHubClient results.
+
+def save_pull_request(repo_name: str, pr: Dict):
+    GitHubPullRequest.objects.update_or_create(
+        repo_name=_key(repo_name),
+        number=pr['number'],
+        defaults={
+            'title': (pr.get('title') or '')[:500],
+            'state': pr.get('state') or 'open',
+            'user': pr.get('user') or '',
+            'draft': bool(pr.get('draft')),
+            'html_url': pr.get('html_url') or '',
+            'created_at': _parse(pr.get('created_at')),
+            'updated_at': _parse(pr.get('updated_at')),
+        },
+    )
+
+
+def save_issue(repo_name: str, issue: Dict):
+    GitHubIssue.objects.update_or_create(
+        repo_name=_key(repo_name),
+        number=issue['number'],
+        defaults={
+            'title': (issue.get('title') or '')[:500],
+            'state': issue.get('state') or 'open',
+            'user': issue.get('user') or '',
+            'labels': issue.get('labels') or [],
+            'html_url': issue.get('html_url') or '',
+            'created_at': _parse(issue.get('created_at')),
+            'updated_at': _parse(issue.get('updated_at')),
+        },
+    )
+
+
+def save_commit(repo_name: str, commit: Dict):
+    GitHubCommit.objects.update_or_create(
+        repo_name=_key(repo_name),
+        sha=commit['sha'],
+        defaults={
+            'message': (commit.get('message') or '')[:500],
+            'author': commit.get('author') or '',
+            'date': _parse(commit.get('date')),
+            'html_url': commit.get('html_url') or '',
+        },
+    )
+
+
+def delete_issue(repo_name: str, number: int):
+    GitHubIssue.objects.filter(repo_name=_key(repo_name), number=number).delete()
+
+
+@transaction.atomic
+def replace_open_items(repo_name: str, pull_requests: Iterable[Dict], issues: Iterable[Dict],
+                       commits: Iterable[Dict]):
+    """
+    Store a full snapshot from the API.
+
+    Open PRs and issues missing from the snapshot were closed while no
+    webhook reached us, so they are marked closed.
+    """
+    pr_numbers = []
+    for pr in pull_requests:
+        save_pull_request(repo_name, pr)
+        pr_numbers.append(pr['number'])
+    GitHubPullRequest.objects.filter(repo_name=_key(repo_name), state='open').exclude(
+        number__in=pr_numbers).update(state='closed')
+
+    issue_numbers = []
+    for issue in issues:
+        save_issue(repo_name, issue)
+        issue_numbers.append(issue['number'])
+    GitHubIssue.objects.filter(repo_name=_key(repo_name), state='open').exclude(
+        number__in=issue_numbers).update(state='closed')
+
+    for commit in commits:
+        save_commit(repo_name, commit)
+
+    touch(repo_name, backfilled=True)
+
+
+# Reads, shaped like GitHubClient results
+
+def _pull_request_dict(pr: GitHubPullRequest) -> Dict:
+    return {
+        'number': pr.number,
+        'title': pr.title,
+        'state': pr.state,
+        'user': pr.user,
+        'created_at': _isoformat(pr.created_at),
+        'updated_at': _isoformat(pr.updated_at),
+        'html_url': pr.html_url,
+        'draft': pr.draft,
+    }
+
+
+def _issue_dict(issue: GitHubIssue) -> Dict:
+    return {
+        'number': issue.number,
+        'title': issue.title,
+        'state': issue.state,
+        'user': issue.user,
+        'created_at': _isoformat(issue.created_at),
+        'updated_at': _isoformat(issue.updated_at),
+        'html_url': issue.html_url,
+        'labels': issue.labels,
+    }
+
+
+def _commit_dict(commit: GitHubCommit) -> Dict:
+    return {
+        'sha': commit.sha,
+        'message': commit.message,
+        'author': commit.author,
+        'date': _isoformat(commit.date),
+        'html_url': commit.html_url,
+    }
+
+
+def pull_requests(repo_names: Iterable[str], state: str = 'open',
+                  limit: Optional[int] = None) -> Dict[str, List[Dict]]:
+    """Mirrored PRs for several repositories in one query"""
+    names = {_key(name): name for name in repo_names}
+    results = {name: [] for name in names.values()}
+    queryset = GitHubPullRequest.objects.filter(repo_name__in=list(names), state=state)
+    for pr in queryset.order_by('repo_name', '-number'):
+        prs = results[names[pr.repo_name]]
+        if limit is None or len(prs) < limit:
+            prs.append(_pull_request_dict(pr))
+    return results
+
+
+def issues(repo_name: str, state: str = 'open', limit: Optional[int] = None) -> List[Dict]:
+    queryset = GitHubIssue.objects.filter(repo_name=_key(repo_name), state=state).order_by('-number')
+    if limit is not None:
+        queryset = queryset[:limit]
+    return [_issue_dict(issue) for issue in queryset]
+
+
+def commits(repo_name: str, limit: int = 10) -> List[Dict]:
+    queryset = GitHubCommit.objects.filter(repo_name=_key(repo_name)).order_by('-date')[:limit]
+    return [_commit_dict(commit) for commit in queryset]
+
+
+def repo_activity(repo_name: str, commit_limit: int = 10, limit: Optional[int] = 10) -> Dict:
+    """PRs, commits and issues for one repository, like the GraphQL fetcher"""
+    return {
+        'pull_requests': pull_requests([repo_name], limit=limit)[repo_name],
+        'commits': commits(repo_name, limit=commit_limit),
+        'issues': issues(repo_name, limit=limit),
+    }
@@ -0,0 +1,165 @@
+"""
+GitHub rate-limit budget shared by every process.
+
+Each GitHub response reports the remaining budget of its token in
+X-RateLimit-Remaining / X-RateLimit-Reset, and secondary limits answer
+with Retry-After. The latest values are kept in the Django cache
+(GITHUB_RATELIMIT_CACHE_ALIAS) so gunicorn workers and background
+commands all see the same budget.
+
+Callers have a priority. Interactive page fetches may spend the whole
+budget; background work (webhook worker, backfill) leaves
+GITHUB_RATELIMIT_RESERVE of it untouched and is paced once less than
+GITHUB_RATELIMIT_THROTTLE_AT remains. When a call would fail, clients
+serve their cached data instead of calling GitHub.
+"""
+import hashlib
+import time
+from typing import Dict, Optional
+
+from django.conf import settings
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+
+# Statuses GitHub uses for primary and secondary rate limits
+LIMITED_STATUS_CODES = (403, 429)
+
+# Resources reported as gauges
+RESOURCES = ('core', 'graphql')
+
+_default_priority = INTERACTIVE
+
+
+def set_default_priority(priority: str):
+    """Set the priority of clients created without one (background commands call this)"""
+    global _default_priority
+    _default_priority = priority
+
+
+def default_priority() -> str:
+    return _default_priority
+
+
+def _cache():
+    from django.core.cache import caches
+    return caches[getattr(settings, 'GITHUB_RATELIMIT_CACHE_ALIAS', 'default')]
+
+
+def _key(token: str, resource: str) -> str:
+    # Budgets are per token; never store the token itself
+    return f"github:ratelimit:{hashlib.sha1((token or '').encode()).hexdigest()[:16]}:{resource}"
+
+
+def _int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def state(token: str, resource: str = 'core') -> Optional[Dict]:
+    """
+    Last known budget for a token and resource
+
+    Returns:
+        Dict with 'limit', 'remaining', 'reset' and 'blocked_until' (epoch
+        seconds), or None before the first response was seen
+    """
+    try:
+        return _cache().get(_key(token, resource))
+    except Exception:
+        # A cache outage must not take GitHub access down with it
+        return None
+
+
+def record(response, token: str, resource: Optional[str] = None) -> bool:
+    """
+    Store the budget reported by a GitHub response
+
+    Returns:
+        True if the response was rejected by a primary or secondary rate limit
+    """
+    headers = response.headers
+    resource = headers.get('X-RateLimit-Resource') or resource or 'core'
+    remaining = _int(headers.get('X-RateLimit-Remaining'))
+    retry_after = _int(headers.get('Retry-After'))
+    if remaining is None and retry_after is None:
+        return False
+
+    now = time.time()
+    current = state(token, resource) or {}
+    new_state = {
+        'limit': _int(headers.get('X-RateLimit-Limit')) or current.get('limit'),
+        'remaining': remaining if remaining is not None else current.get('remaining'),
+        'reset': _int(headers.get('X-RateLimit-Reset')) or current.get('reset') or now,
+        'blocked_until': current.get('blocked_until', 0),
+    }
+
+    limited = False
+    if response.status_code in LIMITED_STATUS_CODES:
+        if retry_after is not None:
+            # Secondary limit: back off for as long as GitHub asks
+            new_state['blocked_until'] = now + retry_after
+            limited = True
+        elif remaining == 0:
+            new_state['blocked_until'] = new_state['reset']
+            limited = True
+
+    timeout = max(new_state['reset'], new_state['blocked_until']) - now + 60
+    try:
+        _cache().set(_key(token, resource), new_state, max(int(timeout), 60))
+    except Exception:
+        pass
+    return limited
+
+
+def delay(token: str, resource: str = 'core', priority: Optional[str] = None) -> Optional[float]:
+    """
+    How long a caller should wait before its next call
+
+    Returns:
+        0 to call now, seconds to sleep first (background pacing), or None
+        if the call should not be made and cached data served instead
+    """
+    current = state(token, resource)
+    if not current:
+        return 0
+
+    now = time.time()
+    if current.get('blocked_until', 0) > now:
+        return None
+    remaining = current.get('remaining')
+    if remaining is None or current['reset'] <= now:
+        # Window has reset (or was never reported); the budget is back
+        return 0
+
+    if (priority or _default_priority) == INTERACTIVE:
+        return 0 if remaining > 0 else None
+
+    limit = current.get('limit') or remaining
+    spare = remaining - limit * getattr(settings, 'GITHUB_RATELIMIT_RESERVE', 0.2)
+    if spare <= 0:
+        return None
+    if remaining >= limit * getattr(settings, 'GITHUB_RATELIMIT_THROTTLE_AT', 0.5):
+        return 0
+    # Spread the spare budget evenly over what is left of the window
+    pace = (current['reset'] - now) / spare
+    return min(pace, getattr(settings, 'GITHUB_RATELIMIT_MAX_DELAY', 30))
+
+
+def gauges(token: Optional[str] = None) -> Dict[str, float]:
+    """Budget gauges for monitoring, for the configured token by default"""
+    token = settings.GITHUB_TOKEN if token is None else token
+    now = time.time()
+    values = {}
+    for resource in RESOURCES:
+        current = state(token, resource)
+        if not current:
+            continue
+        prefix = f'github_ratelimit_{resource}'
+        values[f'{prefix}_limit'] = current.get('limit') or 0
+        values[f'{prefix}_remaining'] = current.get('remaining') or 0
+        values[f'{prefix}_reset_seconds'] = max(0, round(current['reset'] - now))
+        values[f'{prefix}_blocked_seconds'] = max(0, round(current.get('blocked_until', 0) - now))
+    return values
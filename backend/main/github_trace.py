@@ -0,0 +1,168 @@
+"""
+Tracing of outbound GitHub calls, grouped by the request or webhook
+delivery that made them.
+
+GitHubClient and GitHubGraphQLClient call record() once per HTTP call.
+Each call is noted with:
+- the endpoint template (repos/{owner}/{repo}/pulls), so different
+  repositories share a label;
+- the status, response bytes and latency;
+- whether a 304 let the response cache answer;
+- the remaining rate-limit budget GitHub reported.
+
+Calls are collected by the innermost scope(): one per request
+(GitHubTraceMiddleware) and one per webhook delivery
+(webhook_queue.process_delivery). fan_out() and the github_async pool
+copy the caller's context into their threads, so concurrent calls still
+land in the page that asked for them. Background refreshes get a scope
+of their own.
+
+Each call is logged at DEBUG and each scope's summary at INFO, as
+key=value pairs on the main.github_trace logger. Every call also counts
+towards github_requests_total and the github_request_duration_seconds
+histogram on /metrics.
+"""
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+from . import counters, metrics
+
+logger = logging.getLogger(__name__)
+
+_NUMBER = re.compile(r'^\d+$')
+
+
+class Call(NamedTuple):
+    """One outbound HTTP call"""
+    method: str
+    endpoint: str
+    status: Optional[int]
+    bytes: int
+    seconds: float
+    not_modified: bool
+    remaining: Optional[int]
+
+
+class Trace:
+    """The GitHub calls of one request, delivery or background job"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.calls: List[Call] = []
+        self._lock = threading.Lock()
+
+    def add(self, call: Call):
+        with self._lock:
+            self.calls.append(call)
+
+    @property
+    def seconds(self) -> float:
+        """Time spent in calls, summed (concurrent calls overlap, so this can exceed wall time)"""
+        return sum(call.seconds for call in self.calls)
+
+    def header(self) -> str:
+        """Value for X-GitHub-Calls: '<calls>; <summed latency>ms'"""
+        return f'{len(self.calls)}; {round(self.seconds * 1000)}ms'
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar('github_trace', default=None)
+
+
+def current() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def scope(label: str) -> Iterator[Trace]:
+    """Collect the GitHub calls made inside the block, then log their summary"""
+    trace = Trace(label)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        summarize(trace)
+
+
+def summarize(trace: Trace):
+    calls = list(trace.calls)
+    if not calls:
+        return
+    errors = sum(1 for call in calls if call.status is None or call.status >= 400)
+    not_modified = sum(1 for call in calls if call.not_modified)
+    remaining = [call.remaining for call in calls if call.remaining is not None]
+    logger.info(
+        'github_calls scope="%s" calls=%d ms=%d bytes=%d not_modified=%d errors=%d remaining=%s',
+        trace.label, len(calls), round(trace.seconds * 1000), sum(call.bytes for call in calls),
+        not_modified, errors, min(remaining) if remaining else '',
+        extra={'github_scope': trace.label, 'github_calls': [call._asdict() for call in calls]},
+    )
+
+
+def endpoint_template(url: str, base_url: str = '') -> str:
+    """
+    The path of a GitHub URL with its variable parts replaced
+
+    repos/octo/app/pulls -> repos/{owner}/{repo}/pulls,
+    repositories/123/pulls -> repositories/{n}/pulls
+    """
+    path = urlsplit(url).path
+    base_path = urlsplit(base_url).path.rstrip('/')
+    if base_path and path.startswith(base_path):
+        path = path[len(base_path):]
+    segments = [segment for segment in path.split('/') if segment]
+    if len(segments) >= 3 and segments[0] == 'repos':
+        segments[1:3] = ['{owner}', '{repo}']
+    return '/'.join('{n}' if _NUMBER.match(segment) else segment for segment in segments)
+
+
+def record(method: str, url: str, started: float, response=None, base_url: str = ''):
+    """
+    Note one finished call in the current scope, the log and the metrics
+
+    Args:
+        method: HTTP method
+        url: Requested URL
+        started: time.perf_counter() before the call
+        response: The requests response, or None if the call failed
+            without one (connection error, timeout)
+        base_url: API root, stripped from the endpoint template
+    """
+    seconds = time.perf_counter() - started
+    endpoint = endpoint_template(url, base_url)
+    status = response.status_code if response is not None else None
+    remaining = None
+    size = 0
+    if response is not None:
+        size = len(response.content or b'')
+        try:
+            remaining = int(response.headers.get('X-RateLimit-Remaining'))
+        except (TypeError, ValueError):
+            pass
+    call = Call(method, endpoint, status, size, seconds, status == 304, remaining)
+
+    trace = _current.get()
+    if trace is not None:
+        trace.add(call)
+    logger.debug(
+        'github_call scope="%s" method=%s endpoint=%s status=%s bytes=%d ms=%d not_modified=%s remaining=%s',
+        trace.label if trace else '', method, endpoint, status if status is not None else 'error', size,
+        round(seconds * 1000), call.not_modified, remaining if remaining is not None else '',
+    )
+
+    labels = f'endpoint="{endpoint}"'
+    amounts = {f'github_requests_total{{{labels},status="{status or "error"}"}}': 1}
+    metrics.observe(amounts, 'github_request_duration_seconds', labels, seconds)
+    counters.incr_many(amounts)
+
+
+def traced(label: str, func, *args, **kwargs):
+    """Call func in a scope of its own (background jobs started by a request)"""
+    with scope(label):
+        return func(*args, **kwargs)
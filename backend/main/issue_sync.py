@@ -0,0 +1,133 @@
+"""
+GitHub issue to Task synchronisation.
+
+Tasks are linked to their issue by Task.github_issue_number, unique per
+project, so webhook events are point updates and reconcile() can sync
+a whole repository in batches.
+"""
+from itertools import islice
+from typing import Dict, Iterable, List, Tuple
+
+from django.utils import timezone
+
+from . import live
+from .models import Task
+
+# Labels are matched case-insensitively
+URGENT_LABELS = ('critical', 'urgent')
+
+
+def task_priority(labels: Iterable[str]) -> str:
+    """Task priority for an issue's labels"""
+    labels = [label.lower() for label in labels if label]
+    if any(label in URGENT_LABELS for label in labels):
+        return 'URGENT'
+    if 'high' in labels:
+        return 'HIGH'
+    if 'low' in labels:
+        return 'LOW'
+    return 'MEDIUM'
+
+
+def task_title(number: int, title: str) -> str:
+    return f"GH Issue #{number}: {title or ''}"[:200]
+
+
+def open_task(project, number: int, title: str, body: str, labels: Iterable[str]):
+    """Create the task for a newly opened issue (a redelivered event is a no-op)"""
+    Task.objects.get_or_create(
+        project=project,
+        github_issue_number=number,
+        defaults={
+            'title': task_title(number, title),
+            'description': body[:500] if body else '',  # Limit description
+            'status': 'TODO',
+            'priority': task_priority(labels),
+        },
+    )
+
+
+def set_task_status(project, number: int, status: str) -> int:
+    """Point update of the task linked to an issue"""
+    task_id = Task.objects.filter(project=project, github_issue_number=number).values_list('id', flat=True).first()
+    if task_id is None:
+        return 0
+    # update() sends no post_save, so the open pages are told here
+    updated = Task.objects.filter(id=task_id).update(status=status, updated_at=timezone.now())
+    live.publish(live.TASK, project.id, task_id)
+    return updated
+
+
+def _reconcile_batch(project, issues: List[Dict]) -> Tuple[int, int]:
+    numbers = [issue['number'] for issue in issues]
+    existing = {
+        task.github_issue_number: task
+        for task in Task.objects.filter(project=project, github_issue_number__in=numbers)
+        .only('id', 'github_issue_number', 'title', 'status')
+    }
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for issue in issues:
+        number = issue['number']
+        is_open = issue.get('state') == 'open'
+        task = existing.get(number)
+        if task is None:
+            # Issues closed before syncing was enabled never get a task
+            if is_open:
+                to_create.append(Task(
+                    project=project,
+                    github_issue_number=number,
+                    title=task_title(number, issue.get('title')),
+                    status='TODO',
+                    priority=task_priority(issue.get('labels') or []),
+                ))
+            continue
+
+        title = task_title(number, issue.get('title'))
+        if not is_open:
+            status = 'DONE'
+        elif task.status == 'DONE':
+            status = 'TODO'  # Reopened
+        else:
+            status = task.status  # Keep IN_PROGRESS / BLOCKED set by hand
+        if (title, status) != (task.title, task.status):
+            task.title = title
+            task.status = status
+            task.updated_at = now
+            to_update.append(task)
+
+    # A webhook may create the same task concurrently; the unique constraint settles it
+    Task.objects.bulk_create(to_create, ignore_conflicts=True)
+    Task.objects.bulk_update(to_update, ['title', 'status', 'updated_at'])
+    return len(to_create), len(to_update)
+
+
+def reconcile(project, issues: Iterable[Dict], batch_size: int = 500) -> Dict[str, int]:
+    """
+    Bring a project's tasks in line with its GitHub issues
+
+    Args:
+        project: Project the tasks belong to
+        issues: Issue dicts shaped like GitHubClient results, open and
+            closed (e.g. GitHubClient.iter_issues(repo, state='all')).
+            Consumed lazily, batch_size at a time.
+        batch_size: Issues looked up, created and updated per query
+
+    Returns:
+        Counts of 'issues' seen, tasks 'created' and tasks 'updated'
+    """
+    totals = {'issues': 0, 'created': 0, 'updated': 0}
+    issues = iter(issues)
+    while True:
+        batch = list(islice(issues, batch_size))
+        if not batch:
+            if totals['created'] or totals['updated']:
+                # Bulk writes send no signals; one list refresh covers them all
+                live.publish(live.TASK_LIST, project.id)
+            return totals
+        created, updated = _reconcile_batch(project, batch)
+        totals['issues'] += len(batch)
+        totals['created'] += created
+        totals['updated'] += updated
@@ -0,0 +1,223 @@
+"""
+Live updates for open dashboard and project pages over Server-Sent Events.
+
+Saving a project, task or log entry records a LiveEvent row (main.signals;
+update() and bulk paths call publish() themselves), so changes made by
+any process - page POSTs, the webhook worker, the admin - reach every
+web worker. Each ASGI worker runs one Broadcaster: while browsers are
+connected it reads new events every LIVE_POLL_INTERVAL seconds, renders
+each affected card or row once and hands the same encoded message to
+every connection showing it. A change costs one query and one render
+per worker however many browsers are open; idle connections cost a
+queue each and no database work.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import LiveEvent, Project, Task
+
+logger = logging.getLogger(__name__)
+
+PROJECT = 'PROJECT'
+TASK = 'TASK'
+TASK_LIST = 'TASK_LIST'
+
+# Connection scopes: the dashboard, or a project id for its detail page
+DASHBOARD = None
+
+# Event rows can commit out of created_at order; each poll re-reads this far back
+# and skips the ids it already delivered
+COMMIT_GRACE = timedelta(seconds=5)
+
+# Milliseconds EventSource waits before reconnecting
+RECONNECT_DELAY = 5000
+
+
+def publish(kind: str, project_id: int, object_id: Optional[int] = None):
+    """Record a change for the pages showing it"""
+    if not getattr(settings, 'LIVE_UPDATES', True):
+        return
+    LiveEvent.objects.create(kind=kind, project_id=project_id, object_id=object_id)
+
+
+def prune(retention_minutes: int) -> int:
+    """Delete events every broadcaster has had time to read"""
+    cutoff = timezone.now() - timedelta(minutes=retention_minutes)
+    return LiveEvent.objects.filter(created_at__lt=cutoff).delete()[0]
+
+
+def encode(event: str, html: str) -> bytes:
+    """One SSE message; every line of the payload gets its own data: field"""
+    lines = html.strip().splitlines() or ['']
+    return (f'event: {event}\n' + ''.join(f'data: {line}\n' for line in lines) + '\n').encode('utf-8')
+
+
+def render_messages(events: Iterable[LiveEvent]) -> List[Tuple[Optional[int], bytes]]:
+    """
+    Render the cards and rows a batch of events changed
+
+    Repeated events for the same object are rendered once.
+
+    Returns:
+        (scope, message) pairs; scope is DASHBOARD or a project id
+    """
+    cards = set()
+    statuses = set()
+    lists = set()
+    rows = set()
+    for event in events:
+        # Status, task counts and the last log all show on the dashboard card
+        cards.add(event.project_id)
+        if event.kind == PROJECT:
+            statuses.add(event.project_id)
+        elif event.kind == TASK:
+            rows.add((event.project_id, event.object_id))
+        else:
+            lists.add(event.project_id)
+    # A re-rendered list already contains its rows
+    rows = {(project_id, task_id) for project_id, task_id in rows if project_id not in lists}
+
+    messages = []
+    projects = Project.objects.with_stats().in_bulk(cards)
+    for project_id in sorted(cards):
+        project = projects.get(project_id)
+        # A deleted project's card is emptied
+        card = render_to_string('partials/project_card.html', {'project': project}) if project else ''
+        messages.append((DASHBOARD, encode(f'project-{project_id}', card)))
+        if project is None:
+            continue
+        if project_id in statuses:
+            html = render_to_string('partials/project_status.html', {'project': project})
+            messages.append((project_id, encode(f'project-status-{project_id}', html)))
+        if project_id in lists:
+            html = render_to_string('partials/task_list.html', {'tasks': project.tasks.all()})
+            messages.append((project_id, encode(f'project-tasks-{project_id}', html)))
+
+    tasks = Task.objects.in_bulk([task_id for _, task_id in rows])
+    for project_id, task_id in sorted(rows):
+        task = tasks.get(task_id)
+        if task is not None:
+            html = render_to_string('partials/task_row.html', {'task': task})
+            messages.append((project_id, encode(f'task-{task_id}', html)))
+    return messages
+
+
+class Subscription:
+    """Messages waiting to be written to one connection"""
+
+    def __init__(self, scope: Optional[int], maxsize: int):
+        self.scope = scope
+        self.queue = asyncio.Queue(maxsize)
+
+    def put(self, message: bytes) -> bool:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def close(self):
+        """Drop what is queued and end the stream"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class Broadcaster:
+    """Per-process fan-out of rendered events to connected browsers"""
+
+    def __init__(self):
+        self.subscriptions: Dict[Optional[int], set] = defaultdict(set)
+        self._task = None
+        self._since = None
+        self._seen = {}
+
+    @property
+    def connections(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self.subscriptions.values())
+
+    def subscribe(self, scope: Optional[int]) -> Subscription:
+        subscription = Subscription(scope, getattr(settings, 'LIVE_CLIENT_QUEUE', 100))
+        self.subscriptions[scope].add(subscription)
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            # Start from now: pages were rendered with the current state
+            self._since = timezone.now()
+            self._seen = {}
+            self._task = loop.create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self.subscriptions.get(subscription.scope)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscriptions[subscription.scope]
+
+    def deliver(self, messages: Iterable[Tuple[Optional[int], bytes]]):
+        for scope, message in messages:
+            for subscription in list(self.subscriptions.get(scope, ())):
+                if not subscription.put(message):
+                    # Too far behind to catch up: end its stream, EventSource reconnects
+                    self.unsubscribe(subscription)
+                    subscription.close()
+
+    def _poll(self):
+        """New events since the last poll, rendered (runs in a worker thread)"""
+        close_old_connections()
+        now = timezone.now()
+        window_start = self._since - COMMIT_GRACE
+        events = [
+            event for event in LiveEvent.objects.filter(created_at__gte=window_start)
+            if event.id not in self._seen
+        ]
+        for event in events:
+            self._seen[event.id] = event.created_at
+        self._since = now
+        self._seen = {
+            event_id: created_at for event_id, created_at in self._seen.items()
+            if created_at >= now - COMMIT_GRACE
+        }
+        return render_messages(events) if events else []
+
+    async def _run(self):
+        # Polls only while someone is listening
+        while self.subscriptions:
+            await asyncio.sleep(getattr(settings, 'LIVE_POLL_INTERVAL', 1.0))
+            try:
+                messages = await sync_to_async(self._poll)()
+            except Exception:
+                logger.exception('Live update poll failed')
+                continue
+            self.deliver(messages)
+
+
+broadcaster = Broadcaster()
+
+
+async def stream(scope: Optional[int]):
+    """Body of one SSE response: the scope's messages, with keepalive comments in between"""
+    subscription = broadcaster.subscribe(scope)
+    keepalive = getattr(settings, 'LIVE_KEEPALIVE', 15)
+    try:
+        yield f'retry: {RECONNECT_DELAY}\n\n'.encode()
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                # Keeps proxies from timing out idle connections
+                message = b': keepalive\n\n'
+            if message is None:
+                return
+            yield message
+    finally:
+        broadcaster.unsubscribe(subscription)
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+
+from main import github_mirror, github_ratelimit
+from main.github_client import GitHubAPIError, GitHubClient
+from main.github_graphql import GitHubGraphQLClient
+from main.models import Project
+
+# Items per repository and type requested in the batched GraphQL query
+GRAPHQL_PAGE = 100
+
+
+class Command(BaseCommand):
+    help = 'Backfill the local GitHub mirror (PRs, commits, issues) for every project repository'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repo', action='append', dest='repos',
+                            help='Only backfill this repository (owner/repo); may be repeated')
+        parser.add_argument('--commits', type=int, default=20, help='Recent commits to mirror (default: 20)')
+
+    def handle(self, *args, **options):
+        github_ratelimit.set_default_priority(github_ratelimit.BACKGROUND)
+        repos = options['repos'] or sorted(set(
+            Project.objects.exclude(repo_name='').values_list('repo_name', flat=True)
+        ))
+        if not repos:
+            self.stdout.write('No repositories to backfill.')
+            return
+
+        snapshots = {}
+        graphql = GitHubGraphQLClient()
+        if graphql.available:
+            snapshots = graphql.fetch_repositories(
+                repos, pull_requests=GRAPHQL_PAGE, commits=options['commits'], issues=GRAPHQL_PAGE,
+            )
+            # A full first page may not be everything; those repositories are paged over REST
+            for repo, snapshot in list(snapshots.items()):
+                if len(snapshot['pull_requests']) >= GRAPHQL_PAGE or len(snapshot['issues']) >= GRAPHQL_PAGE:
+                    del snapshots[repo]
+
+        # The mirror closes items missing from a snapshot, so snapshots must be complete
+        github = GitHubClient()
+        for repo in repos:
+            if repo in snapshots:
+                continue
+            try:
+                snapshots[repo] = {
+                    'pull_requests': list(github.iter_pull_requests(repo, strict=True)),
+                    'commits': github.fetch_commits(repo, limit=options['commits']),
+                    'issues': list(github.iter_issues(repo, strict=True)),
+                }
+            except GitHubAPIError as e:
+                self.stdout.write(self.style.WARNING(f'{repo}: {e}'))
+
+        for repo in repos:
+            snapshot = snapshots.get(repo)
+            if snapshot is None:
+                self.stdout.write(self.style.WARNING(f'{repo}: not available, skipped'))
+                continue
+            github_mirror.replace_open_items(
+                repo, snapshot['pull_requests'], snapshot['issues'], snapshot['commits'],
+            )
+            self.stdout.write(
+                f"{repo}: {len(snapshot['pull_requests'])} PRs, {len(snapshot['issues'])} issues, "
+                f"{len(snapshot['commits'])} commits"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {len(snapshots)} of {len(repos)} repositories'))
@@ -0,0 +1,57 @@
+import statistics
+import time
+
+import requests
+from django.core.management.base import BaseCommand
+
+from main.fake_github import FakeGitHub
+from main.github_client import GitHubClient, reset_session
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-call GitHub latency with and without the pooled keep-alive session'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=200, help='Requests per mode (default: 200)')
+        parser.add_argument('--handshake-ms', type=float, default=20.0,
+                            help='Simulated cost of each new TCP+TLS connection (default: 20)')
+
+    def handle(self, *args, **options):
+        calls = options['calls']
+        handshake = options['handshake_ms'] / 1000.0
+
+        with FakeGitHub(handshake_delay=handshake) as fake:
+            # Old behaviour: module-level requests.get opens a new connection per call
+            url = f'{fake.url}/repos/fmu/website/pulls'
+            unpooled = self._measure(calls, lambda: requests.get(url, timeout=10).json())
+            unpooled_connections = fake.stats['connections']
+
+            reset_session()
+            client = GitHubClient(token='', base_url=fake.url)
+            client.cache = None  # measure connection reuse only, not 304s
+            pooled = self._measure(calls, lambda: client.fetch_pull_requests('fmu/website'))
+            pooled_connections = fake.stats['connections'] - unpooled_connections
+            reset_session()
+
+        self._report('requests.get (no pool)', unpooled, unpooled_connections)
+        self._report('pooled session', pooled, pooled_connections)
+
+        saved = statistics.mean(unpooled) - statistics.mean(pooled)
+        self.stdout.write(self.style.SUCCESS(f'Latency saved per call: {saved:.2f} ms'))
+
+    def _measure(self, calls, func):
+        timings = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def _report(self, label, timings, connections):
+        timings = sorted(timings)
+        p50 = timings[len(timings) // 2]
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(
+            f'{label:<24} mean={statistics.mean(timings):7.2f} ms  '
+            f'p50={p50:7.2f} ms  p99={p99:7.2f} ms  connections={connections}'
+        )
@@ -0,0 +1,198 @@
+import asyncio
+import resource
+import time
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from main.benchmarking import benchmark_database, summarize
+from main.models import Project
+
+
+def rss_kb(pid='self'):
+    """Resident memory of a process in KB (Linux)"""
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+class Listener:
+    """One idle SSE connection counting the card updates it receives"""
+
+    def __init__(self, marker):
+        self.marker = marker
+        self.connected_after = None
+        self.received = []
+        self._tail = b''
+
+    def feed(self, data):
+        buffer = self._tail + data
+        count = buffer.count(self.marker)
+        now = time.perf_counter()
+        self.received.extend([now] * count)
+        # Keep enough to match a marker split across reads, but not a counted one
+        rest = buffer.rsplit(self.marker, 1)[-1] if count else buffer
+        self._tail = rest[-len(self.marker):]
+
+
+class Command(BaseCommand):
+    help = ('Load-test live updates: hold many idle Server-Sent Events connections on one worker '
+            'and measure memory and update delivery latency')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=1000,
+                            help='Idle SSE connections to open (default: 1000)')
+        parser.add_argument('--updates', type=int, default=5, help='Project changes to push (default: 5)')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds between changes (default: 2)')
+        parser.add_argument('--url', help='Events URL of a running ASGI server, e.g. http://127.0.0.1:8000/events/ '
+                                          '(default: drive the ASGI application in this process)')
+        parser.add_argument('--project', type=int,
+                            help='With --url: id of the project to change (in the configured database)')
+        parser.add_argument('--server-pid', type=int, help='With --url: report this server process\'s memory')
+
+    def handle(self, *args, **options):
+        # Every connection is a file descriptor
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = options['connections'] + 256
+        if soft < wanted:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+
+        if options['url']:
+            if not options['project']:
+                raise CommandError('--url needs --project')
+            asyncio.run(self._run(options, options['project'], self._socket_client, options['server_pid']))
+            return
+
+        # In process: a throwaway database, this process standing in for one ASGI worker
+        with benchmark_database(), override_settings(LIVE_POLL_INTERVAL=0.5):
+            project = Project.objects.create(name='Live benchmark')
+            self.app = get_asgi_application()
+            asyncio.run(self._run(options, project.id, self._asgi_client, 'self'))
+
+    async def _run(self, options, project_id, client, pid):
+        marker = f'event: project-{project_id}\n'.encode()
+        listeners = [Listener(marker) for _ in range(options['connections'])]
+        memory_before = rss_kb(pid) if pid else 0
+
+        start = time.perf_counter()
+        stop = asyncio.Event()
+        tasks = [asyncio.create_task(client(options, listener, stop)) for listener in listeners]
+        while (time.perf_counter() - start < 60
+               and sum(listener.connected_after is not None for listener in listeners) < len(listeners)):
+            await asyncio.sleep(0.1)
+        connected = [listener for listener in listeners if listener.connected_after is not None]
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(1)
+        memory_after = rss_kb(pid) if pid else 0
+
+        accept = summarize([listener.connected_after * 1000 for listener in connected])
+        self.stdout.write(
+            f'{len(connected)}/{len(listeners)} connected in {elapsed:.1f} s  '
+            f'accept p50={accept["p50"]:.1f} ms  p99={accept["p99"]:.1f} ms'
+        )
+        if memory_before and memory_after:
+            per_connection = (memory_after - memory_before) / max(len(connected), 1)
+            self.stdout.write(
+                f'worker memory {memory_before / 1024:.1f} MB -> {memory_after / 1024:.1f} MB '
+                f'(~{per_connection:.1f} KB per connection)'
+            )
+
+        # Updates from before the connections opened may still arrive once
+        await asyncio.sleep(1)
+        baselines = {id(listener): len(listener.received) for listener in connected}
+        pushed = []
+        for _ in range(options['updates']):
+            pushed.append(time.perf_counter())
+            await sync_to_async(self._touch)(project_id)
+            await asyncio.sleep(options['interval'])
+
+        latencies = []
+        missed = 0
+        for listener in connected:
+            received = listener.received[baselines[id(listener)]:]
+            for index, pushed_at in enumerate(pushed):
+                if index < len(received):
+                    latencies.append((received[index] - pushed_at) * 1000)
+                else:
+                    missed += 1
+        delivery = summarize(latencies)
+        self.stdout.write(
+            f'{len(pushed)} updates x {len(connected)} connections: {len(latencies)} delivered, {missed} missed  '
+            f'latency p50={delivery["p50"]:.1f} ms  p99={delivery["p99"]:.1f} ms'
+        )
+
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    def _touch(project_id):
+        project = Project.objects.get(id=project_id)
+        project.summary = f'Touched at {time.time():.3f}'
+        project.save()
+
+    async def _asgi_client(self, options, listener, stop):
+        """A connection driven straight through the ASGI application"""
+        start = time.perf_counter()
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await stop.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                if message['status'] == 200:
+                    listener.connected_after = time.perf_counter() - start
+            elif message['type'] == 'http.response.body':
+                listener.feed(message.get('body', b''))
+
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': '/events/', 'raw_path': b'/events/',
+            'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'accept', b'text/event-stream')],
+            'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+        }
+        await self.app(scope, receive, send)
+
+    async def _socket_client(self, options, listener, stop):
+        """A connection to a running server"""
+        url = urlsplit(options['url'])
+        path = url.path + (f'?{url.query}' if url.query else '')
+        start = time.perf_counter()
+        reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+        try:
+            writer.write(
+                f'GET {path} HTTP/1.1\r\nHost: {url.netloc}\r\nAccept: text/event-stream\r\n\r\n'.encode()
+            )
+            await writer.drain()
+            status = await reader.readline()
+            if b' 200 ' in status:
+                listener.connected_after = time.perf_counter() - start
+            while not stop.is_set():
+                read = asyncio.ensure_future(reader.read(4096))
+                stopped = asyncio.ensure_future(stop.wait())
+                done, _ = await asyncio.wait({read, stopped}, return_when=asyncio.FIRST_COMPLETED)
+                if read not in done:
+                    read.cancel()
+                    break
+                stopped.cancel()
+                data = read.result()
+                if not data:
+                    break
+                listener.feed(data)
+        finally:
+            writer.close()
@@ -0,0 +1,91 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from main import metrics, synthetic
+from main.benchmarking import benchmark_database, summarize
+from main.models import Project
+
+SCENARIOS = ['home', 'today', 'project_detail']
+
+
+class Command(BaseCommand):
+    help = ('Measure the latency the request metrics add (MetricsMiddleware, query wrapper, template timing) '
+            'by serving the same pages with metrics on and off, interleaved')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=100, help='Projects to seed (default: 100)')
+        parser.add_argument('--tasks', type=int, default=2000, help='Tasks to seed (default: 2000)')
+        parser.add_argument('--logs', type=int, default=10000, help='Log entries to seed (default: 10000)')
+        parser.add_argument('--runs', type=int, default=200, help='Measured requests per scenario and mode (default: 200)')
+        parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per scenario (default: 20)')
+        parser.add_argument('--max-overhead', type=float, default=2.0,
+                            help='Fail when metrics add more than this many percent to the median (default: 2)')
+        parser.add_argument('--flush-interval', type=float, default=0.05,
+                            help='COUNTER_FLUSH_INTERVAL while measuring, so counter flushes land among the '
+                                 'measured requests and show in p99 (default: 0.05 s)')
+
+    def handle(self, *args, **options):
+        with benchmark_database(), override_settings(COUNTER_FLUSH_INTERVAL=options['flush_interval']):
+            # No repositories: project_detail makes no GitHub calls, so only our own work is timed
+            synthetic.generate(options['projects'], options['tasks'], options['logs'], repos=0)
+            project_ids = list(Project.objects.values_list('pk', flat=True))
+            clients = {enabled: self.client(enabled) for enabled in (False, True)}
+
+            failures = []
+            for name in SCENARIOS:
+                timings = {False: [], True: []}
+                for run in range(options['warmup'] + options['runs']):
+                    url = self.url(name, project_ids[run % len(project_ids)])
+                    # Alternate which mode goes first so drift hits both alike
+                    for enabled in ((False, True) if run % 2 else (True, False)):
+                        elapsed = self.request(clients[enabled], url, enabled)
+                        if run >= options['warmup']:
+                            timings[enabled].append(elapsed)
+
+                # Each pair ran back to back; the median of their differences cancels machine drift
+                off = summarize(timings[False])
+                added = summarize([on - off for on, off in zip(timings[True], timings[False])])
+                overhead = added['p50'] / off['p50'] * 100
+                on = summarize(timings[True])
+                self.stdout.write(
+                    f'{name:<16} off p50={off["p50"]:7.2f} ms p99={off["p99"]:7.2f} ms  '
+                    f'on p50={on["p50"]:7.2f} ms p99={on["p99"]:7.2f} ms  '
+                    f'added per request: p50={added["p50"] * 1000:+6.0f} us ({overhead:+.2f}%) '
+                    f'p99={added["p99"] * 1000:+6.0f} us'
+                )
+                if overhead > options['max_overhead']:
+                    failures.append(f'{name}: {overhead:.2f}% > {options["max_overhead"]}%')
+
+        if failures:
+            raise CommandError('Metrics overhead too high: ' + '; '.join(failures))
+        self.stdout.write(self.style.SUCCESS(f'Metrics overhead within {options["max_overhead"]}%'))
+
+    def client(self, enabled):
+        """A test client whose middleware chain was loaded with metrics on or off"""
+        client = Client()
+        with override_settings(METRICS_ENABLED=enabled):
+            client.get(reverse('home'))
+        return client
+
+    def url(self, name, project_id):
+        if name == 'project_detail':
+            return reverse('project_detail', args=[project_id])
+        return reverse(name)
+
+    def request(self, client, url, enabled):
+        # Off means no query wrapper either, as with METRICS_ENABLED=False
+        wrappers = connection.execute_wrappers
+        if not enabled and metrics.record_query in wrappers:
+            wrappers.remove(metrics.record_query)
+        elif enabled and metrics.record_query not in wrappers:
+            wrappers.append(metrics.record_query)
+        start = time.perf_counter()
+        response = client.get(url)
+        elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code != 200:
+            raise CommandError(f'{url}: HTTP {response.status_code}')
+        return elapsed
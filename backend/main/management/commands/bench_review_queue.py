@@ -0,0 +1,69 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from main.benchmarking import benchmark_database, summarize
+from main.fake_github import FakeGitHub
+from main.github_cache import reset_response_cache
+from main.models import Project
+from main.repo_cache import DEFAULT_TTLS
+
+# A TTL of 0 turns repo_cache off for that kind
+NO_DATA_CACHE = {kind: 0 for kind in DEFAULT_TTLS}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the Review & Merge Queue page: sequential vs concurrent GitHub fetches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repos', type=int, default=40, help='Number of repositories (default: 40)')
+        parser.add_argument('--max-delay-ms', type=float, default=300.0,
+                            help='Slowest simulated GitHub response (default: 300)')
+        parser.add_argument('--runs', type=int, default=3, help='Page loads per mode (default: 3)')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        max_delay = options['max_delay_ms'] / 1000.0
+        repos = [f'fmu/repo-{i}' for i in range(options['repos'])]
+        delays = {repo: rng.uniform(0, max_delay) for repo in repos}
+        delays[repos[0]] = max_delay
+
+        self.stdout.write(
+            f'{len(repos)} repos, sum of delays={sum(delays.values()) * 1000:.0f} ms, '
+            f'slowest={max_delay * 1000:.0f} ms'
+        )
+
+        with benchmark_database(), FakeGitHub(delays=delays) as fake:
+            for repo in repos:
+                Project.objects.create(name=repo, repo_name=repo)
+
+            modes = [
+                ('sequential (1 worker)', 1, ''),
+                ('concurrent (16 workers)', 16, ''),
+                ('graphql batched', 16, 'bench-token'),
+            ]
+            for label, workers, token in modes:
+                # Every page load fetches from GitHub: no response cache and no repo_cache
+                with override_settings(GITHUB_API_URL=fake.url, GITHUB_GRAPHQL_URL=f'{fake.url}/graphql',
+                                       GITHUB_TOKEN=token, GITHUB_FANOUT_WORKERS=workers,
+                                       GITHUB_RESPONSE_CACHE='', GITHUB_DATA_CACHE_TTLS=NO_DATA_CACHE,
+                                       REVIEW_QUEUE_DEADLINE=600):
+                    reset_response_cache()
+                    client = Client()
+                    timings = []
+                    requests_before = fake.stats['requests']
+                    for _ in range(options['runs']):
+                        start = time.perf_counter()
+                        response = client.get('/review-merge/')
+                        timings.append((time.perf_counter() - start) * 1000)
+                        assert response.status_code == 200
+                    stats = summarize(timings)
+                    per_page = (fake.stats['requests'] - requests_before) / options['runs']
+                    self.stdout.write(
+                        f'{label:<26} mean={stats["mean"]:8.1f} ms  p50={stats["p50"]:8.1f} ms  '
+                        f'upstream calls/page={per_page:.0f}'
+                    )
+            reset_response_cache()
@@ -0,0 +1,232 @@
+import hashlib
+import hmac
+import json
+import random
+import time
+import uuid
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from main import api, synthetic
+from main.benchmarking import benchmark_database, summarize
+from main.fake_github import FakeGitHub
+from main.github_cache import reset_response_cache
+from main.models import LogEntry, Project, Task
+
+SCENARIOS = [
+    'home', 'project_detail', 'today_view', 'review_merge_queue',
+    'toggle_task_status', 'github_webhook', 'github_webhook_inline', 'api_logs',
+]
+
+WEBHOOK_SECRET = 'bench-secret'
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+
+async def read(response):
+    """Consume a streamed async response body"""
+    return b''.join([chunk async for chunk in response.streaming_content])
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the main views and the webhook endpoint on a seeded synthetic dataset '
+            'against a local fake GitHub, and compare p50/p99 latency and query counts with a baseline')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=1000, help='Projects to seed (default: 1000)')
+        parser.add_argument('--tasks', type=int, default=100000, help='Tasks to seed (default: 100000)')
+        parser.add_argument('--logs', type=int, default=200000, help='Log entries to seed (default: 200000)')
+        parser.add_argument('--repos', type=int, default=50,
+                            help='Projects with a (fake) GitHub repository (default: 50)')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--runs', type=int, default=30, help='Measured requests per scenario (default: 30)')
+        parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per scenario (default: 3)')
+        parser.add_argument('--github-delay-ms', type=float, default=50.0,
+                            help='Fake GitHub response time (default: 50)')
+        parser.add_argument('--only', help='Comma-separated scenarios to run (default: all of '
+                                           + ', '.join(SCENARIOS) + ')')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE),
+                            help='Baseline JSON to compare with, if it exists (default: benchmarks/baseline.json)')
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Write the results to the baseline file instead of comparing')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed p50 slowdown over the baseline, as a fraction (default: 0.25)')
+        parser.add_argument('--p99-tolerance', type=float, default=1.0,
+                            help='Allowed p99 slowdown over the baseline, as a fraction (default: 1.0)')
+        parser.add_argument('--min-slack-ms', type=float, default=2.0,
+                            help='Slowdowns smaller than this never fail, to absorb noise (default: 2)')
+        parser.add_argument('--query-slack', type=int, default=0,
+                            help='Extra queries per request allowed over the baseline (default: 0)')
+
+    def handle(self, *args, **options):
+        scenarios = options['only'].split(',') if options['only'] else SCENARIOS
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+
+        dataset = {name: options[name] for name in ('projects', 'tasks', 'logs', 'repos', 'seed')}
+        with benchmark_database(), FakeGitHub(default_delay=options['github_delay_ms'] / 1000.0) as fake:
+            start = time.perf_counter()
+            synthetic.generate(progress=lambda message: self.stdout.write(f'  seeded {message}'), **dataset)
+            self.stdout.write(f'Seeded in {time.perf_counter() - start:.1f} s')
+
+            # Counter flushes (request metrics, cache counters) would land in random requests' query counts
+            with override_settings(GITHUB_API_URL=fake.url, GITHUB_GRAPHQL_URL=f'{fake.url}/graphql',
+                                   GITHUB_TOKEN='', GITHUB_WEBHOOK_SECRET=WEBHOOK_SECRET,
+                                   COUNTER_FLUSH_INTERVAL=3600):
+                cache.clear()
+                reset_response_cache()
+                results = {name: self.measure(name, fake, options) for name in scenarios}
+            cache.clear()
+            reset_response_cache()
+
+        report = {'dataset': dataset, 'results': results}
+        path = Path(options['baseline'])
+        if options['save_baseline']:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {path}'))
+            return
+        if not path.exists():
+            self.stdout.write(f'No baseline at {path}; run with --save-baseline to record one.')
+            return
+        self.compare(report, json.loads(path.read_text()), options)
+
+    def measure(self, name, fake, options):
+        rng = random.Random(options['seed'])
+        request = self.scenario(name, rng)
+        inline = name == 'github_webhook_inline'
+        with override_settings(WEBHOOK_ASYNC=not inline):
+            for _ in range(options['warmup']):
+                request()
+
+            timings = []
+            queries = []
+            calls_before = fake.stats['requests']
+            for _ in range(options['runs']):
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = request()
+                    timings.append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    raise CommandError(f'{name}: HTTP {response.status_code}')
+                queries.append(len(captured.captured_queries))
+
+        stats = summarize(timings)
+        result = {
+            'p50_ms': round(stats['p50'], 2),
+            'p99_ms': round(stats['p99'], 2),
+            'mean_ms': round(stats['mean'], 2),
+            'queries': max(queries),
+            'github_calls': round((fake.stats['requests'] - calls_before) / options['runs'], 2),
+        }
+        self.stdout.write(
+            f'{name:<22} p50={result["p50_ms"]:8.1f} ms  p99={result["p99_ms"]:8.1f} ms  '
+            f'queries={result["queries"]:4d}  github calls/request={result["github_calls"]:.1f}'
+        )
+        return result
+
+    def scenario(self, name, rng):
+        """A callable making one request of the scenario"""
+        client = Client()
+        project_ids = list(Project.objects.values_list('pk', flat=True))
+        repo_projects = list(Project.objects.exclude(repo_name='').values_list('pk', 'repo_name'))
+        task_range = Task.objects.aggregate(low=Min('pk'), high=Max('pk'))
+
+        if name == 'home':
+            return lambda: client.get(reverse('home'))
+        if name == 'today_view':
+            return lambda: client.get(reverse('today'))
+        if name == 'review_merge_queue':
+            return lambda: client.get(reverse('review_merge'))
+        if name == 'project_detail':
+            candidates = [pk for pk, _ in repo_projects] or project_ids
+            return lambda: client.get(reverse('project_detail', args=[rng.choice(candidates)]))
+        if name == 'toggle_task_status':
+            if task_range['low'] is None:
+                raise CommandError('toggle_task_status needs --tasks > 0')
+            return lambda: client.post(
+                reverse('toggle_task_status', args=[rng.randint(task_range['low'], task_range['high'])])
+            )
+        if name == 'api_logs':
+            # Pages from random depths, starting after random log entries
+            log_range = LogEntry.objects.aggregate(low=Min('pk'), high=Max('pk'))
+            if log_range['low'] is None:
+                raise CommandError('api_logs needs --logs > 0')
+            starts = {rng.randint(log_range['low'], log_range['high']) for _ in range(100)}
+            cursors = [api.encode_cursor(row, api.RESOURCES['logs'].ordering)
+                       for row in LogEntry.objects.filter(pk__in=starts).values('timestamp', 'id')]
+
+            def page():
+                response = client.get(reverse('api_logs'), {'cursor': rng.choice(cursors)})
+                async_to_sync(read)(response)
+                return response
+            return page
+
+        # github_webhook(_inline): signed pull_request deliveries for a repository project
+        if not repo_projects:
+            raise CommandError(f'{name} needs --repos > 0')
+
+        def deliver():
+            _, repo_name = rng.choice(repo_projects)
+            number = rng.randint(1, 500)
+            body = json.dumps({
+                'action': 'synchronize',
+                'repository': {'full_name': repo_name},
+                'pull_request': {
+                    'number': number, 'title': f'Change #{number}', 'state': 'open',
+                    'user': {'login': 'octocat'}, 'html_url': f'https://github.com/{repo_name}/pull/{number}',
+                    'created_at': '2025-01-01T00:00:00Z', 'updated_at': '2025-01-02T00:00:00Z',
+                },
+            }).encode()
+            signature = hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+            return client.post(
+                reverse('github_webhook'), body, content_type='application/json',
+                HTTP_X_GITHUB_EVENT='pull_request', HTTP_X_GITHUB_DELIVERY=str(uuid.uuid4()),
+                HTTP_X_HUB_SIGNATURE_256=f'sha256={signature}',
+            )
+        return deliver
+
+    def compare(self, report, baseline, options):
+        if baseline.get('dataset') != report['dataset']:
+            self.stdout.write(self.style.WARNING(
+                f'Baseline was recorded with a different dataset: {baseline.get("dataset")}'
+            ))
+
+        failures = []
+        self.stdout.write('\nCompared with the baseline:')
+        for name, result in report['results'].items():
+            base = baseline.get('results', {}).get(name)
+            if base is None:
+                self.stdout.write(f'{name:<22} (not in baseline)')
+                continue
+            checks = [
+                ('p50', result['p50_ms'], base['p50_ms'], options['tolerance']),
+                ('p99', result['p99_ms'], base['p99_ms'], options['p99_tolerance']),
+            ]
+            notes = []
+            for label, value, before, tolerance in checks:
+                limit = max(before * (1 + tolerance), before + options['min_slack_ms'])
+                change = (value - before) / before * 100 if before else 0.0
+                notes.append(f'{label} {change:+.0f}%')
+                if value > limit:
+                    failures.append(f'{name}: {label} {value:.1f} ms > {limit:.1f} ms (baseline {before:.1f} ms)')
+            if result['queries'] > base['queries'] + options['query_slack']:
+                failures.append(f'{name}: {result["queries"]} queries per request (baseline {base["queries"]})')
+            notes.append(f'queries {result["queries"] - base["queries"]:+d}')
+            self.stdout.write(f'{name:<22} ' + '  '.join(notes))
+
+        if failures:
+            for failure in failures:
+                self.stdout.write(self.style.ERROR(f'  {failure}'))
+            raise CommandError(f'{len(failures)} benchmark regressions')
+        self.stdout.write(self.style.SUCCESS('No regressions'))
@@ -0,0 +1,177 @@
+import json
+import re
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+# Lines written by the django.db.backends logger: "(0.002) SELECT ...; args=(...); alias=default"
+LOG_LINE = re.compile(r'\((?P<duration>\d+\.\d+)\) (?P<sql>(?:SELECT|UPDATE|DELETE|WITH)\b.*?); args=', re.I)
+EXPLAINABLE = re.compile(r'^\s*(SELECT|UPDATE|DELETE|WITH)\b', re.I)
+
+# SQLite EXPLAIN QUERY PLAN steps: "SCAN t", "SEARCH t USING INDEX i (a=?)", "SCAN t USING COVERING INDEX i"
+SQLITE_STEP = re.compile(r'^(?P<kind>SCAN|SEARCH) (?P<table>\S+)(?: AS \S+)?(?: USING (?:COVERING )?INDEX (?P<index>\S+))?')
+WHERE_COLUMN = re.compile(r'"(?P<table>\w+)"\."(?P<column>\w+)"\s*(?:=|<|>|IN\b|LIKE\b|IS\b)', re.I)
+
+
+def fingerprint(sql):
+    """Normalise literals so repeated queries with different values group together"""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(\.\d+)?\b', '?', sql)
+    sql = re.sub(r'\((?:\s*\?\s*,)+\s*\?\s*\)', '(?...)', sql)
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+class Command(BaseCommand):
+    help = ('Report sequential scans (missing indexes) and indexes no query used, '
+            'from a Django SQL log or by requesting pages')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', action='append', default=[],
+                            help='django.db.backends log file (SQL_QUERY_LOG); may be repeated')
+        parser.add_argument('--url', action='append', default=[],
+                            help='Request this path with the test client and analyse its queries; may be repeated')
+        parser.add_argument('--min-rows', type=int, default=1000,
+                            help='Ignore scans of tables smaller than this (default: 1000)')
+
+    def handle(self, *args, **options):
+        if not options['log'] and not options['url']:
+            raise CommandError('Give at least one --log file or --url')
+
+        queries = defaultdict(lambda: {'count': 0, 'time': 0.0, 'sql': ''})
+        for sql, duration in self._statements(options['log'], options['url']):
+            entry = queries[fingerprint(sql)]
+            entry['count'] += 1
+            entry['time'] += duration
+            entry['sql'] = sql
+
+        tables = {model._meta.db_table for model in apps.get_app_config('main').get_models()}
+        used = set()
+        scans = defaultdict(lambda: {'count': 0, 'time': 0.0, 'columns': set()})
+        for entry in queries.values():
+            for table, index in self._explain(entry['sql']):
+                if index:
+                    used.add(index)
+                    continue
+                if table not in tables:
+                    continue
+                scan = scans[table]
+                scan['count'] += entry['count']
+                scan['time'] += entry['time']
+                scan['columns'].update(
+                    match.group('column') for match in WHERE_COLUMN.finditer(entry['sql'].partition(' WHERE ')[2])
+                    if match.group('table') == table
+                )
+
+        self.stdout.write(f'Analysed {sum(e["count"] for e in queries.values())} queries '
+                          f'({len(queries)} distinct)\n')
+        self._report_scans(scans, options['min_rows'])
+        self._report_unused(tables, used)
+
+    def _statements(self, logs, urls):
+        for path in logs:
+            with open(path, encoding='utf-8', errors='replace') as log:
+                for line in log:
+                    match = LOG_LINE.search(line)
+                    if match:
+                        yield match.group('sql'), float(match.group('duration'))
+
+        if urls:
+            client = Client()
+            with CaptureQueriesContext(connection) as captured:
+                for url in urls:
+                    client.get(url)
+            for query in captured.captured_queries:
+                if EXPLAINABLE.match(query['sql']):
+                    yield query['sql'], float(query['time'])
+
+    def _explain(self, sql):
+        """(table, index or None) for every table access in the statement's plan"""
+        try:
+            with connection.cursor() as cursor:
+                if connection.vendor == 'postgresql':
+                    cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+                    plan = cursor.fetchone()[0]
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    return list(self._postgres_accesses(plan[0]['Plan']))
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                return list(self._sqlite_accesses(row[-1] for row in cursor.fetchall()))
+        except Exception as e:
+            # Logged SQL is interpolated for display and may not always re-parse
+            self.stderr.write(f'Could not explain: {sql[:120]}... ({e})')
+            return []
+
+    @staticmethod
+    def _sqlite_accesses(steps):
+        for step in steps:
+            match = SQLITE_STEP.match(step)
+            if not match:
+                continue
+            index = match.group('index')
+            if index is None and 'PRIMARY KEY' in step:
+                index = 'PRIMARY KEY'
+            yield match.group('table'), index
+
+    @classmethod
+    def _postgres_accesses(cls, node):
+        if node.get('Node Type') == 'Seq Scan':
+            yield node['Relation Name'], None
+        elif node.get('Index Name'):
+            # Bitmap index scans carry the index but not the table name
+            yield node.get('Relation Name', ''), node['Index Name']
+        for child in node.get('Plans', []):
+            yield from cls._postgres_accesses(child)
+
+    def _row_count(self, table):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+            else:
+                cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+            row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def _report_scans(self, scans, min_rows):
+        self.stdout.write(self.style.MIGRATE_HEADING('Sequential scans (missing index candidates)'))
+        reported = 0
+        for table, scan in sorted(scans.items(), key=lambda item: -item[1]['time']):
+            rows = self._row_count(table)
+            if rows < min_rows:
+                continue
+            reported += 1
+            columns = ', '.join(sorted(scan['columns'])) or '-'
+            self.stdout.write(
+                f"  {table:<28} {scan['count']:>6} queries {scan['time'] * 1000:>9.1f} ms  "
+                f"~{rows} rows  filtered on: {columns}"
+            )
+        if not reported:
+            self.stdout.write(f'  None on tables with at least {min_rows} rows')
+
+    def _report_unused(self, tables, used):
+        self.stdout.write(self.style.MIGRATE_HEADING('\nIndexes not used by any analysed query'))
+        reported = 0
+        with connection.cursor() as cursor:
+            for table in sorted(tables):
+                constraints = connection.introspection.get_constraints(cursor, table)
+                for name, info in sorted(constraints.items()):
+                    if not info['index'] or info['primary_key'] or name in used:
+                        continue
+                    reported += 1
+                    note = '  (unique: still enforces integrity)' if info['unique'] else ''
+                    columns = ', '.join(column for column in info['columns'] if column) or 'expression'
+                    self.stdout.write(f'  {table:<28} {name} ({columns}){note}')
+
+                if connection.vendor == 'postgresql':
+                    # Server-side counters cover all traffic, not just the analysed queries
+                    cursor.execute(
+                        'SELECT indexrelname FROM pg_stat_user_indexes WHERE relname = %s AND idx_scan = 0',
+                        [table],
+                    )
+                    for (name,) in cursor.fetchall():
+                        self.stdout.write(f'  {table:<28} {name}  (pg_stat_user_indexes: never scanned)')
+        if not reported:
+            self.stdout.write('  None')
@@ -0,0 +1,75 @@
+import time
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from main import github_ratelimit, live, project_stats, recompute, webhook_queue
+
+
+class Command(BaseCommand):
+    help = 'Drain the GitHub webhook queue: process deliveries in batches with retries and dead-lettering'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Deliveries claimed per batch (default: 50)')
+        parser.add_argument('--workers', type=int, default=4, help='Repositories processed concurrently (default: 4)')
+        parser.add_argument('--max-attempts', type=int,
+                            default=getattr(settings, 'WEBHOOK_MAX_ATTEMPTS', 5),
+                            help='Attempts before a delivery is dead-lettered')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty (default: 1)')
+        parser.add_argument('--once', action='store_true', help='Drain what is due now, then exit')
+
+    def handle(self, *args, **options):
+        retention = getattr(settings, 'WEBHOOK_DONE_RETENTION_HOURS', 24)
+        # GitHub calls made here must not starve page loads of rate-limit budget
+        github_ratelimit.set_default_priority(github_ratelimit.BACKGROUND)
+        executor = ThreadPoolExecutor(max_workers=options['workers'], thread_name_prefix='webhook-worker')
+        self.stdout.write('Processing webhook deliveries...')
+
+        try:
+            while True:
+                close_old_connections()
+                recomputed = recompute.run_due()
+                if recomputed:
+                    self.stdout.write(f'Recomputed status for {recomputed} projects')
+
+                batch = webhook_queue.claim_batch(options['batch_size'])
+                if batch:
+                    # One thread per repository; each repository's deliveries run in arrival order
+                    runs = executor.map(
+                        lambda run: self._process(run, options['max_attempts']), webhook_queue.by_repository(batch),
+                    )
+                    statuses = [status for run in runs for status in run]
+                    self.stdout.write(
+                        f"Batch of {len(batch)}: {statuses.count('DONE')} done, "
+                        f"{statuses.count('FAILED')} retrying, {statuses.count('DEAD')} dead-lettered"
+                    )
+                    continue
+
+                pruned = webhook_queue.prune_done(retention)
+                if pruned:
+                    self.stdout.write(f'Pruned {pruned} processed deliveries')
+                webhook_queue.prune_delivery_keys()
+                live.prune(getattr(settings, 'LIVE_EVENT_RETENTION_MINUTES', 10))
+                # Recounts overdue tasks once a day; a no-op otherwise
+                project_stats.roll_over()
+                if options['once']:
+                    # Burst events are coalesced; flush what they scheduled before exiting
+                    recompute.run_due(now=timezone.now() + timedelta(days=1))
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            executor.shutdown(wait=True)
+
+    def _process(self, run, max_attempts):
+        try:
+            return [webhook_queue.process_delivery(delivery, max_attempts) for delivery in run]
+        finally:
+            # Worker threads each hold their own connection; release it per run
+            connection.close()
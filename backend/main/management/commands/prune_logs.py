@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main import log_retention
+from main.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Archive log entries past each project\'s retention window, roll them up per day and delete them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append', dest='projects',
+                            help='Only prune this project id; may be repeated')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Entries archived and deleted per transaction (default: 1000)')
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help='Seconds to sleep between batches (default: 0.05)')
+        parser.add_argument('--archive-dir', default=getattr(settings, 'LOG_ARCHIVE_DIR', 'log_archive'),
+                            help='Directory for the NDJSON archives (default: settings.LOG_ARCHIVE_DIR)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the entries that would be pruned')
+
+    def handle(self, *args, **options):
+        projects = Project.objects.filter(log_retention_days__gt=0).order_by('id')
+        if options['projects']:
+            projects = projects.filter(id__in=options['projects'])
+
+        total = 0
+        for project in projects:
+            if options['dry_run']:
+                count = log_retention.expired_entries(project).count()
+            else:
+                count = log_retention.prune_project(
+                    project,
+                    options['archive_dir'],
+                    batch_size=options['batch_size'],
+                    pause=options['pause'],
+                )
+            if count:
+                self.stdout.write(f'{project.name}: {count} entries older than {project.log_retention_days} days')
+            total += count
+
+        verb = 'Would prune' if options['dry_run'] else 'Pruned'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {total} log entries'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main import project_stats
+
+
+class Command(BaseCommand):
+    help = 'Check ProjectStats rows against the raw task and log rows, and rebuild them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report drift; exit with an error if any is found')
+        parser.add_argument('--project', type=int, action='append',
+                            help='Rebuild only this project id; may be repeated')
+
+    def handle(self, *args, **options):
+        drift = project_stats.check()
+        for project_id, field, stored, actual in drift:
+            self.stdout.write(f'  project {project_id}: {field} is {stored}, should be {actual}')
+        drifted = {project_id for project_id, *_ in drift}
+        self.stdout.write(f'{len(drift)} mismatches in {len(drifted)} projects')
+
+        if options['check']:
+            if drift:
+                raise CommandError('ProjectStats drifted; run rebuild_stats to repair')
+            return
+
+        rebuilt = project_stats.rebuild(options['project'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {rebuilt} projects'))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from main import github_ratelimit, issue_sync
+from main.github_client import GitHubAPIError, GitHubClient
+from main.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Sync tasks with every GitHub issue of projects that have issue sync enabled'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repo', action='append', dest='repos',
+                            help='Only reconcile projects of this repository (owner/repo); may be repeated. '
+                                 'Runs even if the project has auto_sync_issues off.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Issues synced per bulk query (default: 500)')
+
+    def handle(self, *args, **options):
+        github_ratelimit.set_default_priority(github_ratelimit.BACKGROUND)
+
+        projects = Project.objects.exclude(repo_name='')
+        if options['repos']:
+            projects = projects.filter(repo_name__in=options['repos'])
+        else:
+            projects = projects.filter(auto_sync_issues=True)
+        if not projects:
+            self.stdout.write('No projects to reconcile.')
+            return
+
+        github = GitHubClient()
+        for project in projects:
+            # Closed issues are needed too: their tasks are marked DONE
+            issues = github.iter_issues(project.repo_name, state='all', strict=True)
+            try:
+                totals = issue_sync.reconcile(project, issues, batch_size=options['batch_size'])
+            except GitHubAPIError as e:
+                # Batches already written are kept; a rerun picks up the rest
+                self.stdout.write(self.style.WARNING(f'{project.name}: {e}'))
+                continue
+            self.stdout.write(
+                f"{project.name}: {totals['issues']} issues, {totals['created']} tasks created, "
+                f"{totals['updated']} updated"
+            )
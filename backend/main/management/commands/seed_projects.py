@@ -1,17 +1,41 @@
+import time
+
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
+from main import synthetic
 from main.models import Project, Task, Link, LogEntry
 
 
 class Command(BaseCommand):
-    help = 'Seed the database with 5 FMU projects and sample data'
+    help = ('Seed the database with 5 FMU projects and sample data, or with --scale N '
+            'a synthetic dataset of N projects for load testing')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int,
+                            help='Generate this many synthetic projects instead of the 5 samples')
+        parser.add_argument('--tasks-per-project', type=float, default=100,
+                            help='With --scale: average tasks per project (default: 100)')
+        parser.add_argument('--logs-per-project', type=float, default=900,
+                            help='With --scale: average log entries per project, heavy-tailed (default: 900)')
+        parser.add_argument('--links-per-project', type=float, default=2,
+                            help='With --scale: average links per project (default: 2)')
+        parser.add_argument('--repo-share', type=float, default=0.8,
+                            help='With --scale: share of projects with a GitHub repository (default: 0.8)')
+        parser.add_argument('--seed', type=int, default=1,
+                            help='With --scale: random seed; the same seed gives the same data (default: 1)')
+        parser.add_argument('--batch-size', type=int, default=synthetic.BATCH_SIZE,
+                            help=f'With --scale: rows per INSERT (default: {synthetic.BATCH_SIZE})')
 
     def handle(self, *args, **options):
-        self.stdout.write('Seeding FMU projects...')
+        # Clear existing data (one statement per table, not a cascading delete per row)
+        synthetic.truncate()
         
-        # Clear existing data
-        Project.objects.all().delete()
+        if options['scale']:
+            self.seed_scale(options)
+            return
+        
+        self.stdout.write('Seeding FMU projects...')
         
         # Project 1: FMU Consultation System
         project1 = Project.objects.create(
@@ -198,3 +222,20 @@ class Command(BaseCommand):
         )
         
         self.stdout.write(self.style.SUCCESS(f'Successfully seeded 5 projects with tasks, links, and logs'))
+    
+    def seed_scale(self, options):
+        projects = options['scale']
+        started = time.perf_counter()
+        synthetic.generate(
+            projects=projects,
+            tasks=round(projects * options['tasks_per_project']),
+            logs=round(projects * options['logs_per_project']),
+            links=round(projects * options['links_per_project']),
+            repos=round(projects * options['repo_share']),
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=lambda message: self.stdout.write(f'  {message}'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {projects} synthetic projects in {time.perf_counter() - started:.1f} s'
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from main import counters, github_ratelimit, repo_cache
+
+
+class Command(BaseCommand):
+    help = 'Print the shared event counters and GitHub rate-limit gauges'
+
+    def handle(self, *args, **options):
+        for name, value in sorted(github_ratelimit.gauges().items()):
+            self.stdout.write(f'{name:<40} {value}')
+
+        # Request metrics live in the same table; /metrics shows them
+        values = {name: value for name, value in counters.snapshot().items() if '{' not in name}
+        if not values:
+            self.stdout.write('No counters recorded yet.')
+            return
+
+        for name in sorted(values):
+            self.stdout.write(f'{name:<40} {values[name]}')
+
+        deliveries = values.get('webhook_deliveries', 0)
+        if deliveries:
+            rate = values.get('webhook_duplicates', 0) / deliveries * 100
+            self.stdout.write(f'{"webhook duplicate rate":<40} {rate:.1f}%')
+
+        for kind, rate in repo_cache.hit_rates(values).items():
+            self.stdout.write(f'{f"github data cache hit rate ({kind})":<40} {rate * 100:.1f}%')
@@ -0,0 +1,207 @@
+"""
+Prometheus metrics of the views, for /metrics.
+
+MetricsMiddleware times every request. A database execute wrapper and
+the template backend (TimedDjangoTemplates) add up the queries and
+template renders each request caused. Observations are recorded with
+main.counters: a dict update per request, flushed to the Counter table
+every COUNTER_FLUSH_INTERVAL seconds. So they add up across gunicorn
+workers, and whichever worker answers a scrape serves the totals of all
+of them. Other workers' values can be up to one flush interval old.
+
+Counter rows are named like the Prometheus sample they feed
+(http_requests_total{view="home",method="GET",status="200"}).
+Histograms are stored as one counter per bucket, not cumulative.
+Sums of seconds are stored as integer microseconds. render() turns the
+rows into the text exposition format.
+"""
+import re
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from django.template.backends.django import DjangoTemplates, Template
+
+from . import counters, github_ratelimit
+
+# Upper bounds of the histogram buckets
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+CALL_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Time from request to response headers, per view', SECONDS_BUCKETS),
+    'db_queries_per_request': ('Database queries per request, per view', QUERY_BUCKETS),
+    'db_query_duration_seconds': ('Time spent in database queries per request, per view', SECONDS_BUCKETS),
+    'template_render_duration_seconds': ('Time spent rendering templates per request, per view', SECONDS_BUCKETS),
+    'github_calls_per_request': ('GitHub API calls per request, per view', CALL_BUCKETS),
+    'github_request_duration_seconds': ('GitHub API call latency, per endpoint', SECONDS_BUCKETS),
+}
+
+REQUESTS = 'http_requests_total'
+GITHUB_REQUESTS = 'github_requests_total'
+
+# Methods reported as themselves; anything else is 'other' (keeps label values bounded)
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+_BUCKET = re.compile(r'^(\w+)_bucket\{(.*),le="([^"]*)"\}$')
+_SUM = re.compile(r'^(\w+)_sum\{(.*)\}$')
+
+
+class Observation:
+    """What one request spent on queries and templates"""
+
+    __slots__ = ('queries', 'query_seconds', 'render_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.render_seconds = 0.0
+
+
+# The request being measured; sync_to_async copies the context, so views in threads add to it too
+_current: ContextVar[Optional[Observation]] = ContextVar('metrics_observation', default=None)
+
+
+def start() -> tuple:
+    """Begin measuring a request; returns (observation, token) for finish()"""
+    observation = Observation()
+    return observation, _current.set(observation)
+
+
+def finish(token, observation: Observation, view: str, method: str, status: int, seconds: float) -> Dict[str, int]:
+    """Stop measuring a request; returns its increments for counters.incr_many()"""
+    _current.reset(token)
+    method = method if method in METHODS else 'other'
+    labels = f'view="{view}"'
+    amounts = {f'{REQUESTS}{{{labels},method="{method}",status="{status}"}}': 1}
+    observe(amounts, 'http_request_duration_seconds', labels, seconds)
+    observe(amounts, 'db_queries_per_request', labels, observation.queries)
+    observe(amounts, 'db_query_duration_seconds', labels, observation.query_seconds)
+    observe(amounts, 'template_render_duration_seconds', labels, observation.render_seconds)
+    return amounts
+
+
+def observe(amounts: Dict[str, int], metric: str, labels: str, value: float):
+    """
+    Add one histogram observation to a batch of counter increments
+
+    Args:
+        amounts: Increments for counters.incr_many()
+        metric: A name in HISTOGRAMS
+        labels: Label pairs as in the exposition format, e.g. 'view="home"'
+        value: The observed value
+    """
+    bounds = HISTOGRAMS[metric][1]
+    le = next((_format(bound) for bound in bounds if value <= bound), '+Inf')
+    amounts[f'{metric}_bucket{{{labels},le="{le}"}}'] = 1
+    seconds = metric.endswith('_seconds')
+    amounts[f'{metric}_sum{{{labels}}}'] = round(value * 1_000_000) if seconds else value
+
+
+def _format(bound) -> str:
+    return repr(float(bound)) if isinstance(bound, float) else str(bound)
+
+
+def view_label(request) -> str:
+    """URL name of the view that answered (the namespace for admin and other included apps)"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    if match.namespaces:
+        return match.namespaces[0]
+    return match.url_name or 'unnamed'
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting the current request's queries and their time"""
+    observation = _current.get()
+    if observation is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        observation.queries += 1
+        observation.query_seconds += time.perf_counter() - started
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """connection_created handler: wrap every new connection's queries"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        observation = _current.get()
+        if observation is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            observation.render_seconds += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend adding render time to the current request's metrics"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+def _histogram_lines(metric: str, values: Dict[str, int]) -> List[str]:
+    help_text, bounds = HISTOGRAMS[metric]
+    buckets = defaultdict(dict)
+    sums = {}
+    for name, value in values.items():
+        match = _BUCKET.match(name)
+        if match and match.group(1) == metric:
+            buckets[match.group(2)][match.group(3)] = value
+            continue
+        match = _SUM.match(name)
+        if match and match.group(1) == metric:
+            sums[match.group(2)] = value / 1_000_000 if metric.endswith('_seconds') else value
+
+    if not buckets:
+        return []
+    lines = [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+    for labels in sorted(buckets):
+        total = 0
+        for le in [_format(bound) for bound in bounds] + ['+Inf']:
+            total += buckets[labels].get(le, 0)
+            lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {total}')
+        lines.append(f'{metric}_sum{{{labels}}} {sums.get(labels, 0)}')
+        lines.append(f'{metric}_count{{{labels}}} {total}')
+    return lines
+
+
+def _family(metric: str, kind: str, help_text: str, samples: Dict[str, float]) -> List[str]:
+    if not samples:
+        return []
+    lines = [f'# HELP {metric} {help_text}', f'# TYPE {metric} {kind}']
+    return lines + [f'{name} {value}' for name, value in sorted(samples.items())]
+
+
+def render() -> str:
+    """Every metric in the Prometheus text exposition format"""
+    values = counters.snapshot()
+    requests = {name: value for name, value in values.items() if name.startswith(REQUESTS + '{')}
+    lines = _family(REQUESTS, 'counter', 'Requests answered, per view, method and status', requests)
+    github_requests = {name: value for name, value in values.items() if name.startswith(GITHUB_REQUESTS + '{')}
+    lines += _family(GITHUB_REQUESTS, 'counter', 'GitHub API calls, per endpoint and status', github_requests)
+    for metric in HISTOGRAMS:
+        lines += _histogram_lines(metric, values)
+
+    # The shared event counters (show_counters) and the GitHub rate-limit budget
+    for name in sorted(name for name in values if '{' not in name):
+        lines += _family(f'{name}_total', 'counter', f'Events counted as {name}', {f'{name}_total': values[name]})
+    for name, value in sorted(github_ratelimit.gauges().items()):
+        lines += _family(name, 'gauge', 'GitHub rate-limit budget of the configured token', {name: value})
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,130 @@
+"""
+Middleware adapted for the ASGI application.
+"""
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import counters, github_trace, metrics
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that keeps the request on the event loop
+    
+    WhiteNoise's middleware is sync-only, which makes Django run every
+    request below it - async views included - in a thread of its own.
+    Static lookups are in-memory (or a stat() with autorefresh in
+    development), so they are done inline and other requests go straight
+    to the async handler.
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+    
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class MetricsMiddleware:
+    """
+    Per-view latency, query and template metrics (see main.metrics)
+    
+    Async-capable, so async views stay on the event loop. Disabled with
+    METRICS_ENABLED=False.
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        observation, token = metrics.start()
+        response = self.get_response(request)
+        counters.incr_many(self.record(request, response, observation, token, started))
+        return response
+    
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        observation, token = metrics.start()
+        response = await self.get_response(request)
+        counters.incr_many(self.record(request, response, observation, token, started))
+        return response
+    
+    def record(self, request, response, observation, token, started):
+        return metrics.finish(
+            token, observation, metrics.view_label(request), request.method, response.status_code,
+            time.perf_counter() - started,
+        )
+
+
+class GitHubTraceMiddleware:
+    """
+    Groups the GitHub calls a request makes (see main.github_trace)
+    
+    Logs their summary, counts them per view on /metrics and, with
+    GITHUB_TRACE_HEADER=True, reports them in an X-GitHub-Calls header
+    ("3; 812ms": calls and their summed latency).
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with github_trace.scope(f'{request.method} {request.path}') as trace:
+            response = self.get_response(request)
+        counters.incr_many(self.amounts(request, trace))
+        return self.report(response, trace)
+    
+    async def __acall__(self, request):
+        with github_trace.scope(f'{request.method} {request.path}') as trace:
+            response = await self.get_response(request)
+        counters.incr_many(self.amounts(request, trace))
+        return self.report(response, trace)
+    
+    def amounts(self, request, trace):
+        amounts = {}
+        if getattr(settings, 'METRICS_ENABLED', True):
+            metrics.observe(amounts, 'github_calls_per_request', f'view="{metrics.view_label(request)}"',
+                            len(trace.calls))
+        return amounts
+    
+    def report(self, response, trace):
+        if getattr(settings, 'GITHUB_TRACE_HEADER', False):
+            response['X-GitHub-Calls'] = trace.header()
+        return response
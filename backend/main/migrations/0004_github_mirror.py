@@ -0,0 +1,80 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_project_auto_status_enabled_project_auto_sync_issues_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepoSync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('repo_name', models.CharField(max_length=200, unique=True)),
+                ('backfilled_at', models.DateTimeField(blank=True, help_text='Last full backfill from the GitHub API', null=True)),
+                ('synced_at', models.DateTimeField(blank=True, help_text='Last mirror write (backfill or webhook)', null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GitHubCommit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('repo_name', models.CharField(max_length=200)),
+                ('sha', models.CharField(help_text='Short SHA as shown in the UI', max_length=40)),
+                ('message', models.CharField(max_length=500)),
+                ('author', models.CharField(blank=True, max_length=200)),
+                ('date', models.DateTimeField(blank=True, null=True)),
+                ('html_url', models.URLField(max_length=500)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['repo_name', '-date'], name='commit_repo_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('repo_name', 'sha'), name='unique_commit_per_repo')],
+            },
+        ),
+        migrations.CreateModel(
+            name='GitHubIssue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('repo_name', models.CharField(max_length=200)),
+                ('number', models.IntegerField()),
+                ('title', models.CharField(max_length=500)),
+                ('state', models.CharField(max_length=20)),
+                ('user', models.CharField(blank=True, max_length=100)),
+                ('labels', models.JSONField(blank=True, default=list)),
+                ('html_url', models.URLField(max_length=500)),
+                ('created_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'ordering': ['-number'],
+                'indexes': [models.Index(fields=['repo_name', 'state', '-number'], name='issue_repo_state_idx')],
+                'constraints': [models.UniqueConstraint(fields=('repo_name', 'number'), name='unique_issue_per_repo')],
+            },
+        ),
+        migrations.CreateModel(
+            name='GitHubPullRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('repo_name', models.CharField(max_length=200)),
+                ('number', models.IntegerField()),
+                ('title', models.CharField(max_length=500)),
+                ('state', models.CharField(max_length=20)),
+                ('user', models.CharField(blank=True, max_length=100)),
+                ('draft', models.BooleanField(default=False)),
+                ('html_url', models.URLField(max_length=500)),
+                ('created_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'ordering': ['-number'],
+                'indexes': [models.Index(fields=['repo_name', 'state', '-number'], name='pull_request_repo_state_idx')],
+                'constraints': [models.UniqueConstraint(fields=('repo_name', 'number'), name='unique_pull_request_per_repo')],
+            },
+        ),
+    ]
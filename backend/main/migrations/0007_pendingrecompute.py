@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_webhook_dedup_and_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingRecompute',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pending_recompute', serialize=False, to='main.project')),
+                ('full', models.BooleanField(default=False, help_text='Recompute status and risk, not only risk')),
+                ('marks', models.IntegerField(default=1, help_text='Events coalesced into this recompute')),
+                ('first_marked_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_marked_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:31
+
+import re
+
+from django.db import migrations, models
+
+ISSUE_TITLE = re.compile(r'^GH Issue #(\d+)\b')
+
+
+def link_existing_tasks(apps, schema_editor):
+    """Fill github_issue_number from titles written by the webhook sync"""
+    Task = apps.get_model('main', 'Task')
+    seen = set()
+    linked = []
+    tasks = Task.objects.filter(title__startswith='GH Issue #').order_by('id')
+    for task in tasks.only('id', 'project_id', 'title').iterator():
+        match = ISSUE_TITLE.match(task.title)
+        if not match:
+            continue
+        key = (task.project_id, int(match.group(1)))
+        # Duplicates stay unlinked; the oldest task keeps the issue
+        if key in seen:
+            continue
+        seen.add(key)
+        task.github_issue_number = key[1]
+        linked.append(task)
+    Task.objects.bulk_update(linked, ['github_issue_number'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_pendingrecompute'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='github_issue_number',
+            field=models.PositiveIntegerField(blank=True, help_text='GitHub issue this task was synced from', null=True),
+        ),
+        migrations.RunPython(link_existing_tasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Separate from 0008 so the data migration commits before the table is altered (PostgreSQL)
+    dependencies = [
+        ('main', '0008_task_github_issue_number'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(fields=('project', 'github_issue_number'), name='unique_task_github_issue'),
+        ),
+    ]
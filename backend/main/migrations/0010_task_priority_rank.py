@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_task_unique_github_issue'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='task',
+            options={'ordering': ['-priority_rank', 'due_date', '-created_at']},
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='priority_rank',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(priority='LOW', then=models.Value(1)), models.When(priority='MEDIUM', then=models.Value(2)), models.When(priority='HIGH', then=models.Value(3)), models.When(priority='URGENT', then=models.Value(4)), default=models.Value(2)), output_field=models.PositiveSmallIntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'priority_rank', 'due_date'], name='task_status_rank_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'due_date'], name='task_status_due_idx'),
+        ),
+    ]
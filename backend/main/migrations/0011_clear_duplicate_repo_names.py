@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:40
+
+from django.db import migrations
+
+
+def clear_duplicate_repo_names(apps, schema_editor):
+    """
+    Make repo_name unique ignoring case before 0012 enforces it.
+
+    The most recently updated project keeps the repository (it is the one
+    webhooks reached when several matched); the others have repo_name
+    cleared and a log entry saying so.
+    """
+    Project = apps.get_model('main', 'Project')
+    LogEntry = apps.get_model('main', 'LogEntry')
+    keepers = {}
+    for project in Project.objects.exclude(repo_name='').order_by('-updated_at', '-id'):
+        key = project.repo_name.lower()
+        if key not in keepers:
+            keepers[key] = project
+            continue
+        LogEntry.objects.create(
+            project=project,
+            message=(f"Repository {project.repo_name} unlinked: it is already linked to "
+                     f"project '{keepers[key].name}'"),
+        )
+        Project.objects.filter(pk=project.pk).update(repo_name='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_task_priority_rank'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_duplicate_repo_names, migrations.RunPython.noop),
+    ]
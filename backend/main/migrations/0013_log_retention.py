@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Message prefixes written by WebhookHandler before entries had an event_type
+WEBHOOK_PREFIXES = {
+    'PULL_REQUEST': 'PR #',
+    'ISSUE': 'Issue #',
+    'WORKFLOW': "Workflow '",
+}
+
+
+def classify_existing_entries(apps, schema_editor):
+    LogEntry = apps.get_model('main', 'LogEntry')
+    for event_type, prefix in WEBHOOK_PREFIXES.items():
+        LogEntry.objects.filter(message__startswith=prefix).update(event_type=event_type)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_repo_name_and_timeline_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logentry',
+            name='event_type',
+            field=models.CharField(choices=[('NOTE', 'Note'), ('PULL_REQUEST', 'Pull request'), ('ISSUE', 'Issue'), ('WORKFLOW', 'Workflow run')], default='NOTE', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='log_retention_days',
+            field=models.PositiveIntegerField(default=90, help_text='Days log entries are kept before prune_logs archives them (0 keeps them forever)'),
+        ),
+        migrations.CreateModel(
+            name='LogRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('event_type', models.CharField(choices=[('NOTE', 'Note'), ('PULL_REQUEST', 'Pull request'), ('ISSUE', 'Issue'), ('WORKFLOW', 'Workflow run')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='log_rollups', to='main.project')),
+            ],
+            options={
+                'ordering': ['-date', 'event_type'],
+                'constraints': [models.UniqueConstraint(fields=('project', 'date', 'event_type'), name='unique_log_rollup')],
+            },
+        ),
+        migrations.RunPython(classify_existing_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:47
+
+import django.db.models.deletion
+import main.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_live_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStats',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='main.project')),
+                ('open_tasks', models.IntegerField(default=0)),
+                ('urgent_tasks', models.IntegerField(default=0, help_text='Open HIGH and URGENT tasks')),
+                ('overdue_tasks', models.IntegerField(default=0, help_text='Open tasks due before overdue_as_of')),
+                ('overdue_as_of', models.DateField(db_index=True, default=main.models._today)),
+                ('last_activity_at', models.DateTimeField(blank=True, help_text='Latest log entry', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Project stats',
+            },
+        ),
+    ]
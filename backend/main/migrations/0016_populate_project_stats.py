@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:48
+
+from django.db import migrations
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+OPEN_TASK_STATUSES = ['TODO', 'IN_PROGRESS', 'BLOCKED']
+
+
+def populate_project_stats(apps, schema_editor):
+    """Count every project's tasks and logs once; writes keep the rows current from here on"""
+    Project = apps.get_model('main', 'Project')
+    ProjectStats = apps.get_model('main', 'ProjectStats')
+    LogEntry = apps.get_model('main', 'LogEntry')
+    today = timezone.now().date()
+    is_open = Q(tasks__status__in=OPEN_TASK_STATUSES)
+    counts = Project.objects.annotate(
+        open_count=Count('tasks', filter=is_open),
+        urgent_count=Count('tasks', filter=is_open & Q(tasks__priority__in=['HIGH', 'URGENT'])),
+        overdue_count=Count('tasks', filter=is_open & Q(tasks__due_date__lt=today)),
+    ).values_list('pk', 'open_count', 'urgent_count', 'overdue_count')
+    last_activity = dict(LogEntry.objects.values('project').annotate(latest=Max('timestamp'))
+                         .values_list('project', 'latest'))
+    ProjectStats.objects.bulk_create([
+        ProjectStats(project_id=pk, open_tasks=open_count, urgent_tasks=urgent_count,
+                     overdue_tasks=overdue_count, overdue_as_of=today,
+                     last_activity_at=last_activity.get(pk))
+        for pk, open_count, urgent_count, overdue_count in counts.iterator()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_project_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_project_stats, migrations.RunPython.noop),
+    ]
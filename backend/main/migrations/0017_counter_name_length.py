@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0016_populate_project_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='counter',
+            name='name',
+            field=models.CharField(max_length=200, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0017_counter_name_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='logentry',
+            index=models.Index(fields=['-timestamp', '-id'], name='logentry_time_id_idx'),
+        ),
+    ]
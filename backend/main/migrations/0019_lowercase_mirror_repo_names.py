@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:05
+
+from django.db import migrations
+
+
+def lowercase_mirror_repo_names(apps, schema_editor):
+    """
+    Key mirror rows by the lowercased repository name.
+
+    Backfills and webhooks could spell a repository in different cases
+    and so wrote separate rows. Where both spellings exist, the most
+    recently updated item wins and the freshness timestamps are merged.
+    """
+    RepoSync = apps.get_model('main', 'RepoSync')
+    for sync in RepoSync.objects.order_by('id'):
+        key = sync.repo_name.lower()
+        if key == sync.repo_name:
+            continue
+        existing = RepoSync.objects.filter(repo_name=key).first()
+        if existing is None:
+            RepoSync.objects.filter(pk=sync.pk).update(repo_name=key)
+            continue
+        for field in ('backfilled_at', 'synced_at'):
+            values = [value for value in (getattr(existing, field), getattr(sync, field)) if value]
+            setattr(existing, field, max(values) if values else None)
+        existing.save(update_fields=['backfilled_at', 'synced_at'])
+        sync.delete()
+
+    for model_name, identity, newest in (('GitHubPullRequest', 'number', 'updated_at'),
+                                         ('GitHubIssue', 'number', 'updated_at'),
+                                         ('GitHubCommit', 'sha', 'date')):
+        model = apps.get_model('main', model_name)
+        for item in model.objects.order_by('id'):
+            key = item.repo_name.lower()
+            if key == item.repo_name:
+                continue
+            existing = model.objects.filter(repo_name=key, **{identity: getattr(item, identity)}).first()
+            if existing is None:
+                model.objects.filter(pk=item.pk).update(repo_name=key)
+                continue
+            item_at, existing_at = getattr(item, newest), getattr(existing, newest)
+            if item_at and (not existing_at or item_at > existing_at):
+                existing.delete()
+                model.objects.filter(pk=item.pk).update(repo_name=key)
+            else:
+                item.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0018_logentry_time_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_mirror_repo_names, migrations.RunPython.noop),
+    ]
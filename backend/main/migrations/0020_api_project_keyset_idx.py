@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0019_lowercase_mirror_repo_names'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='logentry',
+            name='logentry_project_time_idx',
+        ),
+        migrations.AddIndex(
+            model_name='logentry',
+            index=models.Index(fields=['project', '-timestamp', '-id'], name='logentry_project_time_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'id'], name='task_project_id_idx'),
+        ),
+    ]
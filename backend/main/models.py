@@ -1,7 +1,58 @@
 from django.db import models
+from django.db.models import Case, Count, F, IntegerField, OuterRef, PositiveSmallIntegerField, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Lower
 from django.utils import timezone
 
 
+def _today():
+    return timezone.now().date()
+
+
+def _count_subquery(queryset):
+    """Correlated COUNT(*) over a queryset filtered with OuterRef('pk'), 0 when empty"""
+    counts = queryset.order_by().values('project').annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+class ProjectQuerySet(models.QuerySet):
+    
+    def for_repo(self, repo_name):
+        """
+        Projects linked to a GitHub repository, matched case-insensitively
+        
+        Phrased to match the unique_project_repo_name index (LOWER(repo_name),
+        non-empty names only) so webhook lookups are index searches.
+        """
+        return self.exclude(repo_name='').alias(repo_key=Lower('repo_name')).filter(
+            repo_key=(repo_name or '').lower(),
+        )
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        from . import project_stats
+        objs = super().bulk_create(objs, *args, **kwargs)
+        project_stats.create_rows([project.pk for project in objs if project.pk is not None])
+        return objs
+    
+    def with_stats(self, today=None):
+        """
+        Annotate open_tasks, urgent_tasks, overdue_tasks and last_log_at
+        from the ProjectStats rows: one join, no aggregation
+        
+        Rows not yet rolled over to today count their overdue tasks live.
+        """
+        today = today or timezone.now().date()
+        overdue = Task.objects.filter(project=OuterRef('pk'), status__in=OPEN_TASK_STATUSES, due_date__lt=today)
+        return self.annotate(
+            open_tasks=Coalesce(F('stats__open_tasks'), Value(0)),
+            urgent_tasks=Coalesce(F('stats__urgent_tasks'), Value(0)),
+            overdue_tasks=Case(
+                When(stats__overdue_as_of=today, then=F('stats__overdue_tasks')),
+                default=_count_subquery(overdue),
+            ),
+            last_log_at=F('stats__last_activity_at'),
+        )
+
+
 class Project(models.Model):
     """Main project model for FMU Control Panel"""
     
@@ -29,20 +80,103 @@ class Project(models.Model):
     auto_sync_issues = models.BooleanField(default=False, help_text="Automatically sync GitHub issues to tasks")
     auto_status_enabled = models.BooleanField(default=False, help_text="Enable automatic status updates from GitHub")
     stale_days = models.IntegerField(default=7, help_text="Days without commits before marked STALE")
+    log_retention_days = models.PositiveIntegerField(
+        default=90, help_text="Days log entries are kept before prune_logs archives them (0 keeps them forever)")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ProjectQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-updated_at']
+        constraints = [
+            # One project per repository; GitHub names are case-insensitive
+            models.UniqueConstraint(Lower('repo_name'), condition=~Q(repo_name=''),
+                                    name='unique_project_repo_name'),
+        ]
     
     def __str__(self):
         return self.name
     
     @property
     def open_tasks_count(self):
+        # Use the with_stats() annotation when present
+        if hasattr(self, 'open_tasks'):
+            return self.open_tasks
         return self.tasks.exclude(status='DONE').count()
 
 
+# Numeric order of Task.priority (the labels sort alphabetically, not by urgency)
+PRIORITY_RANKS = {'LOW': 1, 'MEDIUM': 2, 'HIGH': 3, 'URGENT': 4}
+
+# Task statuses that still need work
+OPEN_TASK_STATUSES = ['TODO', 'IN_PROGRESS', 'BLOCKED']
+
+
+class TaskQuerySet(models.QuerySet):
+    
+    # Fields the ProjectStats counts depend on
+    STATS_FIELDS = {'project', 'project_id', 'status', 'priority', 'due_date'}
+    
+    def update(self, **kwargs):
+        """update() that refreshes the ProjectStats of the projects it touches"""
+        if not self.STATS_FIELDS & kwargs.keys():
+            return super().update(**kwargs)
+        from . import project_stats
+        moved = 'project' in kwargs or 'project_id' in kwargs
+        if moved:
+            # The new project may be an expression (bulk_update() passes a Case):
+            # read where the rows ended up afterwards
+            before = list(self.order_by().values_list('pk', 'project_id'))
+            project_ids = {project_id for _, project_id in before}
+        else:
+            project_ids = set(self.order_by().values_list('project_id', flat=True).distinct())
+        rows = super().update(**kwargs)
+        if moved:
+            pks = [pk for pk, _ in before]
+            project_ids |= set(Task.objects.filter(pk__in=pks).values_list('project_id', flat=True).distinct())
+        project_stats.refresh(project_ids)
+        return rows
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        from . import project_stats
+        objs = super().bulk_create(objs, *args, **kwargs)
+        project_stats.refresh({task.project_id for task in objs})
+        return objs
+    
+    def delete(self):
+        """delete() that recounts and publishes each affected project once, not once per task"""
+        from . import live, project_stats
+        project_ids = set(self.order_by().values_list('project_id', flat=True).distinct())
+        result = super().delete()
+        project_stats.refresh(project_ids)
+        for project_id in sorted(project_ids):
+            live.publish(live.TASK_LIST, project_id)
+        return result
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        # Counts are refreshed by update() above; the instances now match their rows
+        from . import project_stats
+        objs = list(objs)
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        for task in objs:
+            task._stats_state = project_stats.loaded_state(task)
+        return rows
+    
+    def urgent(self, today=None):
+        """
+        Open tasks that are HIGH/URGENT or overdue, most urgent first
+        
+        Written so each side of the OR is served by one of Task's
+        composite indexes rather than a table scan.
+        """
+        today = today or timezone.now().date()
+        return self.filter(
+            Q(status__in=OPEN_TASK_STATUSES),
+            Q(priority_rank__gte=PRIORITY_RANKS['HIGH']) | Q(due_date__lt=today),
+        ).order_by('-priority_rank', 'due_date')
+
+
 class Task(models.Model):
     """Task model linked to projects"""
     
@@ -60,21 +194,60 @@ class Task(models.Model):
         ('URGENT', 'Urgent'),
     ]
     
-    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tasks')
+    # Indexed by the (project, ...) composite indexes below
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tasks', db_index=False)
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='TODO')
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='MEDIUM')
+    # Maintained by the database, so update() and bulk_create() keep it right too
+    priority_rank = models.GeneratedField(
+        expression=Case(
+            *[When(priority=priority, then=Value(rank)) for priority, rank in PRIORITY_RANKS.items()],
+            default=Value(PRIORITY_RANKS['MEDIUM']),
+        ),
+        output_field=PositiveSmallIntegerField(),
+        db_persist=True,
+    )
     due_date = models.DateField(null=True, blank=True)
+    github_issue_number = models.PositiveIntegerField(null=True, blank=True,
+                                                      help_text="GitHub issue this task was synced from")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = TaskQuerySet.as_manager()
+    
     class Meta:
-        ordering = ['-priority', 'due_date', '-created_at']
+        ordering = ['-priority_rank', 'due_date', '-created_at']
+        indexes = [
+            models.Index(fields=['project', 'status'], name='task_project_status_idx'),
+            # Keyset pages of one project's tasks (main.api)
+            models.Index(fields=['project', 'id'], name='task_project_id_idx'),
+            models.Index(fields=['status', 'priority_rank', 'due_date'], name='task_status_rank_due_idx'),
+            models.Index(fields=['status', 'due_date'], name='task_status_due_idx'),
+        ]
+        constraints = [
+            # Also the index behind issue lookups from webhooks and reconcile_issues
+            models.UniqueConstraint(fields=['project', 'github_issue_number'], name='unique_task_github_issue'),
+        ]
     
     def __str__(self):
         return f"{self.project.name} - {self.title}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        from . import project_stats
+        task = super().from_db(db, field_names, values)
+        # What the task counted for when loaded, so saves can apply ProjectStats deltas
+        task._stats_state = project_stats.loaded_state(task)
+        return task
+    
+    def refresh_from_db(self, *args, **kwargs):
+        from . import project_stats
+        super().refresh_from_db(*args, **kwargs)
+        # Reloaded fields replace the state the instance was loaded with
+        self._stats_state = project_stats.loaded_state(self)
+    
     @property
     def is_urgent(self):
         """Check if task is urgent based on priority or due date"""
@@ -108,16 +281,299 @@ class Link(models.Model):
         return f"{self.project.name} - {self.title}"
 
 
+class LogEntryQuerySet(models.QuerySet):
+    
+    # Fields ProjectStats.last_activity_at depends on
+    STATS_FIELDS = {'project', 'project_id', 'timestamp'}
+    
+    def update(self, **kwargs):
+        """update() that recomputes last_activity_at of the projects it touches"""
+        if not self.STATS_FIELDS & kwargs.keys():
+            return super().update(**kwargs)
+        from . import project_stats
+        moved = 'project' in kwargs or 'project_id' in kwargs
+        if moved:
+            # Read where the rows ended up afterwards, as TaskQuerySet.update() does
+            before = list(self.order_by().values_list('pk', 'project_id'))
+            project_ids = {project_id for _, project_id in before}
+        else:
+            project_ids = set(self.order_by().values_list('project_id', flat=True).distinct())
+        rows = super().update(**kwargs)
+        if moved:
+            pks = [pk for pk, _ in before]
+            project_ids |= set(LogEntry.objects.filter(pk__in=pks).values_list('project_id', flat=True).distinct())
+        project_stats.refresh_last_activity(project_ids)
+        return rows
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        from . import project_stats
+        objs = super().bulk_create(objs, *args, **kwargs)
+        project_stats.refresh_last_activity({entry.project_id for entry in objs})
+        return objs
+    
+    def delete(self):
+        """delete() that moves ProjectStats.last_activity_at back if the latest entries went"""
+        from . import project_stats
+        project_ids = set(self.order_by().values_list('project_id', flat=True).distinct())
+        result = super().delete()
+        project_stats.refresh_last_activity(project_ids)
+        return result
+
+
 class LogEntry(models.Model):
     """Log entry model for project activity tracking"""
     
-    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='logs')
+    EVENT_TYPE_CHOICES = [
+        ('NOTE', 'Note'),
+        ('PULL_REQUEST', 'Pull request'),
+        ('ISSUE', 'Issue'),
+        ('WORKFLOW', 'Workflow run'),
+    ]
+    
+    # Indexed by logentry_project_time_id_idx
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='logs', db_index=False)
     message = models.TextField()
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPE_CHOICES, default='NOTE')
     timestamp = models.DateTimeField(default=timezone.now)
     
+    objects = LogEntryQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-timestamp']
         verbose_name_plural = 'Log entries'
+        indexes = [
+            # Serves project.logs.all()[:N] without sorting every entry, and keyset
+            # pages of one project's entries (main.api)
+            models.Index(fields=['project', '-timestamp', '-id'], name='logentry_project_time_id_idx'),
+            # Keyset pages of all entries, newest first (main.api), and prune_logs' cutoff
+            models.Index(fields=['-timestamp', '-id'], name='logentry_time_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.project.name} - {self.timestamp.strftime('%Y-%m-%d %H:%M')}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        from . import project_stats
+        entry = super().from_db(db, field_names, values)
+        # Where the entry stood when loaded, so saves that move it can recount last_activity_at
+        entry._stats_state = project_stats.loaded_log_state(entry)
+        return entry
+    
+    def refresh_from_db(self, *args, **kwargs):
+        from . import project_stats
+        super().refresh_from_db(*args, **kwargs)
+        self._stats_state = project_stats.loaded_log_state(self)
+
+
+class LogRollup(models.Model):
+    """Daily log entry counts per event type, kept after prune_logs archives the entries"""
+    
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='log_rollups')
+    date = models.DateField()
+    event_type = models.CharField(max_length=20, choices=LogEntry.EVENT_TYPE_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-date', 'event_type']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'date', 'event_type'], name='unique_log_rollup'),
+        ]
+    
+    def __str__(self):
+        return f"{self.project.name} - {self.date} {self.event_type}: {self.count}"
+
+
+class RepoSync(models.Model):
+    """Freshness bookkeeping for a mirrored GitHub repository"""
+    
+    repo_name = models.CharField(max_length=200, unique=True)
+    backfilled_at = models.DateTimeField(null=True, blank=True, help_text="Last full backfill from the GitHub API")
+    synced_at = models.DateTimeField(null=True, blank=True, help_text="Last mirror write (backfill or webhook)")
+    
+    def __str__(self):
+        return self.repo_name
+
+
+class GitHubPullRequest(models.Model):
+    """Local mirror of a GitHub pull request"""
+    
+    repo_name = models.CharField(max_length=200)
+    number = models.IntegerField()
+    title = models.CharField(max_length=500)
+    state = models.CharField(max_length=20)
+    user = models.CharField(max_length=100, blank=True)
+    draft = models.BooleanField(default=False)
+    html_url = models.URLField(max_length=500)
+    created_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    
+    class Meta:
+        ordering = ['-number']
+        constraints = [
+            models.UniqueConstraint(fields=['repo_name', 'number'], name='unique_pull_request_per_repo'),
+        ]
+        indexes = [
+            models.Index(fields=['repo_name', 'state', '-number'], name='pull_request_repo_state_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.repo_name}#{self.number}"
+
+
+class GitHubCommit(models.Model):
+    """Local mirror of a commit on a repository's default branch"""
+    
+    repo_name = models.CharField(max_length=200)
+    sha = models.CharField(max_length=40, help_text="Short SHA as shown in the UI")
+    message = models.CharField(max_length=500)
+    author = models.CharField(max_length=200, blank=True)
+    date = models.DateTimeField(null=True, blank=True)
+    html_url = models.URLField(max_length=500)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['repo_name', 'sha'], name='unique_commit_per_repo'),
+        ]
+        indexes = [
+            models.Index(fields=['repo_name', '-date'], name='commit_repo_date_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.repo_name}@{self.sha}"
+
+
+class GitHubIssue(models.Model):
+    """Local mirror of a GitHub issue (pull requests excluded)"""
+    
+    repo_name = models.CharField(max_length=200)
+    number = models.IntegerField()
+    title = models.CharField(max_length=500)
+    state = models.CharField(max_length=20)
+    user = models.CharField(max_length=100, blank=True)
+    labels = models.JSONField(default=list, blank=True)
+    html_url = models.URLField(max_length=500)
+    created_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    
+    class Meta:
+        ordering = ['-number']
+        constraints = [
+            models.UniqueConstraint(fields=['repo_name', 'number'], name='unique_issue_per_repo'),
+        ]
+        indexes = [
+            models.Index(fields=['repo_name', 'state', '-number'], name='issue_repo_state_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.repo_name}#{self.number}"
+
+
+class WebhookDelivery(models.Model):
+    """Raw GitHub webhook delivery waiting for (or done with) background processing"""
+    
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('PROCESSING', 'Processing'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed (will retry)'),
+        ('DEAD', 'Dead letter'),
+    ]
+    
+    delivery_id = models.CharField(max_length=100, blank=True, help_text="X-GitHub-Delivery header")
+    event = models.CharField(max_length=50)
+    payload = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(default=timezone.now)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Earliest time of the next attempt")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name_plural = 'Webhook deliveries'
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='webhook_queue_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.event} {self.delivery_id or self.pk} ({self.status})"
+
+
+class WebhookDeliveryKey(models.Model):
+    """Seen X-GitHub-Delivery GUIDs, used to drop redelivered webhooks"""
+    
+    guid = models.UUIDField(primary_key=True)
+    received_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    def __str__(self):
+        return str(self.guid)
+
+
+class Counter(models.Model):
+    """Monotonic event counter shared by all worker processes (see main.counters)"""
+    
+    # Long enough for labelled metric samples (main.metrics)
+    name = models.CharField(max_length=200, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name}={self.value}"
+
+
+class PendingRecompute(models.Model):
+    """Project whose automatic status/risk must be recomputed (see main.recompute)"""
+    
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name='pending_recompute')
+    full = models.BooleanField(default=False, help_text="Recompute status and risk, not only risk")
+    marks = models.IntegerField(default=1, help_text="Events coalesced into this recompute")
+    first_marked_at = models.DateTimeField(default=timezone.now)
+    last_marked_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    def __str__(self):
+        return f"{self.project.name} ({self.marks} marks)"
+
+
+class LiveEvent(models.Model):
+    """Change pushed to open dashboard and project pages (see main.live)"""
+    
+    KIND_CHOICES = [
+        ('PROJECT', 'Project changed'),
+        ('TASK', 'Task changed'),
+        ('TASK_LIST', 'Tasks added or removed'),
+    ]
+    
+    # Plain ids, not foreign keys: deletions are events too
+    project_id = models.BigIntegerField()
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"{self.kind} project={self.project_id} object={self.object_id}"
+
+
+class ProjectStats(models.Model):
+    """Per-project dashboard counts, maintained on every task and log write (see main.project_stats)"""
+    
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    open_tasks = models.IntegerField(default=0)
+    urgent_tasks = models.IntegerField(default=0, help_text="Open HIGH and URGENT tasks")
+    overdue_tasks = models.IntegerField(default=0, help_text="Open tasks due before overdue_as_of")
+    overdue_as_of = models.DateField(default=_today, db_index=True)
+    last_activity_at = models.DateTimeField(null=True, blank=True, help_text="Latest log entry")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'Project stats'
+    
+    def __str__(self):
+        return f"{self.project_id}: {self.open_tasks} open, {self.urgent_tasks} urgent, {self.overdue_tasks} overdue"
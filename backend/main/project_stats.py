@@ -0,0 +1,254 @@
+"""
+Incrementally maintained per-project counts (ProjectStats).
+
+Every task write moves its project's open, urgent and overdue counts by
+the difference between what the task counted for before and after:
+single saves through model signals (main.signals), using the values the
+task was loaded with, and deletes, QuerySet.update(), bulk_create() and
+bulk_update() by recounting the projects they touched. New log entries
+move last_activity_at forward; deleting an entry or changing its
+timestamp or project recounts it from the remaining entries. The
+dashboard then reads one row per project instead of aggregating tasks
+and logs.
+
+"Overdue" depends on the date, so each row counts tasks due before its
+overdue_as_of; roll_over() moves rows to a new day and readers count
+live for rows that have not been rolled over yet. check() reports rows
+that drifted from the raw data and rebuild() recounts them
+(python manage.py rebuild_stats).
+"""
+from collections import namedtuple
+from typing import Iterable, List, Optional, Tuple
+
+from django.db.models import Case, F, OuterRef, Q, Subquery, Value, When
+from django.utils import timezone
+
+from .models import (
+    OPEN_TASK_STATUSES, PRIORITY_RANKS, LogEntry, Project, ProjectStats, Task, _count_subquery,
+)
+
+# What a task contributes to its project's counts depends only on these
+TaskState = namedtuple('TaskState', ['project_id', 'status', 'priority', 'due_date'])
+
+# ... and what a log entry contributes to last_activity_at on these
+LogState = namedtuple('LogState', ['project_id', 'timestamp'])
+
+# Recounts touch at most this many projects per statement
+BATCH_SIZE = 500
+
+
+def _today():
+    return timezone.now().date()
+
+
+def loaded_state(task) -> Optional[TaskState]:
+    """A loaded task's state, or None if a field it depends on was deferred"""
+    if {'project_id', 'status', 'priority', 'due_date'} & task.get_deferred_fields():
+        return None
+    return TaskState(task.project_id, task.status, task.priority, task.due_date)
+
+
+def loaded_log_state(entry) -> Optional[LogState]:
+    """A loaded log entry's state, or None if a field it depends on was deferred"""
+    if {'project_id', 'timestamp'} & entry.get_deferred_fields():
+        return None
+    return LogState(entry.project_id, entry.timestamp)
+
+
+def _contribution(state: Optional[TaskState]) -> Tuple[int, int, Optional[object]]:
+    """(open, urgent, due date counted for overdue) of one task"""
+    if state is None or state.status not in OPEN_TASK_STATUSES:
+        return 0, 0, None
+    urgent = PRIORITY_RANKS.get(state.priority, PRIORITY_RANKS['MEDIUM']) >= PRIORITY_RANKS['HIGH']
+    return 1, int(urgent), state.due_date
+
+
+def _overdue(due_date):
+    # Compared with the row's own overdue_as_of, so a delta applied on a new day
+    # before the row was rolled over still matches what the row counts
+    if due_date is None:
+        return Value(0)
+    return Case(When(overdue_as_of__gt=due_date, then=Value(1)), default=Value(0))
+
+
+def _apply(project_id: int, old: Optional[TaskState], new: Optional[TaskState]):
+    """Move a project's counts from a task's old state to its new one (None: absent)"""
+    old_open, old_urgent, old_due = _contribution(old)
+    new_open, new_urgent, new_due = _contribution(new)
+    if (old_open, old_urgent, old_due) == (new_open, new_urgent, new_due):
+        return
+    ProjectStats.objects.filter(project_id=project_id).update(
+        open_tasks=F('open_tasks') + (new_open - old_open),
+        urgent_tasks=F('urgent_tasks') + (new_urgent - old_urgent),
+        overdue_tasks=F('overdue_tasks') + _overdue(new_due) - _overdue(old_due),
+        updated_at=timezone.now(),
+    )
+
+
+def task_saved(task, created: bool, update_fields=None):
+    """Apply a saved task's change (post_save)"""
+    old = None if created else getattr(task, '_stats_state', None)
+    if old is None and not created:
+        # Not loaded from the database (or loaded with deferred fields): recount
+        refresh({task.project_id})
+        task._stats_state = TaskState(task.project_id, task.status, task.priority, task.due_date)
+        return
+
+    new = TaskState(task.project_id, task.status, task.priority, task.due_date)
+    if update_fields is not None and old is not None:
+        # Fields left out of update_fields were not written
+        written = {'project_id' if name == 'project' else name for name in update_fields}
+        new = TaskState(*(getattr(new, field) if field in written else getattr(old, field)
+                          for field in TaskState._fields))
+
+    if old is not None and old.project_id != new.project_id:
+        _apply(old.project_id, old, None)
+        _apply(new.project_id, None, new)
+    else:
+        _apply(new.project_id, old, new)
+    task._stats_state = new
+
+
+def task_deleted(task):
+    """Recount a deleted task's project (post_delete of a single task)"""
+    # The instance may be older than the row it deleted; a recount of one project does not care
+    state = getattr(task, '_stats_state', None)
+    refresh({task.project_id, state.project_id if state else None})
+
+
+def log_added(entry):
+    """Move last_activity_at forward to a new log entry"""
+    ProjectStats.objects.filter(
+        Q(last_activity_at__isnull=True) | Q(last_activity_at__lt=entry.timestamp),
+        project_id=entry.project_id,
+    ).update(last_activity_at=entry.timestamp)
+
+
+def log_saved(entry, created: bool, update_fields=None):
+    """Apply a saved log entry to last_activity_at (post_save)"""
+    old = None if created else getattr(entry, '_stats_state', None)
+    new = LogState(entry.project_id, entry.timestamp)
+    if update_fields is not None and old is not None:
+        written = {'project_id' if name == 'project' else name for name in update_fields}
+        new = LogState(*(getattr(new, field) if field in written else getattr(old, field)
+                         for field in LogState._fields))
+    entry._stats_state = new
+    if created:
+        log_added(entry)
+    elif old != new:
+        # Moved back in time or to another project (or not loaded from the database): recount
+        refresh_last_activity({new.project_id, old.project_id if old else None})
+
+
+def log_deleted(entry):
+    """Recount last_activity_at of a deleted log entry's project (post_delete of a single entry)"""
+    state = getattr(entry, '_stats_state', None)
+    refresh_last_activity({entry.project_id, state.project_id if state else None})
+
+
+def create_rows(project_ids: Iterable[int]):
+    """Stats rows for new projects (existing rows are kept)"""
+    ProjectStats.objects.bulk_create(
+        [ProjectStats(project_id=project_id, overdue_as_of=_today()) for project_id in project_ids],
+        ignore_conflicts=True,
+    )
+
+
+def _open_tasks(**filters):
+    return Task.objects.filter(project=OuterRef('pk'), status__in=OPEN_TASK_STATUSES, **filters)
+
+
+def _actual_counts(today=None):
+    """Counts recomputed from the raw rows, as expressions over ProjectStats"""
+    return {
+        'open_tasks': _count_subquery(_open_tasks()),
+        'urgent_tasks': _count_subquery(_open_tasks(priority_rank__gte=PRIORITY_RANKS['HIGH'])),
+        'overdue_tasks': _count_subquery(
+            _open_tasks(due_date__lt=today if today else OuterRef('overdue_as_of'))
+        ),
+    }
+
+
+def _last_activity():
+    latest = LogEntry.objects.filter(project=OuterRef('pk')).order_by('-timestamp')
+    return Subquery(latest.values('timestamp')[:1])
+
+
+def _batches(project_ids):
+    project_ids = sorted(project_ids)
+    for start in range(0, len(project_ids), BATCH_SIZE):
+        yield project_ids[start:start + BATCH_SIZE]
+
+
+def refresh(project_ids: Iterable[Optional[int]]):
+    """Recount the task counts of some projects (after update() and bulk writes)"""
+    project_ids = {project_id for project_id in project_ids if project_id is not None}
+    today = _today()
+    for batch in _batches(project_ids):
+        ProjectStats.objects.filter(project_id__in=batch).update(
+            overdue_as_of=today, updated_at=timezone.now(), **_actual_counts(today),
+        )
+
+
+def refresh_last_activity(project_ids: Iterable[Optional[int]]):
+    project_ids = {project_id for project_id in project_ids if project_id is not None}
+    for batch in _batches(project_ids):
+        ProjectStats.objects.filter(project_id__in=batch).update(last_activity_at=_last_activity())
+
+
+def roll_over(today=None) -> int:
+    """Recount overdue tasks of rows last counted on an earlier day"""
+    today = today or _today()
+    return ProjectStats.objects.filter(overdue_as_of__lt=today).update(
+        overdue_tasks=_actual_counts(today)['overdue_tasks'], overdue_as_of=today, updated_at=timezone.now(),
+    )
+
+
+def check() -> List[Tuple[int, str, object, object]]:
+    """
+    Compare every stats row with the raw rows it summarises
+
+    Returns:
+        (project_id, field, stored, actual) for every mismatch; projects
+        without a stats row are reported with field 'row'
+    """
+    drift = [
+        (project_id, 'row', None, 'missing')
+        for project_id in Project.objects.filter(stats__isnull=True).values_list('pk', flat=True)
+    ]
+    fields = ['open_tasks', 'urgent_tasks', 'overdue_tasks', 'last_activity_at']
+    actual = ProjectStats.objects.annotate(
+        last_activity=_last_activity(),
+        **{f'actual_{name}': expression for name, expression in _actual_counts().items()},
+    ).order_by('project_id')
+    for row in actual:
+        for field in fields:
+            stored = getattr(row, field)
+            expected = row.last_activity if field == 'last_activity_at' else getattr(row, f'actual_{field}')
+            if stored != expected:
+                drift.append((row.project_id, field, stored, expected))
+    return drift
+
+
+def rebuild(project_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recount stats rows from scratch, creating missing ones
+
+    Args:
+        project_ids: Projects to rebuild (default: all)
+
+    Returns:
+        Number of rows rebuilt
+    """
+    if project_ids is None:
+        project_ids = Project.objects.values_list('pk', flat=True)
+    project_ids = set(project_ids)
+    create_rows(project_ids)
+    today = _today()
+    rebuilt = 0
+    for batch in _batches(project_ids):
+        rebuilt += ProjectStats.objects.filter(project_id__in=batch).update(
+            overdue_as_of=today, last_activity_at=_last_activity(), updated_at=timezone.now(),
+            **_actual_counts(today),
+        )
+    return rebuilt
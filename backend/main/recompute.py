@@ -0,0 +1,100 @@
+"""
+Debounced, coalesced StatusEngine recomputation.
+
+Webhook handlers mark a project dirty instead of recomputing inline. A
+project is recomputed once it has been quiet for STATUS_RECOMPUTE_WINDOW
+seconds, or at the latest STATUS_RECOMPUTE_MAX_WAIT seconds after the
+first mark, so a burst of 50 label edits costs one recompute and status
+is never staler than the cap. process_webhooks runs due recomputes.
+A recompute that fails is logged and its marks are put back, so it is
+retried after another window.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import counters
+from .models import PendingRecompute
+from .status_engine import StatusEngine
+
+logger = logging.getLogger(__name__)
+
+
+def _recompute(project, full):
+    engine = StatusEngine(project)
+    if full:
+        return engine.auto_update()
+    return engine.update_risk()
+
+
+def schedule(project, full=True):
+    """
+    Mark a project for recomputation
+
+    Args:
+        project: Project with auto_status_enabled
+        full: Recompute status and risk (pull_request events); False
+            recomputes only risk (issues events)
+    """
+    if getattr(settings, 'STATUS_RECOMPUTE_WINDOW', 30) <= 0:
+        # Debouncing disabled: behave like the original inline recompute
+        counters.incr('status_recomputes')
+        return _recompute(project, full)
+
+    _mark(project, full)
+    return False
+
+
+def _mark(project, full, marks=1):
+    """Add marks to a project's pending row, creating it if needed"""
+    now = timezone.now()
+    changes = {'marks': F('marks') + marks, 'last_marked_at': now}
+    if full:
+        changes['full'] = True
+    if PendingRecompute.objects.filter(project=project).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            PendingRecompute.objects.create(
+                project=project, full=full, marks=marks, first_marked_at=now, last_marked_at=now,
+            )
+    except IntegrityError:
+        PendingRecompute.objects.filter(project=project).update(**changes)
+
+
+def run_due(now=None):
+    """
+    Recompute every project whose window elapsed or whose cap was reached
+
+    Returns:
+        Number of projects recomputed
+    """
+    now = now or timezone.now()
+    window = timedelta(seconds=getattr(settings, 'STATUS_RECOMPUTE_WINDOW', 30))
+    max_wait = timedelta(seconds=getattr(settings, 'STATUS_RECOMPUTE_MAX_WAIT', 120))
+    due = PendingRecompute.objects.filter(
+        Q(last_marked_at__lte=now - window) | Q(first_marked_at__lte=now - max_wait)
+    ).select_related('project')
+
+    recomputed = 0
+    for pending in due:
+        # Claim the row; a mark that arrived since we read it keeps it pending
+        claimed, _ = PendingRecompute.objects.filter(project=pending.project, marks=pending.marks).delete()
+        if not claimed:
+            continue
+        try:
+            _recompute(pending.project, pending.full)
+        except Exception:
+            # Put the claimed marks back as new ones: retried after another window, not in a tight loop
+            logger.exception("Status recompute failed for project %s", pending.project_id)
+            counters.incr('status_recompute_failures')
+            _mark(pending.project, pending.full, pending.marks)
+            continue
+        recomputed += 1
+        counters.incr('status_recomputes')
+        counters.incr('status_recomputes_saved', pending.marks - 1)
+    return recomputed
@@ -0,0 +1,184 @@
+"""
+Per-repository cache of the GitHub data views show.
+
+Pull requests, commits, issues and repository info are cached per
+repository and kind, so page loads make no GitHub calls while an entry
+is fresh (the response cache in main.github_cache still sends a
+conditional request every time). An entry turns stale once it is older
+than its kind's TTL (GITHUB_DATA_CACHE_TTLS), or when a webhook for its
+repository invalidates the kinds it affects (a pull_request event makes
+that repository's pull requests stale and nothing else).
+
+Stale entries are still served - at once, marked stale - for
+GITHUB_DATA_CACHE_STALE_TTL seconds while one background refresh per
+entry replaces them (stale-while-revalidate): begin_refresh() takes a
+cache lock, so concurrent requests for the same repository cause one
+upstream fetch between them.
+
+Entries live in the GITHUB_DATA_CACHE_ALIAS Django cache: local memory
+in development, the shared database cache in production so the webhook
+worker's invalidations and the refresh locks reach every web worker.
+Hits, stale hits and misses are counted per kind (show_counters).
+"""
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from django.conf import settings
+
+from . import counters
+
+PULL_REQUESTS = 'pull_requests'
+COMMITS = 'commits'
+ISSUES = 'issues'
+REPO = 'repo'
+
+# Seconds each kind stays fresh when no webhook invalidates it first; 0 disables caching it
+DEFAULT_TTLS = {PULL_REQUESTS: 120, COMMITS: 300, ISSUES: 300, REPO: 3600}
+
+
+class Key(NamedTuple):
+    """One cached value: a kind of data for a repository, with the request parameters"""
+    repo_name: str
+    kind: str
+    variant: str = ''
+
+
+def _cache():
+    from django.core.cache import caches
+    return caches[getattr(settings, 'GITHUB_DATA_CACHE_ALIAS', 'default')]
+
+
+def ttl(kind: str) -> int:
+    return getattr(settings, 'GITHUB_DATA_CACHE_TTLS', {}).get(kind, DEFAULT_TTLS[kind])
+
+
+def stale_ttl() -> int:
+    return getattr(settings, 'GITHUB_DATA_CACHE_STALE_TTL', 86400)
+
+
+def _prefix(repo_name: str, kind: str) -> str:
+    # GitHub repository names are case-insensitive
+    return f'github:data:{repo_name.lower()}:{kind}'
+
+
+def _entry_key(key: Key) -> str:
+    return f'{_prefix(key.repo_name, key.kind)}:{key.variant}'
+
+
+def _invalidated_key(repo_name: str, kind: str) -> str:
+    return f'{_prefix(repo_name, kind)}:invalidated'
+
+
+def _lock_key(key: Key) -> str:
+    return f'{_entry_key(key)}:refreshing'
+
+
+def lookup(keys: Iterable[Key]) -> Dict[Key, Dict]:
+    """
+    Read cached values
+
+    Returns:
+        Entry per cached key: {'data', 'fetched_at' (epoch seconds),
+        'stale'}. Missing keys are absent.
+    """
+    keys = [key for key in set(keys) if ttl(key.kind)]
+    if not keys:
+        return {}
+    invalidated_keys = {key: _invalidated_key(key.repo_name, key.kind) for key in keys}
+    try:
+        found = _cache().get_many([_entry_key(key) for key in keys] + list(set(invalidated_keys.values())))
+    except Exception:
+        # A cache outage must not take the pages down with it
+        return {}
+
+    now = time.time()
+    hits = {}
+    for key in keys:
+        entry = found.get(_entry_key(key))
+        if entry is None:
+            counters.incr(f'github_data_cache_misses_{key.kind}')
+            continue
+        stale = (now - entry['fetched_at'] > ttl(key.kind)
+                 or entry['fetched_at'] <= found.get(invalidated_keys[key], 0))
+        counters.incr(f'github_data_cache_{"stale" if stale else "hits"}_{key.kind}')
+        hits[key] = dict(entry, stale=stale)
+    return hits
+
+
+def store(values: Dict[Key, object], started: float):
+    """
+    Cache fetched values
+
+    Args:
+        values: Data per key; None (a failed fetch) is never stored
+        started: When the fetch started (time.time()); an invalidation
+            that arrived while it ran leaves the stored values stale
+    """
+    entries = {
+        _entry_key(key): {'data': data, 'fetched_at': started}
+        for key, data in values.items() if data is not None and ttl(key.kind)
+    }
+    if not entries:
+        return
+    try:
+        _cache().set_many(entries, stale_ttl())
+    except Exception:
+        pass
+
+
+def invalidate(repo_name: str, kinds: Iterable[str]):
+    """Mark every cached variant of some kinds of a repository's data stale"""
+    try:
+        _cache().set_many({_invalidated_key(repo_name, kind): time.time() for kind in kinds}, stale_ttl())
+    except Exception:
+        pass
+
+
+def begin_refresh(keys: Iterable[Key]) -> List[Key]:
+    """
+    Claim the refresh of stale keys (single flight across processes)
+
+    Returns:
+        The keys this caller must refresh and then release with
+        end_refresh(); keys another request is already refreshing are left out
+    """
+    timeout = getattr(settings, 'GITHUB_DATA_REFRESH_LOCK', 60)
+    claimed = []
+    for key in keys:
+        try:
+            if _cache().add(_lock_key(key), time.time(), timeout):
+                claimed.append(key)
+        except Exception:
+            pass
+    return claimed
+
+
+def end_refresh(keys: Iterable[Key]):
+    try:
+        _cache().delete_many([_lock_key(key) for key in keys])
+    except Exception:
+        pass
+
+
+def oldest(entries: Iterable[Dict]) -> Optional[datetime]:
+    """When the oldest of some entries was fetched (None without entries)"""
+    fetched = [entry['fetched_at'] for entry in entries]
+    return datetime.fromtimestamp(min(fetched), timezone.utc) if fetched else None
+
+
+def hit_rates(values: Dict[str, int]) -> Dict[str, float]:
+    """Share of lookups (0-1) answered from the cache, fresh or stale, per kind and 'all'"""
+    rates = {}
+    totals = defaultdict(int)
+    for kind in DEFAULT_TTLS:
+        counts = {outcome: values.get(f'github_data_cache_{outcome}_{kind}', 0)
+                  for outcome in ('hits', 'stale', 'misses')}
+        for outcome, count in counts.items():
+            totals[outcome] += count
+        if sum(counts.values()):
+            rates[kind] = (counts['hits'] + counts['stale']) / sum(counts.values())
+    if sum(totals.values()):
+        rates['all'] = (totals['hits'] + totals['stale']) / sum(totals.values())
+    return rates
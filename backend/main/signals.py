@@ -0,0 +1,75 @@
+"""
+Model signal handlers that record live updates (see main.live) and keep
+ProjectStats counts current (see main.project_stats).
+
+update(), bulk_create() and bulk_update() send no signals; code using
+them calls live.publish() itself, and TaskQuerySet / LogEntryQuerySet
+recount the stats of the projects they touch. QuerySet.delete() does send
+post_delete per row; TaskQuerySet.delete() and LogEntryQuerySet.delete()
+recount once per project instead, so the per-row handlers only act on
+single deletes.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import live, project_stats
+from .models import LogEntry, Project, Task
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def project_changed(sender, instance, **kwargs):
+    live.publish(live.PROJECT, instance.pk)
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    # A new task changes the list; an edit only its own row
+    live.publish(live.TASK_LIST if created else live.TASK, instance.project_id, instance.pk)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, origin=None, **kwargs):
+    # TaskQuerySet.delete() publishes once per project; a deleted project publishes itself
+    if isinstance(origin, Task):
+        live.publish(live.TASK_LIST, instance.project_id, instance.pk)
+
+
+@receiver(post_save, sender=LogEntry)
+def log_added(sender, instance, created, **kwargs):
+    if created:
+        # The dashboard card shows the time of the latest entry
+        live.publish(live.PROJECT, instance.project_id)
+
+
+@receiver(post_save, sender=Project)
+def project_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        project_stats.create_rows([instance.pk])
+
+
+@receiver(post_save, sender=Task)
+def task_stats_saved(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if not raw:
+        project_stats.task_saved(instance, created, update_fields)
+
+
+@receiver(post_delete, sender=Task)
+def task_stats_deleted(sender, instance, origin=None, **kwargs):
+    # Only single deletes: TaskQuerySet.delete() recounts once per project, and a
+    # deleted project's tasks go together with its stats row
+    if isinstance(origin, Task):
+        project_stats.task_deleted(instance)
+
+
+@receiver(post_save, sender=LogEntry)
+def log_stats_saved(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if not raw:
+        project_stats.log_saved(instance, created, update_fields)
+
+
+@receiver(post_delete, sender=LogEntry)
+def log_stats_deleted(sender, instance, origin=None, **kwargs):
+    # Only single deletes: LogEntryQuerySet.delete() recounts once per project
+    if isinstance(origin, LogEntry):
+        project_stats.log_deleted(instance)
@@ -4,14 +4,45 @@ Automatic status and risk engine for projects based on GitHub activity
 from datetime import datetime, timedelta
 from django.utils import timezone
 from .github_client import GitHubClient
+from .github_data import status_inputs
 
 
 class StatusEngine:
     """Engine for automatic status and risk updates"""
     
-    def __init__(self, project):
+    def __init__(self, project, github_data=None):
+        """
+        Args:
+            project: Project to update
+            github_data: Optional prefetched {'pull_requests', 'commits', 'issues'}
+                (e.g. from the mirror or GitHubGraphQLClient.fetch_repositories);
+                fetched on demand when omitted
+        """
         self.project = project
         self.github = GitHubClient()
+        self.github_data = github_data
+    
+    def _prefetch(self):
+        """Load PRs, commits and issues from the mirror or a single GraphQL call"""
+        if self.github_data is not None or not self.project.repo_name:
+            return
+        self.github_data = status_inputs(self.project.repo_name)
+    
+    def _pull_requests(self):
+        if self.github_data is not None:
+            return self.github_data['pull_requests']
+        return self.github.fetch_pull_requests(self.project.repo_name, state='open')
+    
+    def _commits(self):
+        if self.github_data is not None:
+            return self.github_data['commits']
+        return self.github.fetch_commits(self.project.repo_name, limit=10)
+    
+    def _issues(self):
+        """Every open issue; streamed page by page when not prefetched"""
+        if self.github_data is not None and self.github_data.get('issues') is not None:
+            return self.github_data['issues']
+        return self.github.iter_issues(self.project.repo_name, state='open')
     
     def update_status(self):
         """Update project status based on GitHub activity"""
@@ -19,8 +50,9 @@ class StatusEngine:
             return False
         
         # Fetch GitHub data
-        prs = self.github.fetch_pull_requests(self.project.repo_name, state='open')
-        commits = self.github.fetch_commits(self.project.repo_name, limit=10)
+        self._prefetch()
+        prs = self._pull_requests()
+        commits = self._commits()
         
         # Determine status
         new_status = self._calculate_status(prs, commits)
@@ -37,19 +69,22 @@ class StatusEngine:
         if not self.project.repo_name or not self.project.auto_status_enabled:
             return False
         
-        # Fetch issues
-        issues = self.github.fetch_issues(self.project.repo_name, state='open')
+        self._prefetch()
         
-        # Count critical issues (those with specific labels)
-        critical_count = sum(
-            1 for issue in issues 
-            if any(label.lower() in ['critical', 'urgent', 'blocker', 'security'] 
-                   for label in issue.get('labels', []))
-        )
+        # Walk all open issues looking for critical ones (those with specific labels)
+        open_issues = 0
+        has_critical = False
+        for issue in self._issues():
+            open_issues += 1
+            if any(label.lower() in ['critical', 'urgent', 'blocker', 'security']
+                   for label in issue.get('labels', [])):
+                # HIGH whatever the remaining issues are; stop fetching pages
+                has_critical = True
+                break
         
         # Determine risk level
-        new_risk = 'HIGH' if critical_count > 0 else (
-            'MEDIUM' if len(issues) > 5 else 'LOW'
+        new_risk = 'HIGH' if has_critical else (
+            'MEDIUM' if open_issues > 5 else 'LOW'
         )
         
         if new_risk != self.project.risk:
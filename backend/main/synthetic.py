@@ -0,0 +1,191 @@
+"""
+Synthetic projects, tasks, links and log entries for load tests.
+
+generate() bulk-inserts a dataset whose shape follows a real control
+panel: most tasks are done, a few are urgent or overdue, task counts
+vary moderately between projects and log volume is heavy-tailed (a few
+busy repositories produce most of the events). The same arguments and
+seed always produce the same rows; dates are relative to today, so a
+dataset has the same share of overdue tasks whenever it is loaded.
+Tasks, logs and links are inserted with executemany() rather than
+bulk_create(), which keeps 10M rows to minutes.
+
+truncate() empties the project tables with one statement per table
+(TRUNCATE on PostgreSQL) instead of a cascading row-by-row delete.
+"""
+import random
+import time
+from datetime import timedelta
+from itertools import islice
+from typing import Callable, Iterable, List, Optional
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import project_stats
+from .models import LiveEvent, Link, LogEntry, Project, Task
+
+# Rows per INSERT
+BATCH_SIZE = 5000
+
+TASK_STATUSES = [('DONE', 50), ('TODO', 25), ('IN_PROGRESS', 15), ('BLOCKED', 10)]
+TASK_PRIORITIES = [('LOW', 25), ('MEDIUM', 45), ('HIGH', 22), ('URGENT', 8)]
+PROJECT_STATUSES = [('IN_PROGRESS', 45), ('PLANNING', 20), ('COMPLETED', 20), ('BLOCKED', 10), ('STALE', 5)]
+PROJECT_RISKS = [('LOW', 50), ('MEDIUM', 35), ('HIGH', 15)]
+LOG_EVENT_TYPES = [('PULL_REQUEST', 40), ('ISSUE', 30), ('WORKFLOW', 20), ('NOTE', 10)]
+LINK_TYPES = ['DOCS', 'DEPLOYMENT', 'OTHER']
+
+
+def _weighted(rng: random.Random, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def _allocate(rng: random.Random, total: int, weights: List[float]) -> List[int]:
+    """Split total into integer shares proportional to weights (largest remainder)"""
+    if not weights or not total:
+        return [0] * len(weights)
+    scale = total / sum(weights)
+    shares = [weight * scale for weight in weights]
+    counts = [int(share) for share in shares]
+    by_remainder = sorted(range(len(shares)), key=lambda index: shares[index] - counts[index], reverse=True)
+    for index in by_remainder[:total - sum(counts)]:
+        counts[index] += 1
+    return counts
+
+
+def _insert(model, fields: List[str], rows: Iterable[tuple], batch_size: int):
+    """
+    INSERT plain value tuples with executemany()
+
+    Building model instances and compiling bulk_create() SQL costs several
+    times more than the INSERT itself at millions of rows. Values must be
+    ready for the database (dates adapted); every other column gets its
+    field default, or now() for auto_now(_add) fields.
+    """
+    meta = model._meta
+    given = [meta.get_field(name) for name in fields]
+    template = model()
+    defaults = [
+        (field, field.get_db_prep_save(field.pre_save(template, add=True), connection))
+        for field in meta.concrete_fields
+        if field not in given and not field.primary_key and not field.generated
+    ]
+    columns = [field.column for field in given] + [field.column for field, _ in defaults]
+    constant = tuple(value for _, value in defaults)
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(meta.db_table), ', '.join(quote(column) for column in columns), ', '.join(['%s'] * len(columns)),
+    )
+    rows = iter(rows)
+    with connection.cursor() as cursor:
+        while True:
+            batch = [row + constant for row in islice(rows, batch_size)]
+            if not batch:
+                return
+            cursor.executemany(sql, batch)
+
+
+def truncate():
+    """Delete every project and the rows that belong to them, a table at a time"""
+    models = [Project, LiveEvent] + [
+        relation.related_model for relation in Project._meta.related_objects
+    ]
+    tables = sorted({model._meta.db_table for model in models})
+    statements = connection.ops.sql_flush(no_style(), tables, reset_sequences=True, allow_cascade=True)
+    connection.ops.execute_sql_flush(statements)
+
+
+def generate(projects: int, tasks: int, logs: int, links: Optional[int] = None, repos: Optional[int] = None,
+             seed: int = 1, batch_size: int = BATCH_SIZE,
+             progress: Optional[Callable[[str], None]] = None) -> List[int]:
+    """
+    Bulk-insert a synthetic dataset
+
+    Args:
+        projects: Number of projects
+        tasks: Tasks in total, spread moderately unevenly over the projects
+        logs: Log entries in total, heavy-tailed over the projects
+        links: Links in total (default: two per project)
+        repos: How many projects get a GitHub repository fmu/bench-<n>
+            (default: all)
+        seed: Random seed
+        batch_size: Rows per INSERT
+        progress: Called with a message after each table
+
+    Returns:
+        Ids of the created projects, in creation order
+    """
+    rng = random.Random(seed)
+    repos = projects if repos is None else repos
+    links = 2 * projects if links is None else links
+    today = timezone.now().date()
+    now = timezone.now()
+
+    def report(label, count, started):
+        if progress:
+            elapsed = time.perf_counter() - started
+            progress(f'{count} {label} in {elapsed:.1f} s ({count / max(elapsed, 1e-9):,.0f} rows/s)')
+
+    started = time.perf_counter()
+    with transaction.atomic():
+        created = Project.objects.bulk_create([
+            Project(
+                name=f'Bench project {index}',
+                repo_name=f'fmu/bench-{index}' if index < repos else '',
+                status=_weighted(rng, PROJECT_STATUSES),
+                risk=_weighted(rng, PROJECT_RISKS),
+                summary=f'Synthetic project {index}',
+                next_task=f'Next step for project {index}',
+            )
+            for index in range(projects)
+        ], batch_size=batch_size)
+    project_ids = [project.pk for project in created]
+    report('projects', len(project_ids), started)
+
+    # Per-project volumes: tasks vary moderately, log volume follows a Pareto tail
+    task_counts = _allocate(rng, tasks, [rng.lognormvariate(0, 0.5) for _ in project_ids])
+    log_counts = _allocate(rng, logs, [rng.paretovariate(1.2) for _ in project_ids])
+    link_counts = _allocate(rng, links, [rng.random() + 0.5 for _ in project_ids])
+
+    adapt_date = connection.ops.adapt_datefield_value
+    adapt_datetime = connection.ops.adapt_datetimefield_value
+    due_dates = {offset: adapt_date(today + timedelta(days=offset)) for offset in range(-21, 61)}
+
+    def task(project_id, index):
+        # Due dates mostly ahead, a fifth in the past, the rest unset
+        due = due_dates[rng.randint(-21, 60)] if rng.random() < 0.7 else None
+        return (project_id, f'Task {index}', _weighted(rng, TASK_STATUSES), _weighted(rng, TASK_PRIORITIES), due)
+
+    def log(project_id, index):
+        # Recent activity is denser than old activity
+        timestamp = now - timedelta(seconds=int(rng.expovariate(1 / (30 * 86400))))
+        return (project_id, f'Synthetic event {index}', _weighted(rng, LOG_EVENT_TYPES), adapt_datetime(timestamp))
+
+    def link(project_id, index):
+        link_type = LINK_TYPES[index % len(LINK_TYPES)]
+        return (project_id, f'{link_type.title()} {index}', f'https://example.com/{project_id}/{index}', link_type)
+
+    tables = [
+        ('tasks', Task, ['project', 'title', 'status', 'priority', 'due_date'], task_counts, task),
+        ('log entries', LogEntry, ['project', 'message', 'event_type', 'timestamp'], log_counts, log),
+        ('links', Link, ['project', 'title', 'url', 'link_type'], link_counts, link),
+    ]
+    for label, model, fields, counts, make in tables:
+        started = time.perf_counter()
+
+        def rows():
+            index = 0
+            for project_id, count in zip(project_ids, counts):
+                for _ in range(count):
+                    yield make(project_id, index)
+                    index += 1
+
+        with transaction.atomic():
+            _insert(model, fields, rows(), batch_size)
+        report(label, sum(counts), started)
+
+    # Rows went in without the bulk_create() hooks; count the stats once at the end
+    project_stats.rebuild(project_ids)
+    return project_ids
@@ -1,3 +1,985 @@
-from django.test import TestCase
+import base64
+import gzip
+import json
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    api, counters, github_data, github_mirror, github_ratelimit, github_trace, issue_sync, live, project_stats,
+    recompute, repo_cache, synthetic, webhook_queue,
+)
+from .fake_github import FakeGitHub
+from .github_cache import LRUResponseCache, reset_response_cache
+from .github_client import GitHubAPIError, GitHubClient, get_session, reset_session
+from .github_graphql import GitHubGraphQLClient
+from .models import (
+    Counter, GitHubIssue, GitHubPullRequest, LiveEvent, LogEntry, LogRollup, PendingRecompute, Project, ProjectStats,
+    RepoSync, Task, WebhookDelivery,
+)
+from .webhook_handler import WebhookHandler
+
+
+@override_settings(COUNTER_FLUSH_INTERVAL=3600)
+class ApiTests(TestCase):
+    """Keyset pages cover every row once, in order, with one query per page"""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.project = Project.objects.create(name='Project')
+        cls.other = Project.objects.create(name='Other')
+        Task.objects.bulk_create([
+            Task(project=cls.project if i % 2 else cls.other, title=f'Task {i}',
+                 status='DONE' if i % 3 == 0 else 'TODO', priority='HIGH' if i % 4 == 0 else 'LOW')
+            for i in range(25)
+        ])
+        # Repeated timestamps: ties are broken by id
+        LogEntry.objects.bulk_create([
+            LogEntry(project=cls.project, message=f'Event {i}', timestamp=now - timedelta(minutes=i // 3))
+            for i in range(20)
+        ])
+
+    async def read(self, response):
+        return b''.join([chunk async for chunk in response.streaming_content])
+
+    async def fetch(self, path, **params):
+        response = await self.async_client.get(path, params)
+        if response.status_code != 200:
+            return response.status_code, json.loads(response.content)
+        return response.status_code, json.loads(await self.read(response))
+
+    async def walk(self, path, **params):
+        rows = []
+        cursor = None
+        while True:
+            status, page = await self.fetch(path, **params, **({'cursor': cursor} if cursor else {}))
+            self.assertEqual(status, 200)
+            rows += page['results']
+            cursor = page['next']
+            if cursor is None:
+                return rows
+
+    async def test_pages_cover_every_row_in_order(self):
+        tasks = await self.walk(reverse('api_tasks'), limit=7, status='TODO', fields='id,status')
+        expected = [pk async for pk in Task.objects.filter(status='TODO').order_by('id').values_list('pk', flat=True)]
+        self.assertEqual([task['id'] for task in tasks], expected)
+        self.assertEqual(set(tasks[0]), {'id', 'status'})
+
+        logs = await self.walk(reverse('api_logs'), limit=4, fields='message')
+        expected = [message async for message in
+                    LogEntry.objects.order_by('-timestamp', '-id').values_list('message', flat=True)]
+        self.assertEqual([log['message'] for log in logs], expected)
+
+        _, page = await self.fetch(reverse('api_tasks'), project=str(self.project.pk), priority='HIGH,LOW')
+        self.assertTrue(all(task['project_id'] == self.project.pk for task in page['results']))
+
+    def test_page_is_one_query_however_deep(self):
+        cursor = None
+        for _ in range(5):
+            params = {'limit': 5, **({'cursor': cursor} if cursor else {})}
+            with self.assertNumQueries(1):
+                response = self.client.get(reverse('api_tasks'), params)
+                page = json.loads(async_to_sync(self.read)(response))
+            cursor = page['next']
+        self.assertIsNone(cursor)
+
+    @skipUnless(connection.vendor == 'sqlite', 'reads the SQLite query plan')
+    def test_project_pages_seek_an_index_without_sorting(self):
+        pages = {
+            'tasks': ('task_project_id_idx', {'id': 10}),
+            'logs': ('logentry_project_time_id_idx', {'id': 10, 'timestamp': timezone.now()}),
+        }
+        for name, (index, last_row) in pages.items():
+            cursor = api.encode_cursor(last_row, api.RESOURCES[name].ordering)
+            queryset = api.page(name, {'project': str(self.project.pk), 'cursor': cursor})[0]
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as db_cursor:
+                db_cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                plan = [row[-1] for row in db_cursor.fetchall()]
+            self.assertTrue(any(step.startswith('SEARCH') and index in step for step in plan), plan)
+            self.assertFalse([step for step in plan if 'TEMP B-TREE' in step], plan)
+
+    async def test_invalid_queries(self):
+        for params in ({'fields': 'secret'}, {'status': 'LOST'}, {'project': 'x'}, {'cursor': 'garbage'},
+                       {'limit': '0'}):
+            status, body = await self.fetch(reverse('api_tasks'), **params)
+            self.assertEqual(status, 400, params)
+            self.assertIn('error', body)
+        # Well-formed JSON holding an impossible date
+        cursor = base64.urlsafe_b64encode(json.dumps(['2024-13-45T00:00:00', 1]).encode()).decode()
+        status, body = await self.fetch(reverse('api_logs'), cursor=cursor)
+        self.assertEqual(status, 400)
+        self.assertIn('error', body)
+        with override_settings(API_TOKEN='secret'):
+            status, _ = await self.fetch(reverse('api_projects'))
+            self.assertEqual(status, 401)
+
+
+# Request metrics flush the shared counters every COUNTER_FLUSH_INTERVAL; keep that out of query counts
+@override_settings(COUNTER_FLUSH_INTERVAL=3600)
+class DashboardQueryTests(TestCase):
+    """The dashboard must not issue per-project queries"""
+
+    def create_projects(self, count, offset=0):
+        yesterday = timezone.now().date() - timedelta(days=1)
+        for index in range(offset, offset + count):
+            project = Project.objects.create(name=f'Project {index}')
+            Task.objects.create(project=project, title='Open', status='TODO')
+            Task.objects.create(project=project, title='Overdue', status='IN_PROGRESS', due_date=yesterday)
+            Task.objects.create(project=project, title='Done', status='DONE', due_date=yesterday)
+            LogEntry.objects.create(project=project, message='Started')
+
+    def test_query_count_is_constant(self):
+        self.create_projects(2)
+        with self.assertNumQueries(1):
+            self.client.get(reverse('home'))
+
+        self.create_projects(30, offset=2)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('home'))
+        self.assertEqual(len(response.context['projects']), 32)
+
+    def test_annotations(self):
+        self.create_projects(1)
+        empty = Project.objects.create(name='Empty')
+
+        projects = {p.pk: p for p in Project.objects.with_stats()}
+        project = Project.objects.get(name='Project 0')
+        self.assertEqual(projects[project.pk].open_tasks, 2)
+        self.assertEqual(projects[project.pk].open_tasks_count, 2)
+        self.assertEqual(projects[project.pk].overdue_tasks, 1)
+        self.assertEqual(projects[project.pk].last_log_at, project.logs.first().timestamp)
+        self.assertEqual(projects[empty.pk].open_tasks, 0)
+        self.assertEqual(projects[empty.pk].overdue_tasks, 0)
+        self.assertIsNone(projects[empty.pk].last_log_at)
+
+
+class TodayViewTests(TestCase):
+
+    def test_urgent_order_and_filter(self):
+        project = Project.objects.create(name='Project')
+        today = timezone.now().date()
+        Task.objects.create(project=project, title='high', priority='HIGH')
+        Task.objects.create(project=project, title='urgent', priority='URGENT')
+        Task.objects.create(project=project, title='overdue', priority='LOW', due_date=today - timedelta(days=1))
+        Task.objects.create(project=project, title='medium', priority='MEDIUM', due_date=today)
+        Task.objects.create(project=project, title='done', priority='URGENT', status='DONE')
+        Task.objects.filter(title='high').update(priority='HIGH')  # rank follows update() too
+
+        response = self.client.get(reverse('today'))
+        self.assertEqual([task.title for task in response.context['tasks']], ['urgent', 'high', 'overdue'])
+
+    @skipUnless(connection.vendor == 'sqlite', 'uses SQLite planner statistics')
+    def test_no_table_scan_at_one_million_tasks(self):
+        """With statistics for a 1M-row task table the planner must use the composite indexes"""
+        index_stats = {
+            'task_status_rank_due_idx': '1000000 250000 62500 60',
+            'task_status_due_idx': '1000000 250000 250',
+            # 200 projects with 4 statuses each
+            'task_project_status_idx': '1000000 5000 1250',
+        }
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            cursor.execute('DELETE FROM sqlite_stat1')
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'main_task'")
+            for (name,) in cursor.fetchall():
+                cursor.execute('INSERT INTO sqlite_stat1 VALUES (%s, %s, %s)',
+                               ['main_task', name, index_stats.get(name, '1000000 5000 1')])
+            cursor.execute("INSERT INTO sqlite_stat1 VALUES ('main_task', NULL, '1000000')")
+            cursor.execute("INSERT INTO sqlite_stat1 VALUES ('main_project', NULL, '1000')")
+            # Make the planner reload sqlite_stat1
+            cursor.execute('ANALYZE sqlite_master')
+
+            sql, params = Task.objects.urgent().select_related('project').query.sql_with_params()
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = [row[-1] for row in cursor.fetchall()]
+
+        self.assertFalse([step for step in plan if step.startswith('SCAN')], plan)
+        self.assertTrue(any('task_status_rank_due_idx' in step for step in plan), plan)
+        self.assertTrue(any('task_status_due_idx' in step for step in plan), plan)
+
+
+class LiveUpdateTests(TestCase):
+
+    def test_changes_render_only_affected_fragments(self):
+        project = Project.objects.create(name='Project')
+        task = Task.objects.create(project=project, title='Task')
+        LiveEvent.objects.all().delete()
+
+        task.status = 'DONE'
+        task.save()
+        events = list(LiveEvent.objects.all())
+        self.assertEqual([(e.kind, e.object_id) for e in events], [(live.TASK, task.pk)])
+
+        messages = dict((message.split(b'\n')[0], scope) for scope, message in live.render_messages(events * 3))
+        self.assertEqual(messages, {
+            f'event: project-{project.pk}'.encode(): live.DASHBOARD,
+            f'event: task-{task.pk}'.encode(): project.pk,
+        })
+
+    def test_wsgi_requests_are_not_streamed(self):
+        self.assertEqual(self.client.get(reverse('live_events')).status_code, 204)
+
+
+class ProjectDetailTests(TestCase):
+
+    def test_async_view_renders_and_updates(self):
+        project = Project.objects.create(name='Project')
+        Task.objects.create(project=project, title='Write docs')
+
+        response = self.client.get(reverse('project_detail', args=[project.pk]))
+        self.assertContains(response, 'Write docs')
+
+        response = self.client.post(reverse('project_detail', args=[project.pk]),
+                                    {'action': 'add_log', 'message': 'Shipped'})
+        self.assertRedirects(response, reverse('project_detail', args=[project.pk]))
+        self.assertEqual(project.logs.get().message, 'Shipped')
+        self.assertEqual(self.client.get(reverse('project_detail', args=[999])).status_code, 404)
+
+
+class ProjectStatsTests(TestCase):
+    """ProjectStats rows must follow every kind of task and log write"""
+
+    def counts(self, project):
+        stats = ProjectStats.objects.get(project=project)
+        return stats.open_tasks, stats.urgent_tasks, stats.overdue_tasks
+
+    def test_incremental_updates_match_raw_rows(self):
+        yesterday = timezone.now().date() - timedelta(days=1)
+        project = Project.objects.create(name='Project')
+        other = Project.objects.create(name='Other')
+        task = Task.objects.create(project=project, title='Task', priority='HIGH', due_date=yesterday)
+        self.assertEqual(self.counts(project), (1, 1, 1))
+
+        task.status = 'DONE'
+        task.save(update_fields=['status'])
+        self.assertEqual(self.counts(project), (0, 0, 0))
+
+        Task.objects.filter(pk=task.pk).update(status='TODO', priority='LOW')
+        self.assertEqual(self.counts(project), (1, 0, 1))
+
+        Task.objects.bulk_create([Task(project=project, title=f'Bulk {i}', priority='URGENT') for i in range(3)])
+        bulk = list(Task.objects.filter(title__startswith='Bulk'))
+        for bulk_task in bulk:
+            bulk_task.project = other
+        Task.objects.bulk_update(bulk, ['project'])
+        self.assertEqual(self.counts(project), (1, 0, 1))
+        self.assertEqual(self.counts(other), (3, 3, 0))
+
+        task.refresh_from_db()
+        task.project = other
+        task.save()
+        bulk[0].delete()
+        Task.objects.filter(title='Bulk 1').delete()
+        self.assertEqual(self.counts(project), (0, 0, 0))
+        self.assertEqual(self.counts(other), (2, 1, 1))
+
+        entry = LogEntry.objects.create(project=other, message='Hello')
+        self.assertEqual(ProjectStats.objects.get(project=other).last_activity_at, entry.timestamp)
+        self.assertEqual(project_stats.check(), [])
+
+        with_stats = {p.pk: (p.open_tasks, p.overdue_tasks, p.last_log_at)
+                      for p in Project.objects.with_stats()}
+        today = timezone.now().date()
+        raw = {p.pk: (p.tasks.exclude(status='DONE').count(),
+                      p.tasks.exclude(status='DONE').filter(due_date__lt=today).count(),
+                      p.logs.order_by('-timestamp').values_list('timestamp', flat=True).first())
+               for p in Project.objects.all()}
+        self.assertEqual(with_stats, raw)
+
+    def last_activity(self, project):
+        return ProjectStats.objects.get(project=project).last_activity_at
+
+    def test_last_activity_follows_log_deletes_and_moves(self):
+        now = timezone.now()
+        project = Project.objects.create(name='Project')
+        other = Project.objects.create(name='Other')
+        older = LogEntry.objects.create(project=project, message='Older', timestamp=now - timedelta(hours=3))
+        latest = LogEntry.objects.create(project=project, message='Latest', timestamp=now - timedelta(hours=1))
+        self.assertEqual(self.last_activity(project), latest.timestamp)
+
+        # A single delete, as from the admin delete view
+        LogEntry.objects.get(pk=latest.pk).delete()
+        self.assertEqual(self.last_activity(project), older.timestamp)
+
+        # A save that moves the entry back in time, with and without update_fields
+        entry = LogEntry.objects.get(pk=older.pk)
+        entry.timestamp = now - timedelta(hours=5)
+        entry.save()
+        self.assertEqual(self.last_activity(project), now - timedelta(hours=5))
+        entry.timestamp = now - timedelta(hours=6)
+        entry.save(update_fields=['timestamp'])
+        self.assertEqual(self.last_activity(project), now - timedelta(hours=6))
+
+        LogEntry.objects.filter(pk=entry.pk).update(timestamp=now - timedelta(hours=10))
+        self.assertEqual(self.last_activity(project), now - timedelta(hours=10))
+        LogEntry.objects.filter(pk=entry.pk).update(project=other)
+        self.assertEqual((self.last_activity(project), self.last_activity(other)), (None, now - timedelta(hours=10)))
+
+        moved = LogEntry.objects.get(pk=entry.pk)
+        moved.project = project
+        moved.save()
+        self.assertEqual((self.last_activity(project), self.last_activity(other)), (now - timedelta(hours=10), None))
+        self.assertEqual(project_stats.check(), [])
+
+    def test_bulk_deletes_recount_once_per_project(self):
+        projects = [Project.objects.create(name=f'Project {i}') for i in range(2)]
+        other = Project.objects.create(name='Other')
+        Task.objects.create(project=other, title='Kept')
+
+        def delete_tasks(count):
+            Task.objects.bulk_create([Task(project=projects[i % 2], title=f'Task {i}') for i in range(count)])
+            with CaptureQueriesContext(connection) as queries:
+                Task.objects.filter(project__in=projects).delete()
+            return len(queries)
+
+        # The same statements for 10 tasks as for 90
+        self.assertEqual(delete_tasks(10), delete_tasks(90))
+        self.assertEqual([self.counts(project) for project in projects], [(0, 0, 0)] * 2)
+        self.assertEqual(self.counts(other), (1, 0, 0))
+        # One list update per project, not per task
+        events = LiveEvent.objects.filter(kind=live.TASK_LIST, project_id__in=[project.pk for project in projects])
+        self.assertEqual(events.count(), 4)
+
+        def delete_project(count):
+            project = Project.objects.create(name='Doomed')
+            Task.objects.bulk_create([Task(project=project, title=f'Task {i}') for i in range(count)])
+            with CaptureQueriesContext(connection) as queries:
+                project.delete()
+            return len(queries)
+
+        self.assertEqual(delete_project(10), delete_project(90))
+        self.assertEqual(project_stats.check(), [])
+
+    def test_overdue_rolls_over_and_drift_is_repaired(self):
+        today = timezone.now().date()
+        project = Project.objects.create(name='Project')
+        Task.objects.create(project=project, title='Due today', due_date=today)
+        ProjectStats.objects.filter(project=project).update(overdue_as_of=today - timedelta(days=1))
+
+        # A day later the row is stale; readers count live until it is rolled over
+        tomorrow = today + timedelta(days=1)
+        self.assertEqual(Project.objects.with_stats(tomorrow).get().overdue_tasks, 1)
+        self.assertEqual(project_stats.roll_over(tomorrow), 1)
+        self.assertEqual(self.counts(project), (1, 0, 1))
+
+        ProjectStats.objects.filter(project=project).update(open_tasks=7)
+        self.assertEqual([row[:2] for row in project_stats.check()], [(project.pk, 'open_tasks')])
+        project_stats.rebuild()
+        self.assertEqual(project_stats.check(), [])
+
+
+class SyntheticDataTests(TestCase):
+    """seed_projects --scale and bench_suite rely on a repeatable dataset"""
+
+    def snapshot(self):
+        return (
+            list(Project.objects.order_by('pk').values_list('name', 'repo_name', 'status')),
+            list(Task.objects.order_by('pk').values_list('project__name', 'status', 'priority', 'due_date')),
+            list(LogEntry.objects.order_by('pk').values_list('project__name', 'event_type')),
+        )
+
+    def test_same_seed_same_rows(self):
+        synthetic.generate(20, 300, 1000, repos=5, seed=7, batch_size=64)
+        self.assertEqual((Project.objects.count(), Task.objects.count(), LogEntry.objects.count()), (20, 300, 1000))
+        self.assertEqual(Project.objects.exclude(repo_name='').count(), 5)
+        # Inserted without bulk_create(); the stats are rebuilt at the end
+        self.assertEqual(project_stats.check(), [])
+        first = self.snapshot()
+
+        synthetic.truncate()
+        self.assertFalse(Project.objects.exists() or Task.objects.exists() or ProjectStats.objects.exists())
+        synthetic.generate(20, 300, 1000, repos=5, seed=7, batch_size=64)
+        self.assertEqual(self.snapshot(), first)
+
+
+@override_settings(METRICS_TOKEN='scrape-token')
+class MetricsTests(TestCase):
+    """Requests are measured per view and exposed to authenticated scrapers"""
+
+    def samples(self):
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+        return dict(line.rsplit(' ', 1) for line in response.content.decode().splitlines()
+                    if not line.startswith('#'))
+
+    def test_views_are_measured(self):
+        Project.objects.create(name='Project')
+        before = self.samples()
+        self.client.get(reverse('home'))
+        after = self.samples()
+
+        def delta(name):
+            return float(after.get(name, 0)) - float(before.get(name, 0))
+
+        self.assertEqual(delta('http_requests_total{view="home",method="GET",status="200"}'), 1)
+        self.assertEqual(delta('http_request_duration_seconds_count{view="home"}'), 1)
+        # The dashboard is one query
+        self.assertEqual(delta('db_queries_per_request_bucket{view="home",le="0"}'), 0)
+        self.assertEqual(delta('db_queries_per_request_bucket{view="home",le="1"}'), 1)
+        self.assertGreater(delta('template_render_duration_seconds_sum{view="home"}'), 0)
+        # Cumulative buckets end at the count
+        self.assertEqual(after['http_request_duration_seconds_bucket{view="home",le="+Inf"}'],
+                         after['http_request_duration_seconds_count{view="home"}'])
+
+    @override_settings(COUNTER_FLUSH_INTERVAL=0)
+    def test_requests_never_flush_inline(self):
+        """Every request is due a flush here; it must run in the background, not in the request"""
+        project = Project.objects.create(name='Project')
+        flushed_in = []
+        with mock.patch.object(counters, 'flush', side_effect=lambda: flushed_in.append(
+                threading.current_thread().name)):
+            for path in (reverse('home'), reverse('project_detail', args=[project.pk])):
+                self.assertEqual(self.client.get(path).status_code, 200, path)
+                async_to_sync(self.async_client.get)(path)
+                for thread in threading.enumerate():
+                    if thread.name == 'counter-flush':
+                        thread.join(timeout=5)
+        self.assertTrue(flushed_in)
+        self.assertEqual(set(flushed_in), {'counter-flush'})
+        self.assertGreater(counters.value('http_requests_total{view="home",method="GET",status="200"}'), 0)
+
+    def test_requires_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 401)
+        with override_settings(METRICS_TOKEN=''):
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer ')
+            self.assertEqual(response.status_code, 404)
+
+
+class GitHubTraceTests(TestCase):
+    """A page's GitHub calls are grouped under its request, concurrent ones included"""
+
+    def test_calls_are_reported_per_request(self):
+        cache.clear()
+        reset_response_cache()
+        project = Project.objects.create(name='Project', repo_name='fmu/app')
+        with FakeGitHub() as fake, override_settings(GITHUB_API_URL=fake.url, GITHUB_TOKEN='',
+                                                     GITHUB_TRACE_HEADER=True):
+            with self.assertLogs('main.github_trace', 'INFO') as logs:
+                response = self.client.get(reverse('project_detail', args=[project.pk]))
+            calls = fake.stats['requests']
+
+        self.assertGreater(calls, 1)
+        self.assertTrue(response['X-GitHub-Calls'].startswith(f'{calls}; '))
+        summary = [line for line in logs.output if f'scope="GET /project/{project.pk}/"' in line]
+        self.assertEqual(len(summary), 1)
+        self.assertIn(f'calls={calls} ', summary[0])
+
+    def test_endpoint_template(self):
+        base = 'https://api.github.com'
+        self.assertEqual(github_trace.endpoint_template(f'{base}/repos/fmu/app/pulls', base),
+                         'repos/{owner}/{repo}/pulls')
+        self.assertEqual(github_trace.endpoint_template(f'{base}/repositories/42/issues?page=2', base),
+                         'repositories/{n}/issues')
+
+
+class RepoCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def wait_until_fresh(self, key):
+        for _ in range(100):
+            entry = repo_cache.lookup([key]).get(key)
+            if entry and not entry['stale']:
+                return
+            time.sleep(0.05)
+        self.fail(f'{key} was not refreshed')
+
+    def test_cached_until_matching_webhook_then_revalidated(self):
+        project = Project.objects.create(name='Project', repo_name='fmu/app')
+        with FakeGitHub() as fake, override_settings(GITHUB_API_URL=fake.url, GITHUB_TOKEN=''):
+            prs, _, _, freshness = github_data.open_pull_requests([project])
+            self.assertIsNone(freshness['fetched_at'])
+            github_data.repo_activity('fmu/app')
+            requests = fake.stats['requests']
+
+            # Everything is cached now
+            self.assertEqual(github_data.open_pull_requests([project])[0], prs)
+            data, _ = github_data.repo_activity('fmu/app')
+            self.assertFalse(data['refreshing'])
+            self.assertEqual(fake.stats['requests'], requests)
+
+            # A pull_request event makes only that repository's pull requests stale
+            WebhookHandler.dispatch('pull_request', {
+                'action': 'opened', 'repository': {'full_name': 'FMU/app'},
+                'pull_request': {'number': 1, 'title': 'New', 'user': {'login': 'octocat'}},
+            })
+            keys = github_data._activity_keys('fmu/app', 5, 10)[:3]
+            self.assertEqual([key.kind for key, entry in repo_cache.lookup(keys).items() if entry['stale']],
+                             [repo_cache.PULL_REQUESTS])
+
+            # Stale data is served at once; concurrent pages share one background refresh
+            served, _, _, freshness = github_data.open_pull_requests([project])
+            self.assertEqual((served, freshness['refreshing']), (prs, [project]))
+            for _ in range(4):
+                self.assertEqual(github_data.open_pull_requests([project])[0], prs)
+            self.wait_until_fresh(keys[0])
+            self.assertEqual(fake.stats['requests'], requests + 1)
+
+    def test_failed_fetches_are_not_cached(self):
+        reset_response_cache()
+        project = Project.objects.create(name='Project', repo_name='fmu/app')
+        keys = github_data._activity_keys('fmu/app', 5, 10)
+        # Every call is refused as rate limited, with no earlier response to fall back on
+        with FakeGitHub(rate_limit=0) as fake, override_settings(GITHUB_API_URL=fake.url, GITHUB_TOKEN=''), \
+                self.assertLogs('main', 'WARNING'):
+            prs, _, unavailable, _ = github_data.open_pull_requests([project])
+            self.assertEqual((prs, unavailable), ([], [project]))
+            data, _ = github_data.repo_activity('fmu/app')
+            self.assertEqual(data['pull_requests'], [])
+            data, _ = async_to_sync(github_data.arepo_activity)('fmu/app')
+            self.assertIn('pull requests', data['unavailable'])
+        self.assertEqual(repo_cache.lookup(keys), {})
+
+        # Once GitHub answers again the data is fetched, not served as "no pull requests"
+        cache.clear()
+        with FakeGitHub() as fake, override_settings(GITHUB_API_URL=fake.url, GITHUB_TOKEN=''):
+            self.assertEqual(len(github_data.open_pull_requests([project])[0]), 10)
+        self.assertEqual(list(repo_cache.lookup(keys)), keys[:1])
+
+
+@override_settings(STATUS_RECOMPUTE_WINDOW=30, STATUS_RECOMPUTE_MAX_WAIT=120)
+class RecomputeTests(TestCase):
+    """Webhook marks coalesce into one recompute, which survives a failure"""
+
+    def test_marks_coalesce_and_failures_are_retried(self):
+        project = Project.objects.create(name='Project', auto_status_enabled=True)
+        recompute.schedule(project, full=False)
+        recompute.schedule(project)
+        self.assertEqual(recompute.run_due(), 0)
+
+        later = timezone.now() + timedelta(minutes=1)
+        with mock.patch.object(recompute, '_recompute', side_effect=RuntimeError('GitHub down')), \
+                self.assertLogs('main.recompute', 'ERROR'):
+            self.assertEqual(recompute.run_due(later), 0)
+        pending = PendingRecompute.objects.get()
+        self.assertEqual((pending.marks, pending.full), (2, True))
+
+        with mock.patch.object(recompute, '_recompute') as run:
+            self.assertEqual(recompute.run_due(later + timedelta(minutes=1)), 1)
+        run.assert_called_once_with(project, True)
+        self.assertFalse(PendingRecompute.objects.exists())
+
+
+class IssueSyncTests(TestCase):
+    """Tasks follow their GitHub issue by number, never by title text"""
+
+    def setUp(self):
+        self.project = Project.objects.create(name='Project', repo_name='fmu/app', auto_sync_issues=True)
+
+    def issue_event(self, action, number, title='Bug'):
+        WebhookHandler.dispatch('issues', {
+            'action': action, 'repository': {'full_name': 'fmu/app'},
+            'issue': {'number': number, 'title': title, 'user': {'login': 'octocat'}, 'labels': []},
+        })
+
+    def statuses(self):
+        return dict(self.project.tasks.values_list('github_issue_number', 'status'))
+
+    def test_issue_one_does_not_match_issue_ten(self):
+        self.issue_event('opened', 10)
+        self.issue_event('opened', 1)
+        # Redelivered: still one task
+        self.issue_event('opened', 1)
+        self.assertEqual(self.statuses(), {1: 'TODO', 10: 'TODO'})
+
+        self.issue_event('closed', 1)
+        self.assertEqual(self.statuses(), {1: 'DONE', 10: 'TODO'})
+        self.issue_event('reopened', 1)
+        self.issue_event('closed', 10)
+        self.assertEqual(self.statuses(), {1: 'TODO', 10: 'DONE'})
+
+    def test_reconcile_repairs_stale_links(self):
+        Task.objects.create(project=self.project, title='GH Issue #1: Old title', status='DONE',
+                            github_issue_number=1)
+        Task.objects.create(project=self.project, title=issue_sync.task_title(2, 'Open'), status='TODO',
+                            github_issue_number=2)
+        Task.objects.create(project=self.project, title=issue_sync.task_title(3, 'Doing'), status='IN_PROGRESS',
+                            github_issue_number=3)
+        issues = [
+            {'number': 1, 'title': 'Reopened', 'state': 'open', 'labels': []},
+            {'number': 2, 'title': 'Open', 'state': 'closed', 'labels': []},
+            {'number': 3, 'title': 'Doing', 'state': 'open', 'labels': []},
+            {'number': 4, 'title': 'New', 'state': 'open', 'labels': ['Critical']},
+            {'number': 5, 'title': 'Closed before sync', 'state': 'closed', 'labels': []},
+        ]
+
+        totals = issue_sync.reconcile(self.project, iter(issues), batch_size=2)
+        self.assertEqual(totals, {'issues': 5, 'created': 1, 'updated': 2})
+        self.assertEqual(self.statuses(), {1: 'TODO', 2: 'DONE', 3: 'IN_PROGRESS', 4: 'TODO'})
+        self.assertEqual(self.project.tasks.get(github_issue_number=1).title, 'GH Issue #1: Reopened')
+        self.assertEqual(self.project.tasks.get(github_issue_number=4).priority, 'URGENT')
+        # Nothing left to change
+        self.assertEqual(issue_sync.reconcile(self.project, issues)['updated'], 0)
+
+
+@override_settings(GITHUB_WEBHOOK_SECRET='', WEBHOOK_ASYNC=True, WEBHOOK_RETRY_BACKOFF=30)
+class WebhookQueueTests(TestCase):
+    """Deliveries are answered with 202 and handled by the worker, with retries and a dead letter"""
+
+    def post(self, event, payload, delivery_id=''):
+        return self.client.post(reverse('github_webhook'), json.dumps(payload), content_type='application/json',
+                                HTTP_X_GITHUB_EVENT=event, HTTP_X_GITHUB_DELIVERY=delivery_id)
+
+    def issue_payload(self, number):
+        return {'action': 'opened', 'repository': {'full_name': 'fmu/app'},
+                'issue': {'number': number, 'title': 'Bug', 'user': {'login': 'octocat'}, 'labels': []}}
+
+    def make_due(self):
+        WebhookDelivery.objects.update(available_at=timezone.now())
+
+    def test_enqueue_then_process(self):
+        project = Project.objects.create(name='Project', repo_name='fmu/app')
+        response = self.post('issues', self.issue_payload(1))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'queued')
+        # Nothing is handled until the worker runs
+        self.assertFalse(project.logs.exists())
+
+        batch = webhook_queue.claim_batch(10)
+        self.assertEqual([delivery.status for delivery in batch], ['PROCESSING'])
+        self.assertEqual(webhook_queue.claim_batch(10), [])
+        self.assertEqual(webhook_queue.process_delivery(batch[0], max_attempts=3), 'DONE')
+        self.assertEqual(project.logs.get().event_type, 'ISSUE')
+
+        # Ignored events and pings are not queued
+        self.assertEqual(self.post('star', {}).status_code, 200)
+        self.assertEqual(WebhookDelivery.objects.count(), 1)
+
+    def test_redelivery_has_one_effect(self):
+        project = Project.objects.create(name='Project', repo_name='fmu/app')
+        guid = '72d3162e-cc78-11e3-81ab-4c9367dc0958'
+        self.assertEqual(self.post('issues', self.issue_payload(1), guid).status_code, 202)
+        response = self.post('issues', self.issue_payload(1), guid)
+        self.assertEqual((response.status_code, response.json()['status']), (200, 'duplicate'))
+        self.assertEqual(WebhookDelivery.objects.count(), 1)
+
+        with override_settings(WEBHOOK_ASYNC=False):
+            other = '72d3162e-cc78-11e3-81ab-4c9367dc0959'
+            # A handler failure forgets the GUID, so GitHub's redelivery is handled
+            with mock.patch.object(WebhookHandler, 'dispatch', side_effect=RuntimeError('GitHub down')):
+                with self.assertRaises(RuntimeError):
+                    self.post('issues', self.issue_payload(2), other)
+            # The handler failed after writing its log entry; nothing of it was kept
+            with mock.patch.object(github_mirror, 'touch', side_effect=RuntimeError('database is locked')):
+                with self.assertRaises(RuntimeError):
+                    self.post('issues', self.issue_payload(2), other)
+            for _ in range(2):
+                self.post('issues', self.issue_payload(2), other)
+        self.assertEqual(project.logs.count(), 1)
+
+        # Past the deduplication window a GUID is new again
+        with override_settings(WEBHOOK_DEDUP_TTL_HOURS=0):
+            self.assertEqual(self.post('issues', self.issue_payload(1), guid).status_code, 202)
+
+    def test_retry_then_dead_letter(self):
+        retried = webhook_queue.enqueue('issues', json.dumps(self.issue_payload(1)).encode())
+        broken = webhook_queue.enqueue('issues', b'{not json')
+
+        with mock.patch.object(WebhookHandler, 'dispatch', side_effect=[RuntimeError('GitHub down'), True]):
+            statuses = [webhook_queue.process_delivery(delivery, max_attempts=2)
+                        for delivery in webhook_queue.claim_batch(10)]
+            self.assertEqual(statuses, ['FAILED', 'FAILED'])
+            # Backed off: not due yet
+            self.assertEqual(webhook_queue.claim_batch(10), [])
+            retried.refresh_from_db()
+            self.assertGreater(retried.available_at, timezone.now() + timedelta(seconds=20))
+            self.assertIn('GitHub down', retried.last_error)
+
+            self.make_due()
+            statuses = {delivery.pk: webhook_queue.process_delivery(delivery, max_attempts=2)
+                        for delivery in webhook_queue.claim_batch(10)}
+        self.assertEqual(statuses, {retried.pk: 'DONE', broken.pk: 'DEAD'})
+
+        # Dead letters stay put for inspection
+        self.make_due()
+        self.assertEqual(webhook_queue.claim_batch(10), [])
+        broken.refresh_from_db()
+        self.assertEqual((broken.status, broken.attempts), ('DEAD', 2))
+
+    def test_failed_delivery_is_rolled_back_before_retry(self):
+        project = Project.objects.create(name='Project', repo_name='fmu/app')
+        webhook_queue.enqueue('issues', json.dumps(self.issue_payload(1)).encode())
+
+        # The mirror write fails after the log entry was created
+        with mock.patch.object(github_mirror, 'touch', side_effect=RuntimeError('database is locked')):
+            statuses = [webhook_queue.process_delivery(delivery, max_attempts=3)
+                        for delivery in webhook_queue.claim_batch(10)]
+        self.assertEqual(statuses, ['FAILED'])
+        self.assertFalse(project.logs.exists())
+        self.assertFalse(GitHubIssue.objects.exists())
+
+        self.make_due()
+        statuses = [webhook_queue.process_delivery(delivery, max_attempts=3)
+                    for delivery in webhook_queue.claim_batch(10)]
+        self.assertEqual(statuses, ['DONE'])
+        self.assertEqual(project.logs.count(), 1)
+        self.assertEqual(GitHubIssue.objects.count(), 1)
+
+    def test_batches_are_split_per_repository_in_arrival_order(self):
+        project = Project.objects.create(name='Project', repo_name='fmu/app', auto_sync_issues=True)
+        opened = webhook_queue.enqueue('issues', json.dumps(self.issue_payload(1)).encode())
+        other = webhook_queue.enqueue('issues', json.dumps(dict(self.issue_payload(1), repository={
+            'full_name': 'fmu/other'})).encode())
+        closed = webhook_queue.enqueue('issues', json.dumps(dict(self.issue_payload(1), action='closed', repository={
+            'full_name': 'FMU/App'})).encode())
+        broken = webhook_queue.enqueue('issues', b'{not json')
+
+        runs = webhook_queue.by_repository(list(reversed(webhook_queue.claim_batch(10))))
+        self.assertEqual([[delivery.pk for delivery in run] for run in runs],
+                         [[opened.pk, closed.pk], [other.pk], [broken.pk]])
+        for delivery in runs[0]:
+            self.assertEqual(webhook_queue.process_delivery(delivery, max_attempts=3), 'DONE')
+        self.assertEqual(project.tasks.get(github_issue_number=1).status, 'DONE')
+
+
+class LogRetentionTests(TestCase):
+    """prune_logs archives expired entries, keeps daily counts and deletes them"""
+
+    def test_prune_archives_rolls_up_and_deletes(self):
+        now = timezone.now()
+        project = Project.objects.create(name='Project', log_retention_days=30)
+        forever = Project.objects.create(name='Forever', log_retention_days=0)
+        LogEntry.objects.bulk_create([
+            LogEntry(project=project, message=f'Old {i}', event_type='ISSUE' if i % 2 else 'NOTE',
+                     timestamp=now - timedelta(days=40 + i % 2))
+            for i in range(5)
+        ] + [
+            LogEntry(project=project, message='Recent', timestamp=now - timedelta(days=1)),
+            LogEntry(project=forever, message='Ancient', timestamp=now - timedelta(days=400)),
+        ])
+        expired = set(project.logs.filter(message__startswith='Old').values_list('pk', flat=True))
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            out = StringIO()
+            call_command('prune_logs', '--dry-run', archive_dir=archive_dir, stdout=out)
+            self.assertIn('Would prune 5 log entries', out.getvalue())
+            self.assertEqual(project.logs.count(), 6)
+
+            call_command('prune_logs', batch_size=2, pause=0, archive_dir=archive_dir, stdout=out)
+            self.assertIn('Pruned 5 log entries', out.getvalue())
+            archived = []
+            for path in Path(archive_dir).glob(f'project-{project.pk}/*.ndjson.gz'):
+                with gzip.open(path, 'rt') as archive:
+                    archived += [json.loads(line) for line in archive]
+
+        self.assertEqual({record['id'] for record in archived}, expired)
+        self.assertEqual(list(project.logs.values_list('message', flat=True)), ['Recent'])
+        self.assertTrue(forever.logs.exists())
+        rollups = {(rollup.event_type, rollup.count) for rollup in LogRollup.objects.filter(project=project)}
+        self.assertEqual(rollups, {('NOTE', 3), ('ISSUE', 2)})
+        self.assertEqual(project_stats.check(), [])
+
+
+# Counter values are compared before and after; keep background flushes out of the way
+@override_settings(COUNTER_FLUSH_INTERVAL=3600)
+class GitHubClientTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        reset_response_cache()
+
+    def test_calls_share_one_keep_alive_connection(self):
+        reset_session()
+        with FakeGitHub() as fake, override_settings(GITHUB_API_URL=fake.url, GITHUB_TOKEN=''):
+            first, second = GitHubClient(), GitHubClient()
+            self.assertIs(first.session, second.session)
+            for index in range(5):
+                (first if index % 2 else second).fetch_repo_info(f'fmu/app-{index}')
+            self.assertEqual((fake.stats['requests'], fake.stats['connections']), (5, 1))
+
+            reset_session()
+            self.assertIsNot(get_session(), first.session)
+            GitHubClient().fetch_repo_info('fmu/app')
+            self.assertEqual(fake.stats['connections'], 2)
+
+    @override_settings(GITHUB_RESPONSE_CACHE='memory')
+    def test_unchanged_responses_are_revalidated(self):
+        with FakeGitHub() as fake, override_settings(GITHUB_API_URL=fake.url, GITHUB_TOKEN=''):
+            client = GitHubClient()
+            prs = client.fetch_pull_requests('fmu/app')
+            # Sent with If-None-Match; the 304 is answered from the cache
+            self.assertEqual(client.fetch_pull_requests('fmu/app'), prs)
+            self.assertEqual((fake.stats['requests'], fake.stats['not_modified']), (2, 1))
+            self.assertEqual(client.cached_pull_requests('fmu/app'), prs)
+
+            # Other tokens see other bodies: their validators are kept apart
+            GitHubClient(token='other').fetch_pull_requests('fmu/app')
+            self.assertEqual(fake.stats['not_modified'], 1)
+
+        lru = LRUResponseCache(max_entries=2)
+        for key in ('a', 'b', 'a', 'c'):
+            lru.set(key, {'data': key})
+        self.assertEqual((lru.get('a'), lru.get('b'), len(lru)), ({'data': 'a'}, None, 2))
+
+    @override_settings(GITHUB_GRAPHQL_BATCH_SIZE=25)
+    def test_graphql_batches_repositories_in_rest_shapes(self):
+        repos = [f'fmu/app-{index}' for index in range(30)]
+        with FakeGitHub(items_per_page=3) as fake, override_settings(
+                GITHUB_API_URL=fake.url, GITHUB_GRAPHQL_URL=f'{fake.url}/graphql', GITHUB_TOKEN='token'):
+            graphql = GitHubGraphQLClient()
+            self.assertTrue(graphql.available)
+            data = graphql.fetch_repositories(repos)
+            # 30 repositories in two queries of at most 25
+            self.assertEqual(sorted(data), sorted(repos))
+            self.assertEqual(fake.stats['graphql'], 2)
+
+            rest = GitHubClient()
+            self.assertEqual(data['fmu/app-1'], {
+                'pull_requests': rest.fetch_pull_requests('fmu/app-1'),
+                'commits': rest.fetch_commits('fmu/app-1'),
+                'issues': rest.fetch_issues('fmu/app-1'),
+            })
+        with override_settings(GITHUB_TOKEN=''):
+            self.assertFalse(GitHubGraphQLClient().available)
+
+    @override_settings(GITHUB_RATELIMIT_RESERVE=0.2)
+    def test_background_calls_leave_the_reserve_to_pages(self):
+        with FakeGitHub(rate_limit=10) as fake, override_settings(GITHUB_API_URL=fake.url, GITHUB_TOKEN=''):
+            page = GitHubClient(priority=github_ratelimit.INTERACTIVE)
+            worker = GitHubClient(priority=github_ratelimit.BACKGROUND)
+            repo = worker.fetch_repo_info('fmu/app')
+            for index in range(7):
+                page.fetch_repo_info(f'fmu/page-{index}')
+            self.assertEqual(github_ratelimit.state('')['remaining'], 2)
+
+            # Two calls left, both reserved for pages: the worker is served from its cache or nothing
+            calls = fake.stats['requests']
+            deferred = counters.value('github_ratelimit_deferred')
+            self.assertEqual(worker.fetch_repo_info('fmu/app'), repo)
+            self.assertIsNone(worker.fetch_repo_info('fmu/new'))
+            self.assertEqual(fake.stats['requests'], calls)
+            self.assertEqual(counters.value('github_ratelimit_deferred'), deferred + 2)
+
+            self.assertIsNotNone(page.fetch_repo_info('fmu/page-7'))
+            self.assertIsNotNone(page.fetch_repo_info('fmu/page-8'))
+            # The budget is spent: not even pages call GitHub until the window resets
+            self.assertIsNone(page.fetch_repo_info('fmu/page-9'))
+            self.assertEqual(fake.stats['requests'], calls + 2)
+            self.assertEqual(fake.stats.get('rate_limited', 0), 0)
+
+    def test_iterators_follow_pages_and_stop_early(self):
+        with FakeGitHub(total_items=250) as fake, override_settings(GITHUB_API_URL=fake.url, GITHUB_TOKEN=''):
+            client = GitHubClient()
+            issues = list(client.iter_issues('fmu/app', state='all'))
+            self.assertEqual([issue['number'] for issue in issues], list(range(1, 251)))
+            self.assertEqual(fake.stats['requests'], 3)
+
+            # stop() and limit end the iteration without fetching further pages
+            prs = list(client.iter_pull_requests('fmu/app', stop=lambda pr: pr['number'] > 120))
+            self.assertEqual(len(prs), 120)
+            self.assertEqual(fake.stats['requests'], 5)
+            self.assertEqual(len(client.fetch_commits('fmu/app', limit=5)), 5)
+            self.assertEqual(fake.stats['requests'], 6)
+
+        # An unanswered page ends the iteration, or raises when every item is needed
+        with FakeGitHub(rate_limit=0) as fake, override_settings(GITHUB_API_URL=fake.url, GITHUB_TOKEN=''), \
+                self.assertLogs('main', 'WARNING'):
+            client = GitHubClient()
+            self.assertEqual(list(client.iter_issues('fmu/other')), [])
+            with self.assertRaises(GitHubAPIError):
+                list(client.iter_issues('fmu/other', strict=True))
+
+
+class ReviewQueueTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        reset_response_cache()
+
+    @override_settings(REVIEW_QUEUE_DEADLINE=1.0, GITHUB_TOKEN='')
+    def test_repositories_are_fetched_concurrently_under_a_deadline(self):
+        fast = [Project.objects.create(name=f'Fast {i}', repo_name=f'fmu/fast-{i}') for i in range(6)]
+        slow = Project.objects.create(name='Slow', repo_name='fmu/slow')
+        # The slow repository answers well after the deadline; its call then times out in the background
+        with FakeGitHub(delays={'fmu/slow': 5.0}, default_delay=0.2, items_per_page=2) as fake, \
+                override_settings(GITHUB_API_URL=fake.url), mock.patch('main.github_client.logger'):
+            started = time.perf_counter()
+            response = self.client.get(reverse('review_merge'))
+            elapsed = time.perf_counter() - started
+            for thread in threading.enumerate():
+                if thread.name.startswith('github-fanout'):
+                    thread.join(timeout=5)
+
+        # Six 0.2 s repositories in parallel and the slow one cut off at the deadline (6.2 s one by one)
+        self.assertLess(elapsed, 2.5)
+        self.assertContains(response, 'GitHub did not respond in time for:')
+        self.assertEqual(list(response.context['unavailable_projects']), [slow])
+        self.assertEqual({pr['project'] for pr in response.context['pull_requests']}, set(fast))
+        self.assertEqual(len(response.context['pull_requests']), 12)
+
+
+@override_settings(GITHUB_WEBHOOK_SECRET='', WEBHOOK_ASYNC=False, GITHUB_TOKEN='')
+class GitHubMirrorTests(TestCase):
+    """Backfilled repositories are served from the local mirror, kept current by webhooks"""
+
+    def setUp(self):
+        cache.clear()
+        reset_response_cache()
+
+    def test_backfilled_repository_is_served_without_github_calls(self):
+        Project.objects.create(name='Project', repo_name='fmu/app')
+        with FakeGitHub(items_per_page=3) as fake, override_settings(GITHUB_API_URL=fake.url):
+            call_command('backfill_github', commits=2, stdout=StringIO())
+            self.assertTrue(RepoSync.objects.get(repo_name='fmu/app').backfilled_at)
+            self.assertEqual(GitHubPullRequest.objects.filter(repo_name='fmu/app').count(), 3)
+
+            requests = fake.stats['requests']
+            data, synced_at = github_data.repo_activity('fmu/app')
+            self.assertEqual(fake.stats['requests'], requests)
+        self.assertIsNotNone(synced_at)
+        self.assertEqual((len(data['pull_requests']), len(data['commits']), len(data['issues'])), (3, 2, 3))
+
+    def test_pull_request_webhook_writes_to_the_mirror(self):
+        Project.objects.create(name='Project', repo_name='fmu/app')
+        payload = {
+            'action': 'opened', 'repository': {'full_name': 'fmu/app'},
+            'pull_request': {'number': 42, 'title': 'Add mirror', 'state': 'open', 'user': {'login': 'octocat'},
+                             'html_url': 'https://github.com/fmu/app/pull/42',
+                             'created_at': '2024-01-01T00:00:00Z', 'updated_at': '2024-01-02T00:00:00Z'},
+        }
+        response = self.client.post(reverse('github_webhook'), json.dumps(payload), content_type='application/json',
+                                    HTTP_X_GITHUB_EVENT='pull_request')
+        self.assertEqual(response.status_code, 200)
+        pr = GitHubPullRequest.objects.get(repo_name='fmu/app', number=42)
+        self.assertEqual((pr.title, pr.user, pr.state), ('Add mirror', 'octocat', 'open'))
+        # Webhooks refresh the timestamp but only a backfill puts the repository on the mirror
+        sync = RepoSync.objects.get(repo_name='fmu/app')
+        self.assertIsNotNone(sync.synced_at)
+        self.assertIsNone(sync.backfilled_at)
+
+    def test_repository_names_match_ignoring_case(self):
+        Project.objects.create(name='Project', repo_name='FMU/App')
+        with FakeGitHub(items_per_page=3) as fake, override_settings(GITHUB_API_URL=fake.url):
+            call_command('backfill_github', commits=2, stdout=StringIO())
+
+        payload = {
+            'action': 'opened', 'repository': {'full_name': 'fmu/app'},
+            'pull_request': {'number': 42, 'title': 'Add mirror', 'state': 'open', 'user': {'login': 'octocat'}},
+        }
+        self.client.post(reverse('github_webhook'), json.dumps(payload), content_type='application/json',
+                         HTTP_X_GITHUB_EVENT='pull_request')
+        self.assertEqual(RepoSync.objects.count(), 1)
+
+        data, synced_at = github_data.repo_activity('FMU/App')
+        self.assertIsNotNone(synced_at)
+        self.assertEqual([pr['number'] for pr in data['pull_requests']][0], 42)
+        self.assertEqual(len(data['pull_requests']), 4)
+        self.assertEqual(list(github_mirror.pull_requests(['Fmu/APP'])), ['Fmu/APP'])
@@ -1,25 +1,90 @@
-from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse, HttpResponse
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Sum
+from django.shortcuts import aget_object_or_404, render, get_object_or_404, redirect
+from django.http import Http404, JsonResponse, HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
+import hmac
 import json
 from .models import Project, Task, Link, LogEntry
-from .github_client import GitHubClient
+from . import github_data as github_data_source
 from .webhook_handler import WebhookHandler
+from . import api, live, metrics as app_metrics, webhook_queue
 from .status_engine import StatusEngine
 
 
 def home(request):
     """Dashboard view listing all projects"""
-    projects = Project.objects.all()
+    # Task counts and latest log are read from the ProjectStats rows in the same query
+    projects = Project.objects.with_stats()
     return render(request, 'dashboard.html', {'projects': projects})
 
 
-def project_detail(request, project_id):
-    """Project detail view with editable fields, tasks, links, and logs"""
-    project = get_object_or_404(Project, id=project_id)
+async def project_detail(request, project_id):
+    """
+    Project detail view with editable fields, tasks, links, and logs
+    
+    Async so that live GitHub calls run concurrently and, under ASGI,
+    a slow GitHub does not hold a worker while it waits.
+    """
+    project = await aget_object_or_404(Project, id=project_id)
+    
+    if request.method == 'POST':
+        response = await sync_to_async(_update_project_detail)(request, project)
+        if response is not None:
+            return response
     
+    # GitHub data comes from the local mirror once the repository is backfilled;
+    # live calls are started first and overlap the queries below
+    github = asyncio.ensure_future(github_data_source.arepo_activity(project.repo_name))
+    try:
+        tasks = [task async for task in project.tasks.all()]
+        links = [link async for link in project.links.all()]
+        logs = [log async for log in project.logs.all()[:10]]  # Last 10 log entries
+    except BaseException:
+        github.cancel()
+        raise
+    github_data, github_synced_at = await github
+    
+    return render(request, 'project_detail.html', {
+        'project': project,
+        'tasks': tasks,
+        'links': links,
+        'logs': logs,
+        'github_data': github_data,
+        'github_synced_at': github_synced_at,
+        'poll': 0,
+    })
+
+
+async def project_github_activity(request, project_id):
+    """GitHub Activity section alone, reloaded by the page while stale data is being refreshed"""
+    project = await aget_object_or_404(Project, id=project_id)
+    github_data, github_synced_at = await github_data_source.arepo_activity(project.repo_name)
+    return render(request, 'partials/github_activity.html', {
+        'project': project,
+        'github_data': github_data,
+        'github_synced_at': github_synced_at,
+        'poll': _poll_count(request),
+    })
+
+
+def _poll_count(request):
+    """How many times a section has reloaded itself (?poll=)"""
+    try:
+        return int(request.GET.get('poll', 0))
+    except ValueError:
+        return 0
+
+
+def _update_project_detail(request, project):
+    """Handle the project detail forms; returns a redirect, or None for unknown actions"""
     # Handle project update
     if request.method == 'POST' and request.POST.get('action') == 'update_project':
         project.status = request.POST.get('status', project.status)
@@ -58,27 +123,7 @@ def project_detail(request, project_id):
         )
         return redirect('project_detail', project_id=project.id)
     
-    tasks = project.tasks.all()
-    links = project.links.all()
-    logs = project.logs.all()[:10]  # Last 10 log entries
-    
-    # Fetch GitHub data if repo_name is set
-    github_data = {}
-    if project.repo_name:
-        github = GitHubClient()
-        github_data = {
-            'pull_requests': github.fetch_pull_requests(project.repo_name),
-            'commits': github.fetch_commits(project.repo_name, limit=5),
-            'issues': github.fetch_issues(project.repo_name),
-        }
-    
-    return render(request, 'project_detail.html', {
-        'project': project,
-        'tasks': tasks,
-        'links': links,
-        'logs': logs,
-        'github_data': github_data,
-    })
+    return None
 
 
 def toggle_task_status(request, task_id):
@@ -103,55 +148,87 @@ def toggle_task_status(request, task_id):
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
 
-def today_view(request):
-    """Today view showing urgent and high-priority tasks"""
-    # Get urgent/high priority tasks that are not done
-    urgent_tasks = Task.objects.filter(
-        priority__in=['URGENT', 'HIGH']
-    ).exclude(status='DONE').select_related('project')
+async def live_events(request):
+    """
+    Server-Sent Events stream of updated dashboard cards, or with
+    ?project=<id> of one project's status and task rows
     
-    # Get overdue tasks
-    overdue_tasks = Task.objects.filter(
-        due_date__lt=timezone.now().date()
-    ).exclude(status='DONE').select_related('project')
+    HTMX's sse extension swaps each message into the element whose
+    sse-swap attribute names the event. Needs the ASGI application.
+    """
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker would be held for the whole stream; 204 tells EventSource not to retry
+        return HttpResponse(status=204)
     
-    # Combine and remove duplicates
-    all_urgent_tasks = (urgent_tasks | overdue_tasks).distinct().order_by('-priority', 'due_date')
+    project_id = request.GET.get('project')
+    try:
+        scope = int(project_id) if project_id else live.DASHBOARD
+    except ValueError:
+        return HttpResponse('Invalid project', status=400)
     
-    return render(request, 'today.html', {'tasks': all_urgent_tasks})
+    response = StreamingHttpResponse(live.stream(scope), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Tell nginx not to buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def today_view(request):
+    """Today view showing urgent and high-priority tasks"""
+    # Open tasks that are URGENT/HIGH or overdue, in one index-backed query
+    today = timezone.now().date()
+    tasks = Task.objects.urgent(today).select_related('project')
+    # Totals across projects from the ProjectStats rows
+    totals = Project.objects.with_stats(today).aggregate(
+        urgent_tasks=Sum('urgent_tasks'), overdue_tasks=Sum('overdue_tasks'),
+    )
+    
+    return render(request, 'today.html', {'tasks': tasks, 'today': today, 'totals': totals})
 
 
 def review_merge_queue(request):
     """Review & Merge Queue showing all open PRs across all repositories"""
     # Get all projects with GitHub repositories
-    projects = Project.objects.exclude(repo_name='').exclude(repo_name__isnull=True)
-    
-    github = GitHubClient()
-    all_prs = []
+    projects = list(Project.objects.exclude(repo_name='').exclude(repo_name__isnull=True))
     
-    for project in projects:
-        prs = github.fetch_pull_requests(project.repo_name, state='open')
-        for pr in prs:
-            pr['project'] = project
-            all_prs.append(pr)
+    all_prs, stale_projects, unavailable_projects, freshness = github_data_source.open_pull_requests(
+        projects, deadline=settings.REVIEW_QUEUE_DEADLINE,
+    )
     
-    # Sort by updated_at (most recent first)
-    all_prs.sort(key=lambda x: x.get('updated_at', ''), reverse=True)
-    
-    return render(request, 'review_merge.html', {'pull_requests': all_prs})
+    return render(request, 'review_merge.html', {
+        'pull_requests': all_prs,
+        'stale_projects': stale_projects,
+        'unavailable_projects': unavailable_projects,
+        'freshness': freshness,
+        'poll': _poll_count(request),
+    })
 
 
 @csrf_exempt
 @require_POST
 def github_webhook(request):
-    """GitHub webhook endpoint for real-time updates"""
-    # Get the webhook signature
-    signature = request.META.get('HTTP_X_HUB_SIGNATURE_256', '')
+    """
+    GitHub webhook endpoint for real-time updates
+    
+    Deliveries are verified and queued, then answered with 202; the
+    process_webhooks worker runs the handlers. Set WEBHOOK_ASYNC=False
+    to process inline (e.g. local development without a worker).
+    """
+    # Verify the signature whenever a secret is configured
+    if settings.GITHUB_WEBHOOK_SECRET:
+        signature = request.META.get('HTTP_X_HUB_SIGNATURE_256', '')
+        if not WebhookHandler.verify_signature(request.body, signature):
+            return HttpResponse('Invalid signature', status=403)
+    
+    # Get event type from header
+    event_type = request.META.get('HTTP_X_GITHUB_EVENT', '')
     
-    # Verify signature (in production, you should enforce this)
-    # payload_body = request.body
-    # if not WebhookHandler.verify_signature(payload_body, signature):
-    #     return HttpResponse('Invalid signature', status=403)
+    if event_type == 'ping':
+        # GitHub sends a ping event when webhook is first set up
+        return JsonResponse({'status': 'pong'})
+    
+    if event_type not in WebhookHandler.EVENTS:
+        return JsonResponse({'status': 'ignored', 'event': event_type})
     
     # Parse the webhook payload
     try:
@@ -159,21 +236,24 @@ def github_webhook(request):
     except json.JSONDecodeError:
         return HttpResponse('Invalid JSON', status=400)
     
-    # Get event type from header
-    event_type = request.META.get('HTTP_X_GITHUB_EVENT', '')
-    
-    # Handle different event types
-    handled = False
+    # Redeliveries of an already accepted delivery are a no-op. The GUID is
+    # recorded in the same transaction as the queue row, so a failed
+    # enqueue never turns GitHub's retry into a "duplicate".
+    delivery_id = request.META.get('HTTP_X_GITHUB_DELIVERY', '')
+    with transaction.atomic():
+        if webhook_queue.is_duplicate(delivery_id):
+            return JsonResponse({'status': 'duplicate', 'delivery': delivery_id})
+        if getattr(settings, 'WEBHOOK_ASYNC', True):
+            delivery = webhook_queue.enqueue(event_type, request.body, delivery_id)
+            return JsonResponse({'status': 'queued', 'id': delivery.id}, status=202)
     
-    if event_type == 'pull_request':
-        handled = WebhookHandler.handle_pull_request(data)
-    elif event_type == 'issues':
-        handled = WebhookHandler.handle_issues(data)
-    elif event_type == 'workflow_run':
-        handled = WebhookHandler.handle_workflow_run(data)
-    elif event_type == 'ping':
-        # GitHub sends a ping event when webhook is first set up
-        return JsonResponse({'status': 'pong'})
+    try:
+        # All or nothing, as in the queue worker: GitHub's redelivery must not repeat half a delivery
+        with transaction.atomic():
+            handled = WebhookHandler.dispatch(event_type, data)
+    except Exception:
+        webhook_queue.forget_delivery(delivery_id)
+        raise
     
     if handled:
         return JsonResponse({'status': 'success'})
@@ -181,6 +261,56 @@ def github_webhook(request):
         return JsonResponse({'status': 'ignored', 'event': event_type})
 
 
+@require_GET
+def metrics(request):
+    """
+    Prometheus metrics of every worker (see main.metrics)
+    
+    Scrapers authenticate with "Authorization: Bearer <METRICS_TOKEN>";
+    without a configured token the endpoint does not exist.
+    """
+    if not settings.METRICS_TOKEN:
+        raise Http404
+    if not _bearer_token_matches(request, settings.METRICS_TOKEN):
+        return HttpResponse('Unauthorized', status=401, headers={'WWW-Authenticate': 'Bearer'})
+    return HttpResponse(app_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _bearer_token_matches(request, token: str) -> bool:
+    expected = f'Bearer {token}'.encode()
+    return hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', '').encode(), expected)
+
+
+async def _api_page(request, resource: str):
+    """
+    One keyset-paginated page of a resource as streamed JSON (see main.api)
+    
+    Open like the pages unless API_TOKEN is set, then scrapers send
+    "Authorization: Bearer <API_TOKEN>".
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405, headers={'Allow': 'GET'})
+    if settings.API_TOKEN and not _bearer_token_matches(request, settings.API_TOKEN):
+        return JsonResponse({'error': 'Unauthorized'}, status=401, headers={'WWW-Authenticate': 'Bearer'})
+    try:
+        queryset, fields, limit, spec = api.page(resource, request.GET)
+    except api.InvalidQuery as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return StreamingHttpResponse(api.stream(queryset, fields, limit, spec), content_type='application/json')
+
+
+async def api_projects(request):
+    return await _api_page(request, 'projects')
+
+
+async def api_tasks(request):
+    return await _api_page(request, 'tasks')
+
+
+async def api_logs(request):
+    return await _api_page(request, 'logs')
+
+
 def update_project_status(request, project_id):
     """Manually trigger status update for a project"""
     project = get_object_or_404(Project, id=project_id)
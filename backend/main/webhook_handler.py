@@ -6,13 +6,30 @@ import hmac
 import hashlib
 from django.conf import settings
 from django.utils import timezone
-from .models import Project, Task, LogEntry
-from .status_engine import StatusEngine
+from .models import Project, LogEntry
+from . import github_mirror, issue_sync, recompute, repo_cache
+from .github_client import _trim_issues, _trim_pull_requests
 
 
 class WebhookHandler:
     """Handler for GitHub webhook events"""
     
+    # Event types with a handler; other events are acknowledged and ignored
+    EVENTS = ('pull_request', 'issues', 'workflow_run', 'push')
+    
+    @staticmethod
+    def dispatch(event_type, data):
+        """Route a parsed webhook payload to its handler"""
+        if event_type == 'pull_request':
+            return WebhookHandler.handle_pull_request(data)
+        elif event_type == 'issues':
+            return WebhookHandler.handle_issues(data)
+        elif event_type == 'workflow_run':
+            return WebhookHandler.handle_workflow_run(data)
+        elif event_type == 'push':
+            return WebhookHandler.handle_push(data)
+        return False
+    
     @staticmethod
     def verify_signature(payload_body, signature):
         """Verify webhook signature from GitHub"""
@@ -44,7 +61,7 @@ class WebhookHandler:
         
         # Find project with this repository
         try:
-            project = Project.objects.get(repo_name=repo_full_name)
+            project = Project.objects.for_repo(repo_full_name).get()
         except Project.DoesNotExist:
             return False
         
@@ -54,12 +71,17 @@ class WebhookHandler:
         pr_user = pr.get('user', {}).get('login', 'unknown')
         
         message = f"PR #{pr_number} {action}: {pr_title} by {pr_user}"
-        LogEntry.objects.create(project=project, message=message)
+        LogEntry.objects.create(project=project, message=message, event_type='PULL_REQUEST')
         
-        # Update project status if auto-enabled
+        # Keep the local mirror current
+        if pr_number:
+            github_mirror.save_pull_request(repo_full_name, _trim_pull_requests([pr])[0])
+            github_mirror.touch(repo_full_name)
+        repo_cache.invalidate(repo_full_name, [repo_cache.PULL_REQUESTS])
+        
+        # Update project status if auto-enabled (coalesced per project)
         if project.auto_status_enabled:
-            engine = StatusEngine(project)
-            engine.auto_update()
+            recompute.schedule(project, full=True)
         
         return True
     
@@ -75,7 +97,7 @@ class WebhookHandler:
         
         # Find project with this repository
         try:
-            project = Project.objects.get(repo_name=repo_full_name)
+            project = Project.objects.for_repo(repo_full_name).get()
         except Project.DoesNotExist:
             return False
         
@@ -87,16 +109,25 @@ class WebhookHandler:
         
         # Log the issue event
         message = f"Issue #{issue_number} {action}: {issue_title} by {issue_user}"
-        LogEntry.objects.create(project=project, message=message)
+        LogEntry.objects.create(project=project, message=message, event_type='ISSUE')
+        
+        # Keep the local mirror current
+        if issue_number:
+            if action == 'deleted':
+                github_mirror.delete_issue(repo_full_name, issue_number)
+            else:
+                for trimmed in _trim_issues([issue]):
+                    github_mirror.save_issue(repo_full_name, trimmed)
+            github_mirror.touch(repo_full_name)
+        repo_cache.invalidate(repo_full_name, [repo_cache.ISSUES])
         
         # Handle issue-to-task sync if enabled
         if project.auto_sync_issues:
             WebhookHandler._sync_issue_to_task(project, action, issue)
         
-        # Update project risk if auto-enabled
+        # Update project risk if auto-enabled (coalesced per project)
         if project.auto_status_enabled:
-            engine = StatusEngine(project)
-            engine.update_risk()
+            recompute.schedule(project, full=False)
         
         return True
     
@@ -112,7 +143,7 @@ class WebhookHandler:
         
         # Find project with this repository
         try:
-            project = Project.objects.get(repo_name=repo_full_name)
+            project = Project.objects.for_repo(repo_full_name).get()
         except Project.DoesNotExist:
             return False
         
@@ -128,7 +159,7 @@ class WebhookHandler:
         elif status:
             message += f" with status: {status}"
         
-        LogEntry.objects.create(project=project, message=message)
+        LogEntry.objects.create(project=project, message=message, event_type='WORKFLOW')
         
         # If workflow failed and project has auto-status, set to BLOCKED
         if conclusion == 'failure' and project.auto_status_enabled:
@@ -137,46 +168,60 @@ class WebhookHandler:
         
         return True
     
+    @staticmethod
+    def handle_push(data):
+        """Handle push webhook event (mirrors commits on the default branch)"""
+        repository = data.get('repository', {})
+        repo_full_name = repository.get('full_name')
+        
+        if not repo_full_name:
+            return False
+        
+        # Find project with this repository
+        try:
+            project = Project.objects.for_repo(repo_full_name).get()
+        except Project.DoesNotExist:
+            return False
+        
+        # Only the default branch feeds "Recent Commits" and the STALE check
+        default_branch = repository.get('default_branch') or repository.get('master_branch')
+        if data.get('ref') != f"refs/heads/{default_branch}":
+            return True
+        
+        for commit in data.get('commits', []):
+            github_mirror.save_commit(repo_full_name, {
+                'sha': commit.get('id', '')[:7],  # Short SHA
+                'message': commit.get('message', '').split('\n')[0],  # First line only
+                'author': commit.get('author', {}).get('name'),
+                'date': commit.get('timestamp'),
+                'html_url': commit.get('url'),
+            })
+        github_mirror.touch(repo_full_name)
+        repo_cache.invalidate(repo_full_name, [repo_cache.COMMITS])
+        
+        return True
+    
     @staticmethod
     def _sync_issue_to_task(project, action, issue):
-        """Sync GitHub issue to task"""
+        """Sync GitHub issue to task (point updates on the linked task)"""
         issue_number = issue.get('number')
-        issue_title = issue.get('title')
-        issue_body = issue.get('body', '')
-        issue_labels = [label.get('name') for label in issue.get('labels', [])]
-        
-        # Determine priority from labels
-        priority = 'MEDIUM'
-        if any(label.lower() in ['critical', 'urgent'] for label in issue_labels):
-            priority = 'URGENT'
-        elif any(label.lower() == 'high' for label in issue_labels):
-            priority = 'HIGH'
-        elif any(label.lower() == 'low' for label in issue_labels):
-            priority = 'LOW'
+        if not issue_number:
+            return
         
         # Create or update task based on action
         if action == 'opened':
-            # Create new task
-            Task.objects.create(
-                project=project,
-                title=f"GH Issue #{issue_number}: {issue_title}",
-                description=issue_body[:500] if issue_body else '',  # Limit description
-                status='TODO',
-                priority=priority
+            issue_sync.open_task(
+                project,
+                issue_number,
+                issue.get('title'),
+                issue.get('body', ''),
+                [label.get('name') for label in issue.get('labels', [])],
             )
         
         elif action == 'closed':
             # Mark corresponding task as DONE
-            tasks = Task.objects.filter(
-                project=project,
-                title__contains=f"GH Issue #{issue_number}"
-            )
-            tasks.update(status='DONE')
+            issue_sync.set_task_status(project, issue_number, 'DONE')
         
         elif action == 'reopened':
             # Reopen corresponding task
-            tasks = Task.objects.filter(
-                project=project,
-                title__contains=f"GH Issue #{issue_number}"
-            )
-            tasks.update(status='TODO')
+            issue_sync.set_task_status(project, issue_number, 'TODO')
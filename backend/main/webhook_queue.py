@@ -0,0 +1,166 @@
+"""
+Durable database-backed queue for GitHub webhook deliveries.
+
+The webhook endpoint only verifies and stores each delivery; the
+process_webhooks command drains the queue in batches, retries failures
+with exponential backoff and dead-letters deliveries that keep failing.
+"""
+import json
+import traceback
+import uuid
+from datetime import timedelta
+from typing import List
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import counters, github_trace
+from .models import WebhookDelivery, WebhookDeliveryKey
+from .webhook_handler import WebhookHandler
+
+
+def is_duplicate(delivery_id: str) -> bool:
+    """
+    Record a delivery GUID and report whether it was already seen.
+    
+    GUIDs are remembered for WEBHOOK_DEDUP_TTL_HOURS; a redelivery after
+    that window is treated as new. Deliveries without a valid GUID are
+    never considered duplicates.
+    """
+    counters.incr('webhook_deliveries')
+    try:
+        guid = uuid.UUID(delivery_id)
+    except (TypeError, ValueError):
+        return False
+    
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            WebhookDeliveryKey.objects.create(guid=guid, received_at=now)
+        return False
+    except IntegrityError:
+        pass
+    
+    # Known GUID: only a duplicate if it was seen within the TTL
+    cutoff = now - timedelta(hours=getattr(settings, 'WEBHOOK_DEDUP_TTL_HOURS', 72))
+    if WebhookDeliveryKey.objects.filter(guid=guid, received_at__lt=cutoff).update(received_at=now):
+        return False
+    counters.incr('webhook_duplicates')
+    return True
+
+
+def forget_delivery(delivery_id: str):
+    """Drop a recorded GUID so GitHub's redelivery of a failed delivery is processed"""
+    try:
+        WebhookDeliveryKey.objects.filter(guid=uuid.UUID(delivery_id)).delete()
+    except (TypeError, ValueError):
+        pass
+
+
+def prune_delivery_keys() -> int:
+    """Forget delivery GUIDs older than the deduplication window"""
+    cutoff = timezone.now() - timedelta(hours=getattr(settings, 'WEBHOOK_DEDUP_TTL_HOURS', 72))
+    deleted, _ = WebhookDeliveryKey.objects.filter(received_at__lt=cutoff).delete()
+    return deleted
+
+
+def enqueue(event: str, body: bytes, delivery_id: str = '') -> WebhookDelivery:
+    """Persist a raw delivery for background processing"""
+    return WebhookDelivery.objects.create(
+        event=event,
+        payload=body.decode('utf-8', errors='replace'),
+        delivery_id=delivery_id[:100],
+    )
+
+
+def claim_batch(batch_size: int) -> List[WebhookDelivery]:
+    """
+    Atomically move up to batch_size due deliveries to PROCESSING.
+
+    Deliveries stuck in PROCESSING longer than WEBHOOK_LOCK_TIMEOUT
+    (a worker died mid-batch) become claimable again.
+    """
+    now = timezone.now()
+    stale_lock = now - timedelta(seconds=getattr(settings, 'WEBHOOK_LOCK_TIMEOUT', 300))
+    due = WebhookDelivery.objects.filter(
+        Q(status__in=['PENDING', 'FAILED'], available_at__lte=now)
+        | Q(status='PROCESSING', locked_at__lt=stale_lock)
+    ).order_by('id')
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return []
+        WebhookDelivery.objects.filter(id__in=ids).update(status='PROCESSING', locked_at=now)
+    return list(WebhookDelivery.objects.filter(id__in=ids).order_by('id'))
+
+
+def by_repository(batch: List[WebhookDelivery]) -> List[List[WebhookDelivery]]:
+    """
+    Split a claimed batch into one run of deliveries per repository.
+
+    Each run keeps id (arrival) order so events for the same repository,
+    e.g. an issue opened then closed, are applied in the order GitHub
+    sent them; runs for different repositories can be processed in
+    parallel. Payloads without a repository each form their own run.
+    """
+    runs = {}
+    for delivery in sorted(batch, key=lambda delivery: delivery.pk):
+        try:
+            repo_name = json.loads(delivery.payload).get('repository', {}).get('full_name') or ''
+        except (ValueError, AttributeError):
+            repo_name = ''
+        # GitHub names are case-insensitive
+        key = repo_name.lower() or f'#{delivery.pk}'
+        runs.setdefault(key, []).append(delivery)
+    return list(runs.values())
+
+
+def process_delivery(delivery: WebhookDelivery, max_attempts: int) -> str:
+    """
+    Run the handler for one delivery and record the outcome.
+
+    The handler's writes and the DONE mark commit in one transaction, so
+    a delivery that fails part way leaves nothing behind to be written
+    twice when it is retried.
+
+    Returns:
+        The delivery's new status
+    """
+    attempts = delivery.attempts + 1
+    try:
+        # GitHub calls made by the handler are logged together under the delivery
+        with github_trace.scope(f'webhook {delivery.event} {delivery.delivery_id or delivery.pk}'):
+            data = json.loads(delivery.payload)
+            with transaction.atomic():
+                WebhookHandler.dispatch(delivery.event, data)
+                delivery.status = 'DONE'
+                delivery.attempts = attempts
+                delivery.locked_at = None
+                delivery.processed_at = timezone.now()
+                delivery.save(update_fields=['status', 'attempts', 'locked_at', 'processed_at'])
+    except Exception:
+        delivery.attempts = attempts
+        delivery.last_error = traceback.format_exc()[-2000:]
+        delivery.locked_at = None
+        if delivery.attempts >= max_attempts:
+            delivery.status = 'DEAD'
+        else:
+            backoff = getattr(settings, 'WEBHOOK_RETRY_BACKOFF', 30) * (2 ** (delivery.attempts - 1))
+            delivery.status = 'FAILED'
+            delivery.available_at = timezone.now() + timedelta(seconds=backoff)
+        delivery.save(update_fields=['attempts', 'last_error', 'locked_at', 'status', 'available_at'])
+        return delivery.status
+
+    return delivery.status
+
+
+def prune_done(retention_hours: int) -> int:
+    """Delete processed deliveries older than the retention window"""
+    cutoff = timezone.now() - timedelta(hours=retention_hours)
+    deleted, _ = WebhookDelivery.objects.filter(status='DONE', processed_at__lt=cutoff).delete()
+    return deleted